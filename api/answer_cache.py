@@ -0,0 +1,167 @@
+# api/answer_cache.py
+# -------------------- semantic cache of answers to near-duplicate questions -------------------- #
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, Hashable, List, NamedTuple, Optional, Tuple
+
+import faiss
+import numpy as np
+
+from lexical_index import tokenize
+
+
+class CachedAnswer(NamedTuple):
+    answer: str
+    sources: List[str]
+    confidence: float
+
+
+def exact_terms(query: str) -> FrozenSet[str]:
+    """
+    Terms of a query that are not plain words (error codes, versions,
+    identifiers, numbers). Embeddings barely tell "ERR-404" from "ERR-405",
+    so answers are only shared between queries with the same such terms.
+    """
+    return frozenset(term for term in tokenize(query) if not term.isalpha())
+
+
+class SemanticAnswerCache:
+    """
+    Answers of past queries, found again by embedding similarity.
+
+    Query embeddings live in a small exact inner-product FAISS index. A new
+    query whose embedding is within `threshold` cosine similarity of a
+    cached one, asked with the same retrieval parameters and the same
+    `exact_terms`, gets the cached answer back without retrieval or
+    generation.
+
+    Entries are only valid for the corpus version they were computed on:
+    when the store's version moves (chunks added or removed, index
+    reloaded), the whole cache is dropped at the next lookup. Beyond
+    `max_entries` the least recently used entry is evicted.
+    """
+
+    def __init__(self, dim: int, threshold: float = 0.95, max_entries: int = 1000):
+        """
+        Parameters
+        ----------
+        dim : int
+            Query embedding dimension.
+        threshold : float
+            Minimum cosine similarity between two queries for one to reuse
+            the other's answer. Near 1.0 only rephrasings match.
+        max_entries : int
+            Maximum number of cached answers.
+        """
+        self.dim = dim
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+
+        self._index = faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+        # entry id -> (retrieval parameters, exact terms, answer), oldest first
+        self._entries: "OrderedDict[int, Tuple[Hashable, FrozenSet[str], CachedAnswer]]" = OrderedDict()
+        self._next_id = 0
+        self._version: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(
+        self,
+        query: str,
+        query_embedding: np.ndarray,
+        params: Hashable,
+        version: int,
+    ) -> Optional[CachedAnswer]:
+        """
+        Cached answer for a query asked with `params` against corpus
+        `version`, or None.
+        """
+        terms = exact_terms(query)
+        row = self._as_row(query_embedding)
+        with self._lock:
+            self._check_version(version)
+            if not self._entries:
+                self.misses += 1
+                return None
+
+            # A few neighbours, in case the closest was asked with other
+            # params or terms
+            scores, ids = self._index.search(row, min(4, len(self._entries)))
+            for score, entry_id in zip(scores[0], ids[0]):
+                if entry_id < 0 or score < self.threshold:
+                    break
+                entry_params, entry_terms, answer = self._entries[int(entry_id)]
+                if entry_params == params and entry_terms == terms:
+                    self._entries.move_to_end(int(entry_id))
+                    self.hits += 1
+                    return answer
+
+            self.misses += 1
+            return None
+
+    def put(
+        self,
+        query: str,
+        query_embedding: np.ndarray,
+        params: Hashable,
+        version: int,
+        answer: CachedAnswer,
+    ) -> None:
+        """
+        Cache an answer computed against corpus `version`. Ignored if the
+        corpus has changed since.
+        """
+        terms = exact_terms(query)
+        row = self._as_row(query_embedding)
+        with self._lock:
+            self._check_version(version)
+            if version != self._version:
+                return
+
+            entry_id = self._next_id
+            self._next_id += 1
+            self._index.add_with_ids(row, np.array([entry_id], dtype="int64"))
+            self._entries[entry_id] = (params, terms, answer)
+
+            if len(self._entries) > self.max_entries:
+                oldest, _ = self._entries.popitem(last=False)
+                self._index.remove_ids(np.array([oldest], dtype="int64"))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def _check_version(self, version: int) -> None:
+        # Called with the lock held. A newer corpus invalidates every entry.
+        if self._version is None or version > self._version:
+            self._clear()
+            self._version = version
+
+    def _clear(self) -> None:
+        self._index.reset()
+        self._entries.clear()
+
+    def _as_row(self, vector: np.ndarray) -> np.ndarray:
+        row = np.ascontiguousarray(vector, dtype="float32").reshape(1, self.dim).copy()
+        faiss.normalize_L2(row)
+        return row
+
+
+def build_answer_cache(cfg: Dict[str, Any], dim: int) -> Optional[SemanticAnswerCache]:
+    """
+    Build an answer cache from an `answer_cache` settings section, or None
+    if disabled.
+    """
+    cfg = dict(cfg)
+    if not cfg.pop("enabled", False):
+        return None
+    return SemanticAnswerCache(dim, **cfg)
@@ -0,0 +1,211 @@
+# api/chunk_store.py
+
+import mmap
+import os
+from array import array
+import numpy as np
+from typing import Iterable, Tuple
+
+
+class ChunkStore:
+    """
+    Append-only store of chunk texts addressed by position.
+
+    Chunks are kept as UTF-8 in one contiguous blob plus an int64 offsets
+    array, so chunk ``i`` is ``blob[offsets[i]:offsets[i + 1]]``. Persisted
+    chunks are memory-mapped on load; chunks added afterwards are encoded
+    into an in-memory arena laid out the same way (one bytearray plus
+    offsets, not one Python string per chunk) until the next save appends
+    it to the blob.
+
+    Reads need no lock while one writer extends or saves: the arena and
+    its offsets are swapped as one tuple, after the new offsets of a save
+    are published.
+    """
+
+    BLOB_FILE = "chunks.bin"
+    OFFSETS_FILE = "chunk_offsets.npy"
+
+    def __init__(self):
+        self._blob: bytes | mmap.mmap = b""
+        self._offsets = np.zeros(1, dtype=np.int64)
+        self._arena = (bytearray(), array("q", [0]))
+
+    # ---------------------------------------------------------
+    # Sequence interface
+    # ---------------------------------------------------------
+    def __len__(self) -> int:
+        _, arena_offsets = self._arena
+        return len(self._offsets) - 1 + len(arena_offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        # Arena before offsets: a save publishes its offsets first, so
+        # chunks missing from this arena are covered by these offsets
+        arena, arena_offsets = self._arena
+        offsets = self._offsets
+        persisted = len(offsets) - 1
+        size = persisted + len(arena_offsets) - 1
+        if i < 0:
+            i += size
+
+        if 0 <= i < persisted:
+            start, end = offsets[i], offsets[i + 1]
+            return self._blob[start:end].decode("utf-8")
+        if persisted <= i < size:
+            i -= persisted
+            start, end = arena_offsets[i], arena_offsets[i + 1]
+            return arena[start:end].decode("utf-8")
+
+        raise IndexError("chunk index out of range")
+
+    def extend(self, texts: Iterable[str]) -> None:
+        arena, arena_offsets = self._arena
+        for text in texts:
+            arena += text.encode("utf-8")
+            arena_offsets.append(len(arena))
+
+    # ---------------------------------------------------------
+    # Persistence
+    # ---------------------------------------------------------
+    def save(self, directory: str) -> None:
+        """
+        Append buffered chunks to the on-disk blob and rewrite the offsets.
+
+        The blob is only ever appended to and the offsets file is replaced
+        atomically, so a crash mid-save leaves the previous state readable.
+        """
+        os.makedirs(directory, exist_ok=True)
+        blob_path = os.path.join(directory, self.BLOB_FILE)
+        offsets_path = os.path.join(directory, self.OFFSETS_FILE)
+
+        persisted_size = int(self._offsets[-1])
+        arena, arena_offsets = self._arena
+
+        with open(blob_path, "ab") as f:
+            # Drop any bytes left behind by an interrupted save
+            f.truncate(persisted_size)
+            f.write(arena)
+
+        arena_offsets = np.frombuffer(arena_offsets, dtype=np.int64)[1:]
+        offsets = np.concatenate([self._offsets, persisted_size + arena_offsets])
+
+        tmp_path = offsets_path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.save(f, offsets)
+        os.replace(tmp_path, offsets_path)
+
+        self._remap(blob_path, offsets)
+        self._arena = (bytearray(), array("q", [0]))
+
+    def load(self, directory: str) -> bool:
+        """
+        Memory-map a previously saved store. Returns False if none exists.
+        """
+        blob_path = os.path.join(directory, self.BLOB_FILE)
+        offsets_path = os.path.join(directory, self.OFFSETS_FILE)
+
+        if not (os.path.exists(blob_path) and os.path.exists(offsets_path)):
+            return False
+
+        self._remap(blob_path, np.load(offsets_path))
+        self._arena = (bytearray(), array("q", [0]))
+        return True
+
+    def _remap(self, blob_path: str, offsets: np.ndarray) -> None:
+        # Publish the new blob before the offsets that index into it, so
+        # concurrent readers always see offsets valid for the current blob.
+        if offsets[-1] > 0:
+            with open(blob_path, "rb") as f:
+                self._blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._offsets = offsets
+
+
+class VectorFile:
+    """
+    Append-only float32 matrix on disk, row ``i`` holding the vector of
+    chunk ``i``.
+
+    Used to re-rank candidates from a compressed index exactly without
+    keeping full-precision vectors in RAM: saved rows are memory-mapped, so
+    only the pages of rows actually looked up are read. Rows added since the
+    last save are buffered in a growable in-memory array, published with
+    its row count as one tuple so lookups need no lock.
+    """
+
+    VECTORS_FILE = "vectors.f32"
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self._mapped: np.ndarray = np.empty((0, dim), dtype="float32")
+        # (buffer, rows): rows past `rows` are not written yet
+        self._pending: Tuple[np.ndarray, int] = (np.empty((0, dim), dtype="float32"), 0)
+
+    def __len__(self) -> int:
+        return len(self._mapped) + self._pending[1]
+
+    def extend(self, vectors: np.ndarray) -> None:
+        buffer, rows = self._pending
+        end = rows + len(vectors)
+        if end > len(buffer):
+            grown = np.empty((max(end, 2 * len(buffer), 1024), self.dim), dtype="float32")
+            grown[:rows] = buffer[:rows]
+            buffer = grown
+        buffer[rows:end] = vectors
+        self._pending = (buffer, end)
+
+    def take(self, ids: np.ndarray) -> np.ndarray:
+        """
+        Rows for the given ids, as an (n, dim) float32 array.
+        """
+        # Pending rows before the mapping: a save re-maps first
+        buffer, rows = self._pending
+        mapped = self._mapped
+        persisted = len(mapped)
+        if not rows or len(ids) == 0 or ids.max() < persisted:
+            return np.asarray(mapped[ids])
+
+        out = np.empty((len(ids), self.dim), dtype="float32")
+        saved = ids < persisted
+        out[saved] = mapped[ids[saved]]
+        out[~saved] = buffer[ids[~saved] - persisted]
+        return out
+
+    # ---------------------------------------------------------
+    # Persistence
+    # ---------------------------------------------------------
+    def save(self, directory: str) -> None:
+        """
+        Append buffered rows to the file and re-map it.
+        """
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, self.VECTORS_FILE)
+        rows = len(self._mapped)
+        buffer, pending_rows = self._pending
+
+        with open(path, "ab") as f:
+            # Drop any partial rows left behind by an interrupted save
+            f.truncate(rows * self.dim * 4)
+            if pending_rows:
+                f.write(buffer[:pending_rows].tobytes())
+
+        self._remap(path, rows + pending_rows)
+        self._pending = (np.empty((0, self.dim), dtype="float32"), 0)
+
+    def load(self, directory: str, rows: int) -> bool:
+        """
+        Memory-map the first `rows` saved rows. Returns False if the file is
+        missing or holds fewer rows than that.
+        """
+        path = os.path.join(directory, self.VECTORS_FILE)
+        if not os.path.exists(path) or os.path.getsize(path) < rows * self.dim * 4:
+            return False
+
+        self._remap(path, rows)
+        self._pending = (np.empty((0, self.dim), dtype="float32"), 0)
+        return True
+
+    def _remap(self, path: str, rows: int) -> None:
+        if rows == 0:
+            self._mapped = np.empty((0, self.dim), dtype="float32")
+        else:
+            self._mapped = np.memmap(path, dtype="float32", mode="r", shape=(rows, self.dim))
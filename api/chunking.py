@@ -0,0 +1,161 @@
+# api/chunking.py
+# -------------------- token-aware, sentence-aware chunking into character spans -------------------- #
+
+import re
+from functools import lru_cache
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+# Where a new sentence / paragraph starts (the match end)
+SENTENCE_RE = re.compile(r"[.!?…][\"'”’)\]]*\s+")
+PARAGRAPH_RE = re.compile(r"\n[ \t]*\n\s*")
+Span = Tuple[int, int]
+
+
+# Lookup table of the code points str.split() treats as whitespace
+_IS_SPACE = np.array([chr(c).isspace() for c in range(0x3001)], dtype=bool)
+
+
+def word_offsets(text: str) -> np.ndarray:
+    """
+    (n, 2) character offsets of whitespace-separated words, computed on the
+    code points as one numpy array rather than match by match.
+    """
+    codes = np.frombuffer(text.encode("utf-32-le"), dtype=np.uint32)
+    space = np.ones(len(codes) + 2, dtype=bool)
+    space[1:-1] = _IS_SPACE[np.minimum(codes, 0x3000)] & (codes <= 0x3000)
+    edges = np.flatnonzero(space[1:] != space[:-1])
+    return edges.reshape(-1, 2).astype(np.int64)
+
+
+class TokenChunker:
+    """
+    Splits text into overlapping chunks measured in tokenizer tokens.
+
+    The text is tokenized once and only the tokens' character offsets are
+    kept. Each chunk holds at most `chunk_size` tokens and ends, by
+    preference, at a paragraph break, then at a sentence end, and only
+    otherwise mid-sentence. The next chunk starts `overlap` tokens earlier,
+    moved forward to a sentence start when one falls inside the overlap.
+
+    Chunks are returned as (start, end) character spans into the text, so
+    no substrings are built until the caller needs them.
+    """
+
+    def __init__(self, tokenizer=None, chunk_size: int = 254, overlap: int = 32):
+        """
+        Parameters
+        ----------
+        tokenizer : transformers.PreTrainedTokenizerFast | None
+            Fast tokenizer of the embedding model. None counts
+            whitespace-separated words instead.
+        chunk_size : int
+            Maximum tokens per chunk. Keep it within the embedding model's
+            window minus its special tokens (256 - 2 for MiniLM), or the
+            model silently truncates the chunk.
+        overlap : int
+            Tokens shared by consecutive chunks.
+        """
+        if overlap >= chunk_size:
+            raise ValueError("overlap must be smaller than chunk_size")
+
+        self.tokenizer = tokenizer
+        self.chunk_size = chunk_size
+        self.overlap = overlap
+
+    def token_offsets(self, text: str) -> np.ndarray:
+        """
+        (n, 2) array of each token's [start, end) character offsets.
+        """
+        if self.tokenizer is None:
+            return word_offsets(text)
+
+        encoding = self.tokenizer(
+            text,
+            add_special_tokens=False,
+            return_offsets_mapping=True,
+            return_attention_mask=False,
+            return_token_type_ids=False,
+            verbose=False,
+        )
+        return np.asarray(encoding["offset_mapping"], dtype=np.int64).reshape(-1, 2)
+
+    def spans(self, text: str) -> List[Span]:
+        """
+        Character spans of the chunks of `text`, in order.
+        """
+        offsets = self.token_offsets(text)
+        n = len(offsets)
+        if n == 0:
+            return []
+
+        starts, ends = offsets[:, 0], offsets[:, 1]
+        sentences = self._breaks(SENTENCE_RE, text, starts)
+        paragraphs = self._breaks(PARAGRAPH_RE, text, starts)
+        min_tokens = self.chunk_size // 2
+
+        spans: List[Span] = []
+        s = 0
+        while True:
+            limit = s + self.chunk_size
+            if limit >= n:
+                e = n
+            else:
+                e = self._last_break(paragraphs, s + min_tokens, limit)
+                if e is None:
+                    e = self._last_break(sentences, s + min_tokens, limit) or limit
+
+            spans.append((int(starts[s]), int(ends[e - 1])))
+            if e >= n:
+                return spans
+
+            next_start = e - self.overlap
+            i = np.searchsorted(sentences, next_start)
+            if i < len(sentences) and sentences[i] < e:
+                next_start = int(sentences[i])
+            s = max(next_start, s + 1)
+
+    def chunk(self, text: str) -> Tuple[List[str], List[Span]]:
+        """
+        Chunk texts of `text`, with their spans.
+        """
+        spans = self.spans(text)
+        return [text[start:end] for start, end in spans], spans
+
+    @staticmethod
+    def _breaks(pattern: re.Pattern, text: str, starts: np.ndarray) -> np.ndarray:
+        """
+        Indices of tokens that begin a new sentence / paragraph.
+        """
+        positions = np.fromiter((m.end() for m in pattern.finditer(text)), dtype=np.int64)
+        tokens = np.searchsorted(starts, positions)
+        return np.unique(tokens[(tokens > 0) & (tokens < len(starts))])
+
+    @staticmethod
+    def _last_break(breaks: np.ndarray, low: int, high: int) -> Optional[int]:
+        """
+        The last break in (low, high], if any.
+        """
+        i = np.searchsorted(breaks, high, side="right") - 1
+        if i >= 0 and breaks[i] > low:
+            return int(breaks[i])
+        return None
+
+
+@lru_cache(maxsize=4)
+def get_chunker(
+    tokenizer_name: Optional[str],
+    chunk_size: int,
+    overlap: int,
+) -> TokenChunker:
+    """
+    Shared chunker for a tokenizer (None for word counts). Cached per
+    process, so ingestion workers load the tokenizer once.
+    """
+    tokenizer = None
+    if tokenizer_name is not None:
+        from transformers import AutoTokenizer
+
+        tokenizer = AutoTokenizer.from_pretrained(tokenizer_name, use_fast=True)
+    return TokenChunker(tokenizer, chunk_size=chunk_size, overlap=overlap)
@@ -0,0 +1,259 @@
+# api/documents.py
+
+import hashlib
+import json
+import os
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Set, Tuple
+
+
+def document_key(name: str) -> str:
+    """
+    Normalized form of a document's name: its relative path (or any key the
+    client chose), with "/" separators, no empty or "." parts, lowercased.
+    """
+    parts = [part.strip() for part in name.replace("\\", "/").split("/")]
+    return "/".join(part for part in parts if part not in ("", ".")).lower()
+
+
+def document_id(name: str) -> str:
+    """
+    Stable document id derived from the document's relative path or key,
+    so re-uploading a file replaces the previous version instead of adding
+    a copy, while same-named files in different folders stay distinct.
+    """
+    return hashlib.sha1(document_key(name).encode("utf-8")).hexdigest()[:16]
+
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def file_hash(path: str, block_size: int = 1 << 20) -> Tuple[str, int]:
+    """
+    content_hash of a file and its size, read in blocks.
+    """
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        while block := f.read(block_size):
+            digest.update(block)
+            size += len(block)
+    return digest.hexdigest(), size
+
+
+def chunk_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+@dataclass
+class DocumentRecord:
+    id: str
+    filename: str
+    content_hash: str
+    chunk_ids: List[int] = field(default_factory=list)
+    # (start, end) character span of each chunk in the document's cleaned
+    # text (see DocumentTexts)
+    spans: List[List[int]] = field(default_factory=list)
+    # (first, last) page of each chunk; empty for files without pages
+    pages: List[List[int]] = field(default_factory=list)
+    size: Optional[int] = None
+    content_type: Optional[str] = None
+    uploaded_at: str = field(default_factory=lambda: datetime.utcnow().isoformat())
+
+
+class DocumentRegistry:
+    """
+    Tracks which chunks belong to which document.
+
+    Identical chunks are stored once and shared between documents (looked up
+    by `chunk_hash`), with a reference count so a chunk is only removed from
+    the vector store when the last document using it goes away.
+    """
+
+    REGISTRY_FILE = "documents.json"
+
+    def __init__(self):
+        self.documents: Dict[str, DocumentRecord] = {}
+        self.chunk_ids: Dict[str, int] = {}  # chunk hash -> chunk id
+        self._chunk_hashes: Dict[int, str] = {}  # chunk id -> chunk hash
+        self._refcounts: Counter = Counter()
+        self._users: Dict[int, Set[str]] = {}  # chunk id -> ids of documents using it
+
+    def __len__(self) -> int:
+        return len(self.documents)
+
+    def get(self, doc_id: str) -> Optional[DocumentRecord]:
+        return self.documents.get(doc_id)
+
+    def live_chunk_ids(self) -> List[int]:
+        """
+        Ids of all chunks referenced by at least one document, ascending.
+        """
+        return sorted(self._refcounts)
+
+    def locate(self, chunk_id: int) -> List[Tuple[DocumentRecord, int]]:
+        """
+        Every document using a chunk, with the chunk's first position in
+        it, ordered by document id.
+        """
+        return [
+            (self.documents[doc_id], self.documents[doc_id].chunk_ids.index(chunk_id))
+            for doc_id in sorted(self._users.get(chunk_id, ()))
+        ]
+
+    def add_chunk(self, digest: str, chunk_id: int) -> None:
+        """
+        Record a newly stored chunk so later duplicates can reuse it.
+        """
+        self.chunk_ids[digest] = chunk_id
+        self._chunk_hashes[chunk_id] = digest
+
+    def discard_chunks(self, chunk_ids: List[int]) -> List[int]:
+        """
+        Forget chunks added with `add_chunk` that no document references,
+        e.g. those of an ingestion that failed. Returns the forgotten ids.
+        """
+        orphans = [cid for cid in chunk_ids if cid not in self._refcounts]
+        for cid in orphans:
+            digest = self._chunk_hashes.pop(cid, None)
+            if digest is not None:
+                self.chunk_ids.pop(digest, None)
+        return orphans
+
+    def register(self, record: DocumentRecord) -> List[int]:
+        """
+        Add or replace a document. Returns the ids of chunks that no
+        document references any more and should be removed from the store.
+        """
+        old = self.documents.get(record.id)
+        self.documents[record.id] = record
+        self._use(record)
+
+        # Chunks dropped by the old version but reused by the new one survive
+        return self._release(old) if old is not None else []
+
+    def remove(self, doc_id: str) -> List[int]:
+        """
+        Remove a document. Returns the ids of chunks it leaves unreferenced.
+        """
+        return self._release(self.documents.pop(doc_id))
+
+    def _use(self, record: DocumentRecord) -> None:
+        for cid in set(record.chunk_ids):
+            self._refcounts[cid] += 1
+            self._users.setdefault(cid, set()).add(record.id)
+
+    def _release(self, record: DocumentRecord) -> List[int]:
+        # The record's replacement, if any, is already registered
+        current = self.documents.get(record.id)
+        kept = set(current.chunk_ids) if current is not None else set()
+        orphans = []
+        for cid in set(record.chunk_ids):
+            if cid not in kept:
+                users = self._users.get(cid)
+                if users is not None:
+                    users.discard(record.id)
+                    if not users:
+                        del self._users[cid]
+            self._refcounts[cid] -= 1
+            if self._refcounts[cid] <= 0:
+                del self._refcounts[cid]
+                orphans.append(cid)
+                digest = self._chunk_hashes.pop(cid, None)
+                if digest is not None:
+                    self.chunk_ids.pop(digest, None)
+        return orphans
+
+    # ---------------------------------------------------------
+    # Persistence
+    # ---------------------------------------------------------
+    def save(self, directory: str) -> None:
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, self.REGISTRY_FILE)
+        data = {
+            "documents": [asdict(record) for record in self.documents.values()],
+            "chunks": self.chunk_ids,
+        }
+        with open(path + ".tmp", "w") as f:
+            json.dump(data, f)
+        os.replace(path + ".tmp", path)
+
+    def load(self, directory: str) -> bool:
+        path = os.path.join(directory, self.REGISTRY_FILE)
+        if not os.path.exists(path):
+            return False
+
+        with open(path) as f:
+            data = json.load(f)
+
+        self.documents = {}
+        self.chunk_ids = {}
+        self._chunk_hashes = {}
+        self._refcounts = Counter()
+        self._users = {}
+        for digest, cid in data["chunks"].items():
+            self.add_chunk(digest, cid)
+        for record in data["documents"]:
+            record = DocumentRecord(**record)
+            self.documents[record.id] = record
+            self._use(record)
+        return True
+
+
+class DocumentTexts:
+    """
+    Cleaned text of each document, which its chunks' spans point into, so
+    clients can show a cited chunk in context.
+
+    Stored as one UTF-8 file per document in the `texts` subdirectory of
+    the index, written as soon as the document is committed (no index save
+    needed, and readable by every worker of a shared index). Kept in
+    memory when there is no index directory.
+    """
+
+    DIRECTORY = "texts"
+
+    def __init__(self, index_path: Optional[str] = None):
+        """
+        Parameters
+        ----------
+        index_path : str | None
+            Index directory, or None to keep texts in memory.
+        """
+        self.directory = None if index_path is None else os.path.join(index_path, self.DIRECTORY)
+        self._texts: Dict[str, str] = {}
+
+    def get(self, doc_id: str) -> Optional[str]:
+        if self.directory is None:
+            return self._texts.get(doc_id)
+        try:
+            with open(self._path(doc_id), encoding="utf-8") as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def put(self, doc_id: str, text: str) -> None:
+        if self.directory is None:
+            self._texts[doc_id] = text
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(doc_id)
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(path + ".tmp", path)
+
+    def remove(self, doc_id: str) -> None:
+        if self.directory is None:
+            self._texts.pop(doc_id, None)
+            return
+        try:
+            os.remove(self._path(doc_id))
+        except FileNotFoundError:
+            pass
+
+    def _path(self, doc_id: str) -> str:
+        # Document ids are hex digests, safe as file names
+        return os.path.join(self.directory, f"{doc_id}.txt")
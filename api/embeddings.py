@@ -1,39 +1,591 @@
 # api/embeddings.py
+import hashlib
+import importlib.util
+import queue
+import sqlite3
+import threading
+import time
 import numpy as np
-from sentence_transformers import SentenceTransformer
-from typing import List, Optional
-import torch
+from collections import OrderedDict
+from functools import lru_cache
+from concurrent.futures import Future
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
 
-_model: Optional[SentenceTransformer] = None
+from utils import clean_text, get_config
 
-def get_embedding_model(device: Optional[str] = None) -> SentenceTransformer:
+if TYPE_CHECKING:
+    # torch and sentence_transformers take seconds to import: only loaded
+    # with the model (`load_embedding_model`)
+    from sentence_transformers import SentenceTransformer
+
+MODEL_NAME = "all-MiniLM-L6-v2"
+
+# fp32 PyTorch, ONNX Runtime, PyTorch with int8 dynamically quantized Linear
+# layers, or a deterministic stand-in that needs no model weights
+EMBEDDING_BACKENDS = ("torch", "onnx", "int8", "fake")
+
+_model: Optional["SentenceTransformer"] = None
+_model_lock = threading.Lock()
+
+
+class FakeEmbeddingModel:
     """
-    Get or initialize the embedding model.
+    Deterministic local stand-in for a SentenceTransformer: a hashed bag of
+    words, so texts sharing words get similar vectors. Used for tests and
+    benchmarks that must run without downloading model weights.
     """
-    global _model
 
-    if _model is None:
-        if device is None:
-            device = "cuda" if torch.cuda.is_available() else "cpu"
+    def __init__(self, dim: int = 384):
+        """
+        Parameters
+        ----------
+        dim : int
+            Embedding dimension; must match `vector_store.embedding_dim`.
+        """
+        self.dim = dim
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def encode(
+        self,
+        texts: List[str],
+        batch_size: int = 32,
+        convert_to_numpy: bool = True,
+        normalize_embeddings: bool = False,
+        **kwargs,
+    ) -> np.ndarray:
+        out = np.zeros((len(texts), self.dim), dtype="float32")
+        for i, text in enumerate(texts):
+            for word in text.lower().split():
+                h = int.from_bytes(hashlib.blake2b(word.encode(), digest_size=8).digest(), "little")
+                out[i, h % self.dim] += 1.0 if h >> 63 else -1.0
+        if normalize_embeddings:
+            norms = np.linalg.norm(out, axis=1, keepdims=True)
+            out /= np.where(norms == 0, 1.0, norms)
+        return out
+
+
+def get_model_config() -> Dict[str, Any]:
+    """
+    The `embedding_model` settings section, normalized to a dict.
+
+    A plain string is still accepted and taken as the model name with the
+    default PyTorch backend.
+    """
+    cfg = get_config().get("embedding_model") or {}
+    if isinstance(cfg, str):
+        cfg = {"name": cfg}
+    return {"name": MODEL_NAME, "backend": "torch", **cfg}
+
+
+@lru_cache(maxsize=1)
+def _model_id() -> str:
+    cfg = get_model_config()
+    return f"{cfg['name']}|{cfg['backend']}"
 
-        _model = SentenceTransformer(
-            "all-MiniLM-L6-v2",
-            device=device
+
+def load_embedding_model(
+    name: str = MODEL_NAME,
+    backend: str = "torch",
+    device: Optional[str] = None,
+    onnx_file: Optional[str] = None,
+    threads: Optional[int] = None,
+    dim: int = 384,
+) -> "SentenceTransformer":
+    """
+    Load a SentenceTransformer with the requested inference backend.
+
+    Parameters
+    ----------
+    name : str
+        Model name or local path.
+    backend : str
+        One of EMBEDDING_BACKENDS. "onnx" needs `sentence-transformers[onnx]`
+        (onnxruntime + optimum); "int8" quantizes the PyTorch model's Linear
+        layers and runs on CPU only.
+    device : str | None
+        Torch device; defaults to CUDA when available (CPU for "int8").
+    onnx_file : str | None
+        ONNX file inside the model repo, e.g. "onnx/model_qint8_avx512.onnx"
+        for a pre-quantized export. Defaults to the fp32 "onnx/model.onnx".
+    threads : int | None
+        Intra-op CPU threads for torch inference.
+    dim : int
+        Embedding dimension of the "fake" backend (`name` is ignored).
+    """
+    if backend not in EMBEDDING_BACKENDS:
+        raise ValueError(
+            f"Unknown embedding backend '{backend}'. Expected one of {EMBEDDING_BACKENDS}."
         )
 
+    if backend == "fake":
+        return FakeEmbeddingModel(dim)
+
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    if threads:
+        torch.set_num_threads(threads)
+
+    if backend == "int8":
+        device = "cpu"
+    elif device is None:
+        device = "cuda" if torch.cuda.is_available() else "cpu"
+
+    if backend == "onnx":
+        if importlib.util.find_spec("onnxruntime") is None or importlib.util.find_spec("optimum") is None:
+            raise ImportError(
+                "The onnx embedding backend requires `pip install sentence-transformers[onnx]`."
+            )
+        model_kwargs = {"file_name": onnx_file} if onnx_file else None
+        return SentenceTransformer(name, device=device, backend="onnx", model_kwargs=model_kwargs)
+
+    model = SentenceTransformer(name, device=device)
+    if backend == "int8":
+        model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return model
+
+
+def get_embedding_model(device: Optional[str] = None) -> "SentenceTransformer":
+    """
+    Get or initialize the embedding model configured in `embedding_model`.
+    Loaded once, even when first requested by several threads.
+    """
+    global _model
+
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                cfg = get_model_config()
+                _model = load_embedding_model(
+                    cfg["name"],
+                    backend=cfg["backend"],
+                    device=device or cfg.get("device"),
+                    onnx_file=cfg.get("onnx_file"),
+                    threads=cfg.get("threads"),
+                    dim=cfg.get("dim", 384),
+                )
+
     return _model
 
+
+# ------------------------------------------------------------------
+# Embedding cache
+# ------------------------------------------------------------------
+class EmbeddingCache:
+    """
+    Bounded cache of embeddings keyed on normalized text.
+
+    The in-memory tier evicts least-recently-used entries beyond `max_size`
+    and expires entries older than `ttl_seconds`. An optional SQLite file
+    adds a second tier that several worker processes can share; it is
+    read and written outside the in-memory tier's lock, and pruned of
+    expired rows and rows beyond `max_disk_rows` every `PRUNE_EVERY` writes.
+    """
+
+    PRUNE_EVERY = 1000
+
+    def __init__(
+        self,
+        max_size: int = 10_000,
+        ttl_seconds: Optional[float] = None,
+        disk_path: Optional[str] = None,
+        max_disk_rows: Optional[int] = 100_000,
+    ):
+        """
+        Parameters
+        ----------
+        max_size : int
+            Maximum number of in-memory entries.
+        ttl_seconds : float | None
+            Entry lifetime; None keeps entries until evicted.
+        disk_path : str | None
+            Optional SQLite file for the shared on-disk tier.
+        max_disk_rows : int | None
+            Rows kept in the on-disk tier, newest first; None for no cap.
+        """
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.max_disk_rows = max_disk_rows
+        self.hits = 0
+        self.misses = 0
+
+        self._entries: "OrderedDict[str, Tuple[float, np.ndarray]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._disk: Optional[sqlite3.Connection] = None
+        self._disk_lock = threading.Lock()  # the connection is shared by threads
+        self._disk_writes = 0
+        if disk_path:
+            self._disk = sqlite3.connect(disk_path, check_same_thread=False, timeout=5.0)
+            self._disk.execute("PRAGMA journal_mode=WAL")
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS embeddings "
+                "(key TEXT PRIMARY KEY, created REAL NOT NULL, vector BLOB NOT NULL)"
+            )
+            self._disk.execute("CREATE INDEX IF NOT EXISTS embeddings_created ON embeddings (created)")
+            self._disk.commit()
+
+    @staticmethod
+    def make_key(text: str, normalize: bool = True) -> str:
+        """
+        Cache key for a text: the model name and backend, normalization
+        flag and cleaned text, hashed to keep keys small. Backends produce
+        slightly different vectors, so they never share entries.
+        """
+        raw = f"{_model_id()}|{int(normalize)}|{clean_text(text)}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[np.ndarray]:
+        return self.get_many([key])[0]
+
+    def get_many(self, keys: List[str]) -> List[Optional[np.ndarray]]:
+        """
+        Look up several keys, going to disk once for all memory misses.
+        """
+        now = time.time()
+        found: List[Optional[np.ndarray]] = [None] * len(keys)
+        missing: List[int] = []
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                entry = self._entries.get(key)
+                if entry is not None:
+                    created, vector = entry
+                    if not self._expired(created, now):
+                        self._entries.move_to_end(key)
+                        found[i] = vector
+                        continue
+                    del self._entries[key]
+                missing.append(i)
+
+        if missing and self._disk is not None:
+            rows = self._read_disk([keys[i] for i in missing])
+            loaded = []
+            for i in missing:
+                row = rows.get(keys[i])
+                if row is not None and not self._expired(row[0], now):
+                    found[i] = np.frombuffer(row[1], dtype="float32")
+                    loaded.append((keys[i], row[0], found[i]))
+            with self._lock:
+                for key, created, vector in loaded:
+                    self._store(key, created, vector)
+
+        with self._lock:
+            hits = sum(vector is not None for vector in found)
+            self.hits += hits
+            self.misses += len(keys) - hits
+        return found
+
+    def put(self, key: str, vector: np.ndarray) -> None:
+        self.put_many([key], [vector])
+
+    def put_many(self, keys: List[str], vectors: List[np.ndarray]) -> None:
+        """
+        Store several entries, written to disk in one transaction.
+        """
+        created = time.time()
+        vectors = [np.asarray(vector, dtype="float32") for vector in vectors]
+
+        with self._lock:
+            for key, vector in zip(keys, vectors):
+                self._store(key, created, vector)
+
+        if self._disk is not None:
+            rows = [(key, created, vector.tobytes()) for key, vector in zip(keys, vectors)]
+            with self._disk_lock:
+                self._disk.executemany(
+                    "INSERT OR REPLACE INTO embeddings (key, created, vector) VALUES (?, ?, ?)", rows
+                )
+                self._disk_writes += len(rows)
+                if self._disk_writes >= self.PRUNE_EVERY:
+                    self._disk_writes = 0
+                    self._prune_disk(created)
+                self._disk.commit()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"size": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def _store(self, key: str, created: float, vector: np.ndarray) -> None:
+        self._entries[key] = (created, vector)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl_seconds is not None and now - created > self.ttl_seconds
+
+    def _read_disk(self, keys: List[str]) -> Dict[str, Tuple[float, bytes]]:
+        rows = {}
+        with self._disk_lock:
+            # SQLite allows 999 parameters per statement in older builds
+            for start in range(0, len(keys), 500):
+                batch = keys[start : start + 500]
+                placeholders = ",".join("?" * len(batch))
+                for key, created, vector in self._disk.execute(
+                    f"SELECT key, created, vector FROM embeddings WHERE key IN ({placeholders})", batch
+                ):
+                    rows[key] = (created, vector)
+        return rows
+
+    def _prune_disk(self, now: float) -> None:
+        # Called with _disk_lock held, inside the caller's transaction
+        if self.ttl_seconds is not None:
+            self._disk.execute("DELETE FROM embeddings WHERE created < ?", (now - self.ttl_seconds,))
+        if self.max_disk_rows is not None:
+            self._disk.execute(
+                "DELETE FROM embeddings WHERE key IN "
+                "(SELECT key FROM embeddings ORDER BY created DESC LIMIT -1 OFFSET ?)",
+                (self.max_disk_rows,),
+            )
+
+
+_cache: Optional[EmbeddingCache] = None
+_cache_initialized = False
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """
+    Get the shared embedding cache, or None if disabled in the settings.
+    """
+    global _cache, _cache_initialized
+
+    if not _cache_initialized:
+        cfg = get_config().get("embedding_cache") or {}
+        if cfg.get("enabled", True):
+            _cache = EmbeddingCache(
+                max_size=cfg.get("max_size", 10_000),
+                ttl_seconds=cfg.get("ttl_seconds"),
+                disk_path=cfg.get("disk_path"),
+                max_disk_rows=cfg.get("max_disk_rows", 100_000),
+            )
+        _cache_initialized = True
+
+    return _cache
+
+
+def peek_embedding_cache() -> Optional[EmbeddingCache]:
+    """
+    The shared embedding cache if it has been created, without creating it.
+    """
+    return _cache
+
+
 def embed_texts(
     texts: List[str],
     batch_size: int = 32,
-    normalize: bool = True
+    normalize: bool = True,
+    use_cache: bool = True,
 ) -> np.ndarray:
     """
     Embed a list of texts into float32 vectors.
+
+    Texts found in the embedding cache are not re-encoded, and duplicates
+    within `texts` are encoded only once.
     """
     if not texts:
         raise ValueError("`texts` must be a non-empty list of strings.")
 
+    cache = get_embedding_cache() if use_cache else None
+    if cache is None:
+        return _encode(texts, batch_size, normalize)
+
+    rows: Dict[str, List[int]] = {}  # cache key -> positions in `texts`
+    for i, text in enumerate(texts):
+        rows.setdefault(cache.make_key(text, normalize), []).append(i)
+
+    vectors: List[Optional[np.ndarray]] = [None] * len(texts)
+    missing: Dict[str, List[int]] = {}
+    for (key, positions), vector in zip(rows.items(), cache.get_many(list(rows))):
+        if vector is None:
+            missing[key] = positions
+        for i in positions:
+            vectors[i] = vector
+
+    if missing:
+        encoded = _encode([texts[positions[0]] for positions in missing.values()], batch_size, normalize)
+        cache.put_many(list(missing), list(encoded))
+        for positions, vector in zip(missing.values(), encoded):
+            for i in positions:
+                vectors[i] = vector
+
+    return np.stack(vectors)
+
+
+def embed_query(query: str, normalize: bool = True) -> np.ndarray:
+    """
+    Embed a single query, going through the cache and, when enabled, the
+    micro-batcher so concurrent queries share one forward pass.
+    """
+    cache = get_embedding_cache()
+    key = None
+    if cache is not None:
+        key = cache.make_key(query, normalize)
+        vector = cache.get(key)
+        if vector is not None:
+            return vector
+
+    batcher = get_embedding_batcher()
+    if batcher is not None and batcher.normalize == normalize:
+        vector = batcher.embed(query)
+    else:
+        vector = _encode([query], batch_size=1, normalize=normalize)[0]
+
+    if cache is not None:
+        cache.put(key, vector)
+    return vector
+
+
+# ------------------------------------------------------------------
+# Micro-batching of concurrent queries
+# ------------------------------------------------------------------
+class EmbeddingBatcher:
+    """
+    Coalesces concurrent single-text embedding requests into batched
+    `encode` calls on one background thread.
+
+    Requests that arrive while a batch is being encoded are picked up
+    together by the next one. When the previous batch held more than one
+    request (i.e. there is concurrent traffic), the batcher also waits up to
+    `max_wait_ms` for the batch to fill; a lone request is encoded at once,
+    so single-user latency is unaffected.
+    """
+
+    def __init__(self, max_batch_size: int = 32, max_wait_ms: float = 5.0, normalize: bool = True):
+        """
+        Parameters
+        ----------
+        max_batch_size : int
+            Upper bound on texts per encode call.
+        max_wait_ms : float
+            Longest time to hold a batch open for more requests.
+        normalize : bool
+            Whether to L2-normalize embeddings.
+        """
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+        self.normalize = normalize
+        self.batches = 0
+        self.items = 0
+
+        self._queue: "queue.Queue[Tuple[str, Future]]" = queue.Queue()
+        self._last_batch_size = 0
+        self._thread = threading.Thread(target=self._run, name="embed-batcher", daemon=True)
+        self._thread.start()
+
+    def submit(self, text: str) -> Future:
+        future: Future = Future()
+        self._queue.put((text, future))
+        return future
+
+    def embed(self, text: str, timeout: Optional[float] = None) -> np.ndarray:
+        """
+        Embed one text, blocking until its batch has been encoded.
+        """
+        return self.submit(text).result(timeout=timeout)
+
+    def _collect(self) -> List[Tuple[str, Future]]:
+        batch = [self._queue.get()]
+        wait = self.max_wait if self._last_batch_size > 1 else 0.0
+        deadline = time.monotonic() + wait
+
+        while len(batch) < self.max_batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except queue.Empty:
+                pass
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            self._last_batch_size = len(batch)
+            self.batches += 1
+            self.items += len(batch)
+
+            try:
+                vectors = _encode([text for text, _ in batch], len(batch), self.normalize)
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+
+            for (_, future), vector in zip(batch, vectors):
+                future.set_result(vector)
+
+
+_batcher: Optional[EmbeddingBatcher] = None
+_batcher_lock = threading.Lock()
+
+
+def get_embedding_batcher() -> Optional[EmbeddingBatcher]:
+    """
+    Get the shared query batcher, or None if disabled in the settings.
+    """
+    global _batcher
+
+    cfg = get_config().get("embedding_batcher") or {}
+    if not cfg.get("enabled", True):
+        return None
+
+    with _batcher_lock:
+        if _batcher is None:
+            _batcher = EmbeddingBatcher(
+                max_batch_size=cfg.get("max_batch_size", 32),
+                max_wait_ms=cfg.get("max_wait_ms", 5.0),
+            )
+
+    return _batcher
+
+
+def peek_embedding_batcher() -> Optional[EmbeddingBatcher]:
+    """
+    The shared query batcher if it has been started, without starting it.
+    """
+    return _batcher
+
+
+# ------------------------------------------------------------------
+# Warm-up
+# ------------------------------------------------------------------
+WARMUP_TEXT = "Warm-up sentence used to exercise the embedding model before serving traffic."
+
+
+def warm_up(batch_sizes: Tuple[int, ...] = (1, 32, 64)) -> None:
+    """
+    Load the model and run throwaway encodes at the batch shapes seen in
+    production (single queries, batched queries, ingestion batches), so the
+    first real request does not pay for lazy initialization.
+
+    Bypasses the embedding cache so warm-up texts never occupy it.
+    """
+    get_embedding_model()
+    for batch_size in batch_sizes:
+        _encode([WARMUP_TEXT] * batch_size, batch_size, normalize=True)
+
+    batcher = get_embedding_batcher()
+    if batcher is not None:
+        batcher.embed(WARMUP_TEXT)
+
+
+def _encode(texts: List[str], batch_size: int, normalize: bool) -> np.ndarray:
     model = get_embedding_model()
 
     embeddings = model.encode(
@@ -1,17 +1,34 @@
 # api/endpoints.py
 # -------------------- routes for chat, upload-file, and health endpoints -------------------- #
 
-from fastapi import APIRouter, UploadFile, File, HTTPException, Depends
-from typing import List
-from starlette.concurrency import run_in_threadpool
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from datetime import timedelta
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Depends, Request, Response
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from typing import Any, Dict, List, Optional, Tuple
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
 
 from schemas import (
     ChatRequest,
     ChatResponse,
+    BatchChatRequest,
+    BatchChatResponse,
     UploadResponse,
+    IngestionStatusResponse,
+    DocumentInfo,
+    DocumentListResponse,
     HealthResponse,
+    ReadinessResponse,
 )
 from qa_pipeline import QAPipeline
+from ingestion import IngestionManager
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -19,19 +36,73 @@ router = APIRouter()
 # Initialize QA pipeline ONCE (safe if pipeline is stateless)
 # ------------------------------------------------------------------
 _qa_pipeline: QAPipeline | None = None
+_qa_pipeline_lock = threading.Lock()
 
 
 def get_qa_pipeline() -> QAPipeline:
     """
     Dependency injector for QA pipeline.
-    Ensures a single shared instance.
+    Ensures a single shared instance, also when the background startup
+    and a request ask for it at the same time.
     """
     global _qa_pipeline
     if _qa_pipeline is None:
-        _qa_pipeline = QAPipeline()
+        with _qa_pipeline_lock:
+            if _qa_pipeline is None:
+                _qa_pipeline = QAPipeline.from_config()
     return _qa_pipeline
 
 
+_ingestion_manager: IngestionManager | None = None
+
+
+def get_ingestion_manager() -> IngestionManager:
+    """
+    Dependency injector for the background ingestion manager.
+    Shares the QA pipeline's vector store.
+    """
+    global _ingestion_manager
+    if _ingestion_manager is None:
+        _ingestion_manager = IngestionManager.from_config(get_qa_pipeline())
+    return _ingestion_manager
+
+
+def peek_ingestion_manager() -> IngestionManager | None:
+    """
+    The ingestion manager if it has been started, without starting it.
+    """
+    return _ingestion_manager
+
+
+def shutdown_ingestion_manager() -> None:
+    """
+    Release ingestion workers, if they were ever started.
+    """
+    if _ingestion_manager is not None:
+        _ingestion_manager.shutdown()
+
+
+# ------------------------------------------------------------------
+# Readiness (set by main.start_up as startup steps complete)
+# ------------------------------------------------------------------
+_readiness: Dict[str, bool] = {"model": False, "index": False}
+
+
+def set_ready(step: str, ready: bool = True) -> None:
+    _readiness[step] = ready
+
+
+def is_ready() -> bool:
+    return all(_readiness.values())
+
+
+def peek_qa_pipeline() -> QAPipeline | None:
+    """
+    The QA pipeline once startup has finished, without creating it.
+    """
+    return _qa_pipeline if is_ready() else None
+
+
 # ------------------------------------------------------------------
 # Chat endpoint
 # ------------------------------------------------------------------
@@ -43,18 +114,25 @@ async def chat_endpoint(
     """
     Chat endpoint for Q&A with document retrieval (RAG).
     """
+    session_id = _session_id(req)
     try:
         # Run blocking QA logic in a thread pool
-        answer, sources = await run_in_threadpool(
+        answer, sources, confidence = await run_in_threadpool(
             qa.answer,
             req.prompt,
-            req.session_id,
+            session_id,
+            max_sources=req.max_sources,
+            nprobe=req.nprobe,
+            ef_search=req.ef_search,
+            history=req.history,
         )
 
         return ChatResponse(
             answer=answer,
             sources=sources,
-            session_id=req.session_id,
+            citations=qa.cite(sources),
+            confidence=confidence,
+            session_id=session_id,
         )
 
     except ValueError as e:
@@ -69,20 +147,183 @@ async def chat_endpoint(
         )
 
 
+def _session_id(req: ChatRequest) -> str | None:
+    """
+    The request's session id, or a new one if the client asked for it with
+    `new_session`: it sends the id back with its next prompt instead of the
+    whole conversation. Other requests are stateless, so one-off callers
+    never fill the session store.
+    """
+    if req.session_id:
+        return req.session_id
+    return uuid.uuid4().hex if req.new_session else None
+
+
+def _sse(event: str, data: Dict[str, Any]) -> str:
+    """
+    Format one Server-Sent Event.
+    """
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.post("/chat/stream")
+async def chat_stream_endpoint(
+    req: ChatRequest,
+    qa: QAPipeline = Depends(get_qa_pipeline),
+):
+    """
+    Chat endpoint streaming the answer over Server-Sent Events.
+
+    Emits one `sources` event as soon as retrieval finishes, then a `token`
+    event per generated fragment, then `done` with the full answer (or
+    `error` if generation fails midway).
+    """
+    session_id = _session_id(req)
+    try:
+        sources, confidence, tokens = await run_in_threadpool(
+            qa.stream_answer,
+            req.prompt,
+            session_id,
+            max_sources=req.max_sources,
+            nprobe=req.nprobe,
+            ef_search=req.ef_search,
+            history=req.history,
+        )
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    except Exception:
+        raise HTTPException(
+            status_code=500,
+            detail="Internal server error",
+        )
+
+    async def events():
+        yield _sse("sources", {
+            "sources": sources,
+            "citations": qa.cite(sources),
+            "confidence": confidence,
+            "session_id": session_id,
+        })
+
+        answer: List[str] = []
+        try:
+            # Backends block on network reads; keep them off the event loop
+            async for token in iterate_in_threadpool(tokens):
+                answer.append(token)
+                yield _sse("token", {"token": token})
+        except Exception:
+            logger.exception("Answer generation failed")
+            yield _sse("error", {"detail": "Generation failed"})
+            return
+
+        yield _sse("done", {"answer": "".join(answer)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/chat/batch", response_model=BatchChatResponse)
+async def chat_batch_endpoint(
+    req: BatchChatRequest,
+    qa: QAPipeline = Depends(get_qa_pipeline),
+):
+    """
+    Answer many independent questions in one request (offline evaluation).
+    """
+    try:
+        results = await run_in_threadpool(
+            qa.answer_batch,
+            req.prompts,
+            max_sources=req.max_sources,
+            nprobe=req.nprobe,
+            ef_search=req.ef_search,
+        )
+
+        return BatchChatResponse(
+            results=[
+                ChatResponse(answer=answer, sources=sources, citations=qa.cite(sources), confidence=confidence)
+                for answer, sources, confidence in results
+            ]
+        )
+
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    except Exception:
+        raise HTTPException(
+            status_code=500,
+            detail="Internal server error",
+        )
+
+
+@router.delete("/chat/sessions/{session_id}", status_code=204)
+async def delete_session(
+    session_id: str,
+    qa: QAPipeline = Depends(get_qa_pipeline),
+):
+    """
+    Forget a conversation's server-side history.
+    """
+    if qa.sessions is None or not await run_in_threadpool(qa.sessions.delete, session_id):
+        raise HTTPException(status_code=404, detail="Unknown session")
+    return Response(status_code=204)
+
+
 # ------------------------------------------------------------------
 # Upload documents endpoint
 # ------------------------------------------------------------------
 MAX_FILE_SIZE = 5 * 1024 * 1024  # 5 MB
 ALLOWED_EXTENSIONS = (".pdf", ".txt", ".md")
+UPLOAD_DIR = "data/uploads"
+UPLOAD_READ_SIZE = 1024 * 1024  # stream uploads to disk 1 MB at a time
+
+
+async def _save_upload(file: UploadFile) -> str:
+    """
+    Stream an uploaded file to disk, enforcing the size limit as it goes.
+    """
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+    safe_filename = os.path.basename(file.filename)
+    file_path = os.path.join(UPLOAD_DIR, f"{uuid.uuid4().hex}_{safe_filename}")
+
+    size = 0
+    try:
+        with open(file_path, "wb") as out:
+            while block := await file.read(UPLOAD_READ_SIZE):
+                size += len(block)
+                if size > MAX_FILE_SIZE:
+                    raise HTTPException(
+                        status_code=400,
+                        detail=f"{file.filename} exceeds the 5MB size limit",
+                    )
+                await run_in_threadpool(out.write, block)
+    except BaseException:
+        os.remove(file_path)
+        raise
+
+    return file_path
 
 
 @router.post("/upload", response_model=UploadResponse)
 async def upload_documents(
     files: List[UploadFile] = File(...),
-    qa: QAPipeline = Depends(get_qa_pipeline),
+    keys: Optional[List[str]] = Form(None),
+    ingestion: IngestionManager = Depends(get_ingestion_manager),
 ):
     """
     Upload documents for ingestion into the vector store.
+
+    Files are saved to disk and handed to a background ingestion job;
+    poll `/upload/{job_id}` for progress.
+
+    A document is identified by its file name, which may be a relative
+    path ("reports/2024/summary.pdf"), or by the matching entry of `keys`
+    when given. Uploading under the same name or key replaces it.
     """
     if not files:
         raise HTTPException(
@@ -90,44 +331,35 @@ async def upload_documents(
             detail="No files provided",
         )
 
-    uploaded_files: List[str] = []
+    if keys is not None and (len(keys) != len(files) or not all(key.strip() for key in keys)):
+        raise HTTPException(
+            status_code=400,
+            detail="Provide one non-empty key per file",
+        )
+    names = keys or [file.filename for file in files]
+
+    for file in files:
+        if not file.filename.lower().endswith(ALLOWED_EXTENSIONS):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unsupported file type: {file.filename}",
+            )
+
+    saved: List[Tuple[str, str]] = []
+    submitted = False
 
     try:
-        for file in files:
-            filename = file.filename.lower()
-
-            if not filename.endswith(ALLOWED_EXTENSIONS):
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"Unsupported file type: {file.filename}",
-                )
-
-            contents = await file.read()
-
-            if len(contents) > MAX_FILE_SIZE:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"{file.filename} exceeds the 5MB size limit",
-                )
-
-            uploaded_files.append(file.filename)
-
-            # --------------------------------------------------
-            # TODO (next step):
-            # 1. Extract text from file
-            # 2. Chunk text
-            # 3. Embed chunks
-            # 4. Store in vector database
-            #
-            # Example:
-            # text = extract_text(contents, file.filename)
-            # qa.ingest_documents([text])
-            # --------------------------------------------------
+        for name, file in zip(names, files):
+            saved.append((name, await _save_upload(file)))
+
+        job = ingestion.submit(saved)
+        submitted = True
 
         return UploadResponse(
-            count=len(uploaded_files),
-            file_ids=uploaded_files,
-            message=f"Successfully uploaded {len(uploaded_files)} file(s)",
+            count=len(saved),
+            file_ids=[name for name, _ in saved],
+            message=f"Accepted {len(saved)} file(s) for ingestion",
+            job_id=job.id,
         )
 
     except HTTPException:
@@ -139,13 +371,118 @@ async def upload_documents(
             detail="Failed to process uploaded files",
         )
 
+    finally:
+        # Once submitted, the ingestion job deletes the files when done
+        if not submitted:
+            for _, path in saved:
+                os.remove(path)
+
+
+@router.get("/upload/{job_id}", response_model=IngestionStatusResponse)
+async def upload_status(
+    job_id: str,
+    ingestion: IngestionManager = Depends(get_ingestion_manager),
+):
+    """
+    Progress of a background ingestion job.
+    """
+    job = ingestion.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown ingestion job")
+
+    return IngestionStatusResponse(
+        job_id=job.id,
+        status=job.status,
+        files_total=job.files_total,
+        files_processed=job.files_processed,
+        chunks_total=job.chunks_total,
+        chunks_embedded=job.chunks_embedded,
+        chunks_reused=job.chunks_reused,
+        files_unchanged=job.files_unchanged,
+        errors=job.errors,
+        warnings=job.warnings,
+        created_at=job.created_at,
+        finished_at=job.finished_at,
+    )
+
+
+# ------------------------------------------------------------------
+# Document management endpoints
+# ------------------------------------------------------------------
+def _document_info(record) -> DocumentInfo:
+    return DocumentInfo(
+        id=record.id,
+        filename=record.filename,
+        content_type=record.content_type,
+        size=record.size,
+        uploaded_at=record.uploaded_at,
+    )
+
+
+@router.get("/documents", response_model=DocumentListResponse)
+async def list_documents(qa: QAPipeline = Depends(get_qa_pipeline)):
+    """
+    List ingested documents.
+    """
+    documents = [_document_info(record) for record in qa.list_documents()]
+    return DocumentListResponse(documents=documents, total=len(documents))
+
+
+@router.get("/documents/{doc_id}/text", response_class=PlainTextResponse)
+async def document_text(doc_id: str, qa: QAPipeline = Depends(get_qa_pipeline)):
+    """
+    Cleaned text of a document, which citation spans point into.
+    """
+    text = None
+    if qa.documents.get(doc_id) is not None:
+        text = await run_in_threadpool(qa.texts.get, doc_id)
+    if text is None:
+        raise HTTPException(status_code=404, detail="Unknown document")
+    return PlainTextResponse(text)
+
+
+@router.delete("/documents/{doc_id}", response_model=DocumentInfo)
+async def delete_document(
+    doc_id: str,
+    ingestion: IngestionManager = Depends(get_ingestion_manager),
+):
+    """
+    Delete a document and the chunks no other document shares.
+    """
+    record = await run_in_threadpool(ingestion.delete_document, doc_id)
+    if record is None:
+        raise HTTPException(status_code=404, detail="Unknown document")
+    return _document_info(record)
+
 
 # ------------------------------------------------------------------
 # Health check endpoint
 # ------------------------------------------------------------------
+_started_at = time.monotonic()
+
+
 @router.get("/health", response_model=HealthResponse)
-async def health_check():
+async def health_check(request: Request):
     """
     Health check endpoint.
     """
-    return HealthResponse(status="healthy")
+    uptime = timedelta(seconds=int(time.monotonic() - _started_at))
+    return HealthResponse(
+        status="healthy",
+        version=request.app.version,
+        uptime=str(uptime),
+    )
+
+
+@router.get("/ready", response_model=ReadinessResponse)
+async def readiness_check(response: Response):
+    """
+    Readiness probe: 503 until the model is warm and the index is loaded.
+
+    Unlike `/health`, which only says the process is alive, this tells the
+    load balancer whether to route traffic here.
+    """
+    ready = is_ready()
+    if not ready:
+        response.status_code = 503
+    return ReadinessResponse(ready=ready, checks=dict(_readiness))
@@ -0,0 +1,165 @@
+# api/generators.py
+# -------------------- pluggable LLM backends for answer generation -------------------- #
+
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Iterator, Optional
+
+
+class Generator(ABC):
+    """
+    Base class for answer generators.
+
+    Backends implement `stream`, yielding text fragments as the model
+    produces them; `generate` collects the whole answer.
+    """
+
+    @abstractmethod
+    def stream(self, prompt: str) -> Iterator[str]:
+        ...
+
+    def generate(self, prompt: str) -> str:
+        return "".join(self.stream(prompt))
+
+
+class FakeGenerator(Generator):
+    """
+    Deterministic local stand-in: answers with a fixed sentence followed by
+    the first line of the prompt's context, one word at a time.
+    Used for tests and when no LLM is configured.
+    """
+
+    PREFIX = "This is a placeholder answer generated using retrieved context."
+
+    def __init__(self, token_delay: float = 0.0):
+        """
+        Parameters
+        ----------
+        token_delay : float
+            Seconds to sleep between tokens, to simulate a real model.
+        """
+        self.token_delay = token_delay
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        context = prompt.split("Context:\n", 1)[-1].split("\n", 1)[0]
+        words = f"{self.PREFIX} {context}".split()
+        for i, word in enumerate(words):
+            if self.token_delay and i:
+                time.sleep(self.token_delay)
+            yield word if i == 0 else " " + word
+
+
+class OpenAICompatibleGenerator(Generator):
+    """
+    Any server implementing the OpenAI `/chat/completions` API
+    (OpenAI, vLLM, llama.cpp server, LM Studio, ...). The API key falls
+    back to the OPENAI_API_KEY environment variable.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        base_url: str = "https://api.openai.com/v1",
+        api_key: Optional[str] = None,
+        temperature: float = 0.2,
+        max_tokens: int = 512,
+        timeout: float = 60.0,
+    ):
+        self.model = model
+        self.url = base_url.rstrip("/") + "/chat/completions"
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.timeout = timeout
+
+        import requests  # imported by the HTTP backends only
+
+        self._session = requests.Session()
+        api_key = api_key or os.environ.get("OPENAI_API_KEY")
+        if api_key:
+            self._session.headers["Authorization"] = f"Bearer {api_key}"
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        payload = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt}],
+            "temperature": self.temperature,
+            "max_tokens": self.max_tokens,
+            "stream": True,
+        }
+
+        with self._session.post(self.url, json=payload, stream=True, timeout=self.timeout) as resp:
+            resp.raise_for_status()
+            for line in resp.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    return
+                choices = json.loads(data).get("choices") or [{}]
+                content = (choices[0].get("delta") or {}).get("content")
+                if content:
+                    yield content
+
+
+class OllamaGenerator(Generator):
+    """
+    A local Ollama server (`/api/generate`, newline-delimited JSON stream).
+    """
+
+    def __init__(
+        self,
+        model: str,
+        base_url: str = "http://localhost:11434",
+        temperature: float = 0.2,
+        timeout: float = 120.0,
+    ):
+        self.model = model
+        self.url = base_url.rstrip("/") + "/api/generate"
+        self.temperature = temperature
+        self.timeout = timeout
+
+        import requests
+
+        self._session = requests.Session()
+
+    def stream(self, prompt: str) -> Iterator[str]:
+        payload = {
+            "model": self.model,
+            "prompt": prompt,
+            "stream": True,
+            "options": {"temperature": self.temperature},
+        }
+
+        with self._session.post(self.url, json=payload, stream=True, timeout=self.timeout) as resp:
+            resp.raise_for_status()
+            for line in resp.iter_lines(decode_unicode=True):
+                if not line:
+                    continue
+                chunk = json.loads(line)
+                if chunk.get("response"):
+                    yield chunk["response"]
+                if chunk.get("done"):
+                    return
+
+
+GENERATORS = {
+    "fake": FakeGenerator,
+    "openai": OpenAICompatibleGenerator,
+    "ollama": OllamaGenerator,
+}
+
+
+def build_generator(cfg: Dict[str, Any]) -> Generator:
+    """
+    Build a generator from a `generator` settings section.
+    """
+    cfg = dict(cfg)
+    backend = cfg.pop("backend", "fake")
+    if backend not in GENERATORS:
+        raise ValueError(
+            f"Unknown generator backend '{backend}'. Expected one of {tuple(GENERATORS)}."
+        )
+    return GENERATORS[backend](**cfg)
+
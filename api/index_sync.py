@@ -0,0 +1,137 @@
+# api/index_sync.py
+# -------------------- one persisted index shared by several worker processes -------------------- #
+
+import fcntl
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def _flock(path: str, operation: int) -> Iterator[None]:
+    """
+    Hold an advisory lock on `path` (created if needed) for the block.
+    """
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, operation)
+        yield
+    finally:
+        os.close(fd)  # releases the lock
+
+
+class IndexSync:
+    """
+    Coordinates the processes (uvicorn workers) serving one index directory.
+
+    Every worker memory-maps the same saved files, so the corpus is in
+    memory once whatever the number of workers. The integer in the epoch
+    file counts saves: each worker polls it and reloads the directory when
+    it moves, which is cheap because loading maps files rather than reading
+    them.
+
+    One worker writes at a time: `writer` holds an exclusive lock for a
+    whole ingestion or deletion, after loading the latest epoch. Saves hold
+    a second lock exclusively, and reloads hold it shared, so a worker
+    never loads a half-written save.
+    """
+
+    EPOCH_FILE = "epoch"
+    WRITER_LOCK = "writer.lock"
+    SAVE_LOCK = "save.lock"
+
+    def __init__(self, directory: str, interval: float = 1.0):
+        """
+        Parameters
+        ----------
+        directory : str
+            Index directory shared by the workers.
+        interval : float
+            Seconds between two checks of the epoch file.
+        """
+        self.directory = directory
+        self.interval = interval
+        self.epoch = 0  # epoch of the files this process has loaded
+        # This process is loading or writing the directory
+        self._local = threading.Lock()
+        self._watcher: threading.Thread | None = None
+
+    def read_epoch(self) -> int:
+        try:
+            with open(os.path.join(self.directory, self.EPOCH_FILE)) as f:
+                return int(f.read() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def changed(self) -> bool:
+        """
+        Whether another process has saved since this one last loaded.
+        """
+        return self.read_epoch() != self.epoch
+
+    @contextmanager
+    def writer(self) -> Iterator[None]:
+        """
+        Exclusive right to modify the index, across threads and processes.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        with self._local, _flock(self._path(self.WRITER_LOCK), fcntl.LOCK_EX):
+            yield
+
+    @contextmanager
+    def saving(self) -> Iterator[None]:
+        """
+        Write the files in the block, then publish them as a new epoch.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        with _flock(self._path(self.SAVE_LOCK), fcntl.LOCK_EX):
+            yield
+            epoch = self.read_epoch() + 1
+            path = self._path(self.EPOCH_FILE)
+            with open(path + ".tmp", "w") as f:
+                f.write(str(epoch))
+            os.replace(path + ".tmp", path)
+            self.epoch = epoch
+
+    @contextmanager
+    def loading(self) -> Iterator[None]:
+        """
+        Read the files in the block, consistent with one epoch.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        with _flock(self._path(self.SAVE_LOCK), fcntl.LOCK_SH):
+            epoch = self.read_epoch()
+            yield
+            self.epoch = epoch
+
+    def watch(self, reload: Callable[[], None]) -> None:
+        """
+        Call `reload` in a background thread whenever another process has
+        saved, unless this process is busy writing.
+        """
+        if self._watcher is not None:
+            return
+        self._watcher = threading.Thread(target=self._watch, args=(reload,), name="index-sync", daemon=True)
+        self._watcher.start()
+
+    def _watch(self, reload: Callable[[], None]) -> None:
+        while True:
+            time.sleep(self.interval)
+            try:
+                if not self.changed() or not self._local.acquire(blocking=False):
+                    continue
+                try:
+                    if self.changed():
+                        reload()
+                finally:
+                    self._local.release()
+            except Exception:
+                logger.exception("Reloading the shared index failed")
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
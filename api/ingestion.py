@@ -0,0 +1,581 @@
+# api/ingestion.py
+# -------------------- background ingestion pipeline for uploaded documents -------------------- #
+
+import json
+import logging
+import mimetypes
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    Future,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from chunking import Span, get_chunker
+from documents import DocumentRecord, file_hash
+from utils import (
+    clean_text,
+    count_pdf_pages,
+    extract_text_from_file,
+    get_config,
+    iter_clean_text,
+    iter_pdf_pages,
+)
+
+logger = logging.getLogger(__name__)
+
+
+# ------------------------------------------------------------------
+# Worker-side extraction (runs inside the process pool)
+# ------------------------------------------------------------------
+PageRange = Tuple[int, int]
+
+
+class ExtractedPart(NamedTuple):
+    """
+    Chunks of a whole file, or of a range of pages of a PDF, as spans of
+    its cleaned text: the text crosses the process boundary once, and
+    chunk strings are only cut from it in the parent.
+    """
+
+    text: str  # cleaned text
+    spans: List[Span]  # of each chunk in `text`
+    pages: List[PageRange]  # first and last page of each chunk, empty without pages
+    skipped_pages: List[int]  # pages that failed or timed out
+
+    @property
+    def chunks(self) -> List[str]:
+        return [self.text[start:end] for start, end in self.spans]
+
+
+def extract_chunks(
+    file_path: str,
+    chunk_size: int,
+    overlap: int,
+    tokenizer_name: Optional[str] = None,
+    page_range: Optional[PageRange] = None,
+    page_timeout: Optional[float] = None,
+) -> ExtractedPart:
+    """
+    Extract, clean and chunk a file, or only pages `page_range` (1-based,
+    inclusive) of a PDF.
+
+    PDF pages are cleaned as they are extracted, recording where each
+    page's text starts so every chunk can be given its page numbers.
+
+    Must stay a module-level function so it can be pickled to worker processes.
+    """
+    chunker = get_chunker(tokenizer_name, chunk_size, overlap)
+    if not file_path.lower().endswith(".pdf"):
+        text = clean_text(extract_text_from_file(file_path))
+        return ExtractedPart(text, chunker.spans(text), [], [])
+
+    first, last = page_range or (1, None)
+    skipped: List[int] = []
+    page_number = first
+
+    def page_texts() -> Iterator[str]:
+        nonlocal page_number
+        for number, text in iter_pdf_pages(file_path, first, last, page_timeout):
+            if text is None:
+                skipped.append(number)
+                continue
+            page_number = number
+            # Pages end a line, as in extract_text_from_pdf
+            yield text + "\n"
+
+    # iter_clean_text yields at most once per page fed, so each piece is
+    # (almost entirely) the text of the page just read
+    pieces: List[str] = []
+    page_starts: List[int] = []
+    page_numbers: List[int] = []
+    length = 0
+    for piece in iter_clean_text(page_texts()):
+        page_starts.append(length)
+        page_numbers.append(page_number)
+        pieces.append(piece)
+        length += len(piece)
+
+    text = "".join(pieces)
+    spans = chunker.spans(text)
+
+    pages: List[PageRange] = []
+    if spans:
+        bounds = np.asarray(spans, dtype=np.int64)
+        bounds[:, 1] -= 1  # last character of each chunk
+        idx = np.searchsorted(np.asarray(page_starts), bounds, side="right") - 1
+        numbers = np.asarray(page_numbers)[idx]
+        pages = [(int(a), int(b)) for a, b in numbers]
+    return ExtractedPart(text, spans, pages, skipped)
+
+
+def _remove_upload(path: str) -> None:
+    """
+    Delete an uploaded file its job no longer needs.
+    """
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+# ------------------------------------------------------------------
+# Job tracking
+# ------------------------------------------------------------------
+class IngestionJob:
+    """
+    Progress of one upload request through the ingestion pipeline.
+    """
+
+    # Reported by the status endpoint, and shared through a JobStore
+    STATUS_FIELDS = (
+        "status", "files_total", "files_processed", "chunks_total", "chunks_embedded",
+        "chunks_reused", "files_unchanged", "errors", "warnings",
+    )
+
+    def __init__(self, files: List[Tuple[str, str]]):
+        """
+        Parameters
+        ----------
+        files : List[Tuple[str, str]]
+            (original filename, path on disk) pairs.
+        """
+        self.id = uuid.uuid4().hex
+        self.files = files
+        self.status = "queued"
+        self.files_total = len(files)
+        self.files_processed = 0
+        self.chunks_total = 0
+        self.chunks_embedded = 0
+        self.chunks_reused = 0
+        self.files_unchanged = 0
+        self.errors: List[str] = []
+        self.warnings: List[str] = []
+        self.created_at = datetime.utcnow()
+        self.finished_at: Optional[datetime] = None
+
+    def to_status(self) -> Dict[str, Any]:
+        status = {field: getattr(self, field) for field in self.STATUS_FIELDS}
+        status["created_at"] = self.created_at.isoformat()
+        status["finished_at"] = self.finished_at and self.finished_at.isoformat()
+        return status
+
+    @classmethod
+    def from_status(cls, job_id: str, status: Dict[str, Any]) -> "IngestionJob":
+        """
+        A job as reported by another process (without its files).
+        """
+        job = cls([])
+        job.id = job_id
+        for field in cls.STATUS_FIELDS:
+            setattr(job, field, status[field])
+        job.created_at = datetime.fromisoformat(status["created_at"])
+        if status["finished_at"]:
+            job.finished_at = datetime.fromisoformat(status["finished_at"])
+        return job
+
+
+class JobStore:
+    """
+    Status of ingestion jobs in a SQLite file (WAL mode), so every worker
+    process serving a shared index can report on jobs any of them runs.
+
+    Jobs finished more than `ttl_seconds` ago are deleted as new ones are
+    added.
+    """
+
+    def __init__(self, path: str, ttl_seconds: float = 86400.0):
+        """
+        Parameters
+        ----------
+        path : str
+            SQLite database file, shared by all workers.
+        ttl_seconds : float
+            Seconds a finished job's status stays available.
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS jobs "
+            "(job_id TEXT PRIMARY KEY, finished REAL, status TEXT NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (finished);"
+        )
+        self._db.commit()
+
+    def put(self, job: IngestionJob) -> None:
+        finished = None if job.finished_at is None else time.time()
+        with self._lock, self._db:
+            if job.status == "queued":  # once per job
+                self._db.execute(
+                    "DELETE FROM jobs WHERE finished < ?", (time.time() - self.ttl_seconds,)
+                )
+            self._db.execute(
+                "INSERT OR REPLACE INTO jobs (job_id, finished, status) VALUES (?, ?, ?)",
+                (job.id, finished, json.dumps(job.to_status())),
+            )
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        with self._lock:
+            row = self._db.execute("SELECT status FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        return IngestionJob.from_status(job_id, json.loads(row[0]))
+
+
+class IngestionManager:
+    """
+    Runs uploaded files through extract -> clean -> chunk -> embed -> store.
+
+    Extraction and chunking are CPU-bound and run on a process pool, while
+    embedding runs on a single worker thread so the model is never invoked
+    concurrently and writes to the vector store stay serialized. The number
+    of files in flight is bounded, which caps memory held by extracted text
+    that is still waiting to be embedded.
+
+    PDFs longer than `pages_per_task` are split into page ranges extracted
+    in parallel; each range is embedded as soon as it and the ranges before
+    it are done, so a long document starts reaching the store before it is
+    fully parsed. Files whose content is already stored are skipped before
+    extraction.
+
+    Submitted files are owned by their job: each is deleted from disk once
+    it has been ingested, skipped or has failed.
+
+    With a `job_store`, job progress is also published there, so that the
+    other worker processes of a shared index can report it.
+    """
+
+    def __init__(
+        self,
+        pipeline,
+        max_workers: Optional[int] = None,
+        embed_batch_size: int = 64,
+        max_pending_files: Optional[int] = None,
+        chunk_size: int = 254,
+        chunk_overlap: int = 32,
+        tokenizer_name: Optional[str] = None,
+        pages_per_task: int = 16,
+        page_timeout: Optional[float] = 30.0,
+        job_store: Optional[JobStore] = None,
+    ):
+        """
+        Parameters
+        ----------
+        pipeline : QAPipeline
+            Pipeline whose vector store receives the chunks.
+        max_workers : int | None
+            Size of the extraction process pool (defaults to CPU count).
+        embed_batch_size : int
+            Number of chunks embedded per call.
+        max_pending_files : int | None
+            Files extracted ahead of the embedder (defaults to 2 x workers).
+        chunk_size : int
+            Chunk size in tokenizer tokens (words without a tokenizer).
+        chunk_overlap : int
+            Overlap between consecutive chunks, in the same unit.
+        tokenizer_name : str | None
+            Tokenizer used to measure chunks, normally the embedding
+            model's. None counts words.
+        pages_per_task : int
+            PDF pages extracted per pool task.
+        page_timeout : float | None
+            Seconds allowed to extract one PDF page before it is skipped.
+        job_store : JobStore | None
+            Shared store of job status, for several worker processes.
+        """
+        self.pipeline = pipeline
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.embed_batch_size = embed_batch_size
+        self.max_pending_files = max_pending_files or 2 * self.max_workers
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.tokenizer_name = tokenizer_name
+        self.pages_per_task = pages_per_task
+        self.page_timeout = page_timeout
+        self.job_store = job_store
+
+        self._jobs: Dict[str, IngestionJob] = {}
+        self._lock = threading.Lock()
+
+        self._extract_pool: Optional[ProcessPoolExecutor] = None
+        self._embed_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="embed")
+        self._job_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="ingest")
+
+    @classmethod
+    def from_config(cls, pipeline) -> "IngestionManager":
+        """
+        Build a manager from the `ingestion` section of the settings file.
+        """
+        # Not a module import: worker processes import this module and
+        # should not pay for loading torch
+        from embeddings import get_model_config
+
+        cfg = get_config().get("ingestion") or {}
+        tokenizer_name = None
+        if cfg.get("chunker", "tokens") == "tokens":
+            tokenizer_name = get_model_config()["name"]
+        job_store = None
+        if pipeline.sync is not None:
+            job_store = JobStore(os.path.join(pipeline.sync.directory, "jobs.sqlite3"))
+        return cls(
+            pipeline,
+            max_workers=cfg.get("max_workers"),
+            embed_batch_size=cfg.get("embed_batch_size", 64),
+            max_pending_files=cfg.get("max_pending_files"),
+            chunk_size=cfg.get("chunk_size", 254),
+            chunk_overlap=cfg.get("chunk_overlap", 32),
+            tokenizer_name=tokenizer_name,
+            pages_per_task=cfg.get("pages_per_task", 16),
+            page_timeout=cfg.get("page_timeout", 30.0),
+            job_store=job_store,
+        )
+
+    # ---------------------------------------------------------
+    # Public API
+    # ---------------------------------------------------------
+    def submit(self, files: List[Tuple[str, str]]) -> IngestionJob:
+        """
+        Queue files for ingestion and return immediately.
+        """
+        job = IngestionJob(files)
+        with self._lock:
+            self._jobs[job.id] = job
+        self._publish(job)
+        self._job_pool.submit(self._run, job)
+        return job
+
+    def get_job(self, job_id: str) -> Optional[IngestionJob]:
+        """
+        A job of this process, or else one another worker published to the
+        job store.
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None and self.job_store is not None:
+            job = self.job_store.get(job_id)
+        return job
+
+    def stats(self) -> Dict[str, int]:
+        """
+        Queue depth: jobs waiting or running and files not yet ingested.
+        """
+        with self._lock:
+            active = [job for job in self._jobs.values() if job.finished_at is None]
+        return {
+            "jobs_queued": sum(job.status == "queued" for job in active),
+            "jobs_running": sum(job.status == "running" for job in active),
+            "files_pending": sum(job.files_total - job.files_processed for job in active),
+        }
+
+    def delete_document(self, doc_id: str) -> Optional[DocumentRecord]:
+        """
+        Delete a document, serialized with ingestion writes, and persist.
+        """
+        def delete() -> Optional[DocumentRecord]:
+            record = self.pipeline.delete_document(doc_id)
+            if record is not None:
+                self.pipeline.save()
+            return record
+
+        # Taken before queuing on the embed worker, as a running job does
+        with self.pipeline.writing():
+            return self._embed_pool.submit(delete).result()
+
+    def shutdown(self) -> None:
+        """
+        Stop accepting work and release worker processes.
+        """
+        self._job_pool.shutdown(wait=False, cancel_futures=True)
+        self._embed_pool.shutdown(wait=False, cancel_futures=True)
+        if self._extract_pool is not None:
+            self._extract_pool.shutdown(wait=False, cancel_futures=True)
+
+    # ---------------------------------------------------------
+    # Internals
+    # ---------------------------------------------------------
+    def _get_extract_pool(self) -> ProcessPoolExecutor:
+        # "spawn" avoids forking a parent that already holds torch/faiss threads
+        with self._lock:
+            if self._extract_pool is None:
+                self._extract_pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._extract_pool
+
+    def _discard_extract_pool(self, pool: ProcessPoolExecutor) -> None:
+        """
+        Drop a pool whose worker died (OOM, crash in a parser); it refuses
+        all further tasks, so the next file gets a new one.
+        """
+        with self._lock:
+            if self._extract_pool is pool:
+                self._extract_pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def _submit_parts(self, pool: ProcessPoolExecutor, path: str) -> List[Future]:
+        """
+        Queue extraction of a file: one task, or one per page range for a
+        long PDF. Returns the futures in page order.
+        """
+        ranges: List[Optional[PageRange]] = [None]
+        if path.lower().endswith(".pdf"):
+            n_pages = count_pdf_pages(path)
+            step = self.pages_per_task
+            ranges = [(first, min(first + step - 1, n_pages)) for first in range(1, n_pages + 1, step)]
+
+        return [
+            pool.submit(
+                extract_chunks,
+                path,
+                self.chunk_size,
+                self.chunk_overlap,
+                self.tokenizer_name,
+                page_range,
+                self.page_timeout,
+            )
+            for page_range in ranges or [None]  # a PDF without pages still gets one task
+        ]
+
+    def _run(self, job: IngestionJob) -> None:
+        # Held for the whole job, so a delete never lands between a file's
+        # first chunks and its commit; with a shared store, this also waits
+        # for writers in other worker processes
+        with self.pipeline.writing():
+            self._run_job(job)
+
+    def _publish(self, job: IngestionJob) -> None:
+        if self.job_store is None:
+            return
+        try:
+            self.job_store.put(job)
+        except sqlite3.Error:
+            logger.exception("Publishing the status of ingestion job %s failed", job.id)
+
+    def _run_job(self, job: IngestionJob) -> None:
+        job.status = "running"
+        self._publish(job)
+        files = iter(job.files)
+        # first part of each file in flight -> (name, path, digest, size, all parts, pool)
+        pending: Dict[Future, Tuple[str, str, str, int, List[Future], ProcessPoolExecutor]] = {}
+
+        def fill() -> None:
+            while len(pending) < self.max_pending_files:
+                try:
+                    name, path = next(files)
+                except StopIteration:
+                    return
+                pool = self._get_extract_pool()
+                try:
+                    digest, size = file_hash(path)
+                    if self.pipeline.is_unchanged(name, digest):
+                        job.files_unchanged += 1
+                        job.files_processed += 1
+                        _remove_upload(path)
+                        continue
+                    parts = self._submit_parts(pool, path)
+                except Exception as e:
+                    if isinstance(e, BrokenProcessPool):
+                        self._discard_extract_pool(pool)
+                    logger.error(f"Ingestion of {name} failed: {e}")
+                    job.errors.append(f"{name}: {e}")
+                    job.files_processed += 1
+                    _remove_upload(path)
+                    continue
+                pending[parts[0]] = (name, path, digest, size, parts, pool)
+
+        try:
+            fill()
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, path, digest, size, parts, pool = pending.pop(future)
+                    try:
+                        self._ingest_file(job, name, digest, size, parts)
+                    except Exception as e:
+                        if isinstance(e, BrokenProcessPool):
+                            self._discard_extract_pool(pool)
+                        logger.error(f"Ingestion of {name} failed: {e}")
+                        job.errors.append(f"{name}: {e}")
+                        for part in parts:
+                            part.cancel()
+                    job.files_processed += 1
+                    _remove_upload(path)
+                    self._publish(job)
+                fill()
+
+            if job.files_processed > job.files_unchanged + len(job.errors):
+                # Persist on the embed worker so it never races a store write
+                self._embed_pool.submit(self.pipeline.save).result()
+
+            job.status = "failed" if len(job.errors) == job.files_total else "completed"
+
+        except Exception as e:
+            logger.exception("Ingestion job %s crashed", job.id)
+            job.errors.append(str(e))
+            job.status = "failed"
+
+        finally:
+            # Files a crashed job never reached
+            for _, path in job.files:
+                _remove_upload(path)
+            job.finished_at = datetime.utcnow()
+            self._publish(job)
+
+    def _ingest_file(
+        self,
+        job: IngestionJob,
+        filename: str,
+        digest: str,
+        size: int,
+        parts: List[Future],
+    ) -> None:
+        def on_progress(n: int) -> None:
+            job.chunks_embedded += n
+
+        writer = self.pipeline.document_writer(
+            filename,
+            digest,
+            size=size,
+            content_type=mimetypes.guess_type(filename)[0],
+            batch_size=self.embed_batch_size,
+            on_progress=on_progress,
+        )
+
+        # Parts are embedded in page order as they complete; the writer
+        # joins their texts into the document's text
+        chunks_total = 0
+        try:
+            for future in parts:
+                part: ExtractedPart = future.result()
+                job.chunks_total += len(part.spans)
+                chunks_total += len(part.spans)
+                job.warnings.extend(
+                    f"{filename}: page {n} skipped (unreadable or timed out)" for n in part.skipped_pages
+                )
+                # Blocking here is the backpressure: extraction only runs
+                # max_pending_files ahead of the embedder.
+                self._embed_pool.submit(writer.add, part.chunks, part.spans, part.pages, part.text).result()
+            self._embed_pool.submit(writer.commit).result()
+        except Exception:
+            # Chunks of the parts already embedded must not outlive the file
+            self._embed_pool.submit(writer.abort).result()
+            raise
+        job.chunks_reused += chunks_total - writer.embedded
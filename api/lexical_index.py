@@ -0,0 +1,360 @@
+# api/lexical_index.py
+# -------------------- BM25 inverted index over chunk texts -------------------- #
+
+import math
+import os
+import re
+import threading
+from array import array
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Tuple
+
+import numpy as np
+
+# Words joined by - _ . / stay one token ("err-404", "v2.1"), so codes and
+# identifiers match exactly; their parts are indexed too.
+TOKEN_RE = re.compile(r"\w+(?:[-_./]\w+)*")
+PART_RE = re.compile(r"[^\W_]+")
+
+STOPWORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or "
+    "that the this to was were will with".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercased terms of a text, without stopwords.
+    """
+    terms = []
+    for token in TOKEN_RE.findall(text.lower()):
+        if token in STOPWORDS:
+            continue
+        terms.append(token)
+        if not token.isalnum():
+            terms.extend(part for part in PART_RE.findall(token) if part not in STOPWORDS)
+    return terms
+
+
+class _Growable:
+    """
+    Numpy array with amortized O(1) append. Readers take `view()`; growing
+    swaps in a new buffer, so a view held by a reader is never resized.
+    """
+
+    def __init__(self, dtype: str):
+        self._data = np.zeros(1024, dtype=dtype)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def view(self) -> np.ndarray:
+        return self._data[: self._size]
+
+    def extend(self, values) -> None:
+        values = np.asarray(values, dtype=self._data.dtype)
+        end = self._size + len(values)
+        if end > len(self._data):
+            data = np.zeros(max(end, 2 * len(self._data)), dtype=self._data.dtype)
+            data[: self._size] = self._data[: self._size]
+            self._data = data
+        self._data[self._size : end] = values
+        self._size = end
+
+    def reset(self, values: np.ndarray) -> None:
+        self._data = np.array(values, dtype=self._data.dtype)
+        self._size = len(values)
+        if self._size == 0:
+            self._data = np.zeros(1024, dtype=self._data.dtype)
+
+
+class _Postings(NamedTuple):
+    """
+    Everything a lookup reads about terms, published as one tuple. `save`
+    and `load` swap in a new one, so a query never pairs a new segment
+    with an old delta or document frequencies. `add` only appends to the
+    current tuple's vocab, df and delta.
+    """
+
+    vocab: Dict[str, int]  # term -> term id
+    df: _Growable  # document frequency by term id
+    # Frozen segment (CSR by term id)
+    offsets: np.ndarray
+    ids: np.ndarray
+    tfs: np.ndarray
+    # Delta since the last save: term id -> (chunk ids, term frequencies)
+    delta: Dict[int, Tuple[array, array]]
+
+
+def _make_postings(
+    vocab: Dict[str, int], df: np.ndarray, offsets: np.ndarray, ids: np.ndarray, tfs: np.ndarray
+) -> _Postings:
+    counts = _Growable("int32")
+    counts.reset(df)
+    return _Postings(vocab, counts, offsets, ids, tfs, {})
+
+
+class BM25Index:
+    """
+    Incremental BM25 inverted index keyed by chunk id.
+
+    Postings are kept in two parts: a frozen CSR segment (one offsets array
+    and flat chunk-id / term-frequency arrays, as loaded from disk) and a
+    small delta of compact per-term arrays for chunks added since the last
+    save. `save` merges the delta into a new segment. A lookup touches only
+    the postings of the query terms, scored with vectorized numpy.
+
+    Chunk ids are dense positions in the chunk store, so document lengths
+    and the deleted flags are plain arrays indexed by chunk id.
+    """
+
+    INDEX_FILE = "bm25.npz"
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75, max_df_ratio: float = 0.5):
+        """
+        Parameters
+        ----------
+        k1 : float
+            Term-frequency saturation.
+        b : float
+            Document-length normalization.
+        max_df_ratio : float
+            Query terms found in more than this fraction of chunks are
+            skipped: their IDF is near zero and their postings are the longest.
+        """
+        self.k1 = k1
+        self.b = b
+        self.max_df_ratio = max_df_ratio
+
+        self._postings = _make_postings(
+            {},
+            np.empty(0, dtype=np.int32),
+            np.zeros(1, dtype=np.int64),
+            np.empty(0, dtype=np.int32),
+            np.empty(0, dtype=np.uint16),
+        )
+
+        self._lengths = _Growable("uint32")  # by chunk id, 0 = no terms
+        self._deleted = _Growable("bool")
+        self._live = 0
+        self._total_length = 0
+        self._lock = threading.Lock()  # writers only; readers never block
+
+    def __len__(self) -> int:
+        return self._live
+
+    # ---------------------------------------------------------
+    # Updates
+    # ---------------------------------------------------------
+    def add(self, chunk_ids: Iterable[int], texts: Iterable[str]) -> None:
+        """
+        Index chunks. Ids must be new and increasing (chunk store positions).
+        """
+        with self._lock:
+            postings = self._postings
+            for chunk_id, text in zip(chunk_ids, texts):
+                if chunk_id < len(self._lengths):
+                    raise ValueError(f"Chunk {chunk_id} is already indexed.")
+
+                gap = chunk_id - len(self._lengths)
+                if gap:
+                    # Chunks added while the index was disabled: never searchable
+                    self._lengths.extend(np.zeros(gap))
+                    self._deleted.extend(np.ones(gap, dtype=bool))
+
+                counts = Counter(tokenize(text))
+                length = sum(counts.values())
+                self._lengths.extend([length])
+                self._deleted.extend([False])
+
+                for term, tf in counts.items():
+                    tid = postings.vocab.get(term)
+                    if tid is None:
+                        # df grows before the term is visible to lookups
+                        postings.df.extend([0])
+                        tid = postings.vocab[term] = len(postings.vocab)
+                    delta = postings.delta.get(tid)
+                    if delta is None:
+                        delta = postings.delta[tid] = (array("i"), array("H"))
+                    delta[0].append(chunk_id)
+                    delta[1].append(min(tf, 65535))
+                    postings.df.view()[tid] += 1
+
+                self._live += 1
+                self._total_length += length
+
+    def remove(self, chunk_ids: Iterable[int]) -> None:
+        """
+        Exclude chunks from results. Postings are dropped at the next save;
+        document frequencies keep counting them until then.
+        """
+        with self._lock:
+            deleted = self._deleted.view()
+            lengths = self._lengths.view()
+            for chunk_id in chunk_ids:
+                if 0 <= chunk_id < len(deleted) and not deleted[chunk_id]:
+                    deleted[chunk_id] = True
+                    self._live -= 1
+                    self._total_length -= int(lengths[chunk_id])
+
+    # ---------------------------------------------------------
+    # Search
+    # ---------------------------------------------------------
+    def search(self, query: str, k: int = 10) -> List[Tuple[int, float]]:
+        """
+        Top-k (chunk id, BM25 score) pairs for a query, best first.
+        """
+        if self._live == 0:
+            return []
+
+        n = self._live
+        avg_length = max(self._total_length / n, 1.0)
+        postings = self._postings
+        lengths = self._lengths.view()
+        deleted = self._deleted.view()
+        df = postings.df.view()
+        # Chunks being added concurrently may have postings beyond these views
+        known = min(len(lengths), len(deleted))
+        # Document frequencies only say "too common" once there are enough chunks
+        max_df = self.max_df_ratio * n if n >= 1000 else n
+
+        id_parts, score_parts = [], []
+        for term in set(tokenize(query)):
+            tid = postings.vocab.get(term)
+            if tid is None or tid >= len(df) or df[tid] > max_df:
+                continue
+
+            ids, tfs = self._term_postings(postings, tid)
+            if len(ids) and ids[-1] >= known:
+                visible = ids < known
+                ids, tfs = ids[visible], tfs[visible]
+            if len(ids) == 0:
+                continue
+
+            idf = math.log(1.0 + (n - df[tid] + 0.5) / (df[tid] + 0.5))
+            tfs = tfs.astype(np.float32)
+            norm = self.k1 * (1.0 - self.b + self.b * lengths[ids] / avg_length)
+            id_parts.append(ids)
+            score_parts.append(idf * tfs * (self.k1 + 1.0) / (tfs + norm))
+
+        if not id_parts:
+            return []
+
+        ids = np.concatenate(id_parts)
+        scores = np.concatenate(score_parts)
+        if len(id_parts) > 1:
+            ids, inverse = np.unique(ids, return_inverse=True)
+            scores = np.bincount(inverse, weights=scores)
+
+        live = ~deleted[ids]
+        ids, scores = ids[live], scores[live]
+
+        if len(ids) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            ids, scores = ids[top], scores[top]
+        order = np.argsort(-scores, kind="stable")
+        return [(int(ids[i]), float(scores[i])) for i in order]
+
+    @staticmethod
+    def _term_postings(postings: _Postings, tid: int) -> Tuple[np.ndarray, np.ndarray]:
+        ids = tfs = None
+        if tid + 1 < len(postings.offsets):
+            start, end = postings.offsets[tid], postings.offsets[tid + 1]
+            ids, tfs = postings.ids[start:end], postings.tfs[start:end]
+
+        delta = postings.delta.get(tid)
+        if delta is not None:
+            # np.array copies inside one C call, so a concurrent append
+            # never finds the array's buffer exported
+            delta_ids = np.array(delta[0], dtype=np.int32)
+            delta_tfs = np.array(delta[1], dtype=np.uint16)[: len(delta_ids)]
+            delta_ids = delta_ids[: len(delta_tfs)]
+            if ids is None:
+                return delta_ids, delta_tfs
+            return np.concatenate([ids, delta_ids]), np.concatenate([tfs, delta_tfs])
+
+        if ids is None:
+            return np.empty(0, dtype=np.int32), np.empty(0, dtype=np.uint16)
+        return ids, tfs
+
+    # ---------------------------------------------------------
+    # Persistence
+    # ---------------------------------------------------------
+    def _merge(self) -> None:
+        """
+        Fold the delta into a new segment, dropping deleted chunks' postings
+        and recomputing document frequencies.
+        """
+        postings = self._postings
+        n_terms = len(postings.vocab)
+        seg_counts = np.diff(postings.offsets)
+
+        term_parts = [np.repeat(np.arange(len(seg_counts), dtype=np.int64), seg_counts)]
+        id_parts, tf_parts = [postings.ids], [postings.tfs]
+        for tid, (ids, tfs) in postings.delta.items():
+            term_parts.append(np.full(len(ids), tid, dtype=np.int64))
+            id_parts.append(np.array(ids, dtype=np.int32))
+            tf_parts.append(np.array(tfs, dtype=np.uint16))
+
+        terms = np.concatenate(term_parts)
+        ids = np.concatenate(id_parts)
+        tfs = np.concatenate(tf_parts)
+
+        keep = ~self._deleted.view()[ids]
+        terms, ids, tfs = terms[keep], ids[keep], tfs[keep]
+        # Stable: within a term, segment postings stay ahead of newer ones
+        order = np.argsort(terms, kind="stable")
+        counts = np.bincount(terms, minlength=n_terms)
+
+        offsets = np.zeros(n_terms + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+
+        # One assignment publishes the segment, its df and an empty delta
+        self._postings = _make_postings(postings.vocab, counts, offsets, ids[order], tfs[order])
+
+    def save(self, directory: str) -> None:
+        with self._lock:
+            self._merge()
+            postings = self._postings
+            terms = sorted(postings.vocab, key=postings.vocab.get)
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, self.INDEX_FILE)
+            with open(path + ".tmp", "wb") as f:
+                np.savez(
+                    f,
+                    terms=np.frombuffer("\n".join(terms).encode("utf-8"), dtype=np.uint8),
+                    offsets=postings.offsets,
+                    ids=postings.ids,
+                    tfs=postings.tfs,
+                    lengths=self._lengths.view(),
+                    deleted=self._deleted.view(),
+                    params=np.array([self.k1, self.b]),
+                )
+            os.replace(path + ".tmp", path)
+
+    def load(self, directory: str, rows: int) -> bool:
+        """
+        Load a saved index covering exactly `rows` chunks. Returns False if
+        it is missing or out of step with the chunk store.
+        """
+        path = os.path.join(directory, self.INDEX_FILE)
+        if not os.path.exists(path):
+            return False
+
+        with np.load(path) as data:
+            lengths, deleted = data["lengths"], data["deleted"]
+            if len(lengths) != rows:
+                return False
+            terms = data["terms"].tobytes().decode("utf-8")
+            offsets, ids, tfs = data["offsets"], data["ids"], data["tfs"]
+
+        with self._lock:
+            vocab = {term: i for i, term in enumerate(terms.split("\n"))} if terms else {}
+            self._postings = _make_postings(vocab, np.diff(offsets), offsets, ids, tfs)
+            self._lengths.reset(lengths)
+            self._deleted.reset(deleted)
+            live = ~self._deleted.view()
+            self._live = int(live.sum())
+            self._total_length = int(self._lengths.view()[live].sum())
+        return True
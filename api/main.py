@@ -1,11 +1,64 @@
 # api/main.py
 # ---------------------------------- FastAPI application entry ---------------------------------- #
 
-from fastapi import FastAPI
+import logging
+import threading
+import time
+from fastapi import FastAPI, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from contextlib import asynccontextmanager
 
-from endpoints import router as api_router
+from endpoints import (
+    router as api_router,
+    get_qa_pipeline,
+    is_ready,
+    peek_ingestion_manager,
+    peek_qa_pipeline,
+    set_ready,
+    shutdown_ingestion_manager,
+)
+from embeddings import WARMUP_TEXT, embed_texts, warm_up
+from metrics import REQUEST_LATENCY, register_pipeline_collector, render_metrics
+from utils import get_config
+
+logger = logging.getLogger(__name__)
+
+
+def start_up() -> None:
+    """
+    Load and warm up the models, then load the index, marking each step
+    ready as it completes. Runs in a background thread, so the process
+    answers liveness probes within a second of starting while this takes
+    as long as the models need.
+    """
+    cfg = get_config().get("warmup") or {}
+    if cfg.get("enabled", True):
+        start = time.perf_counter()
+        warm_up(tuple(cfg.get("batch_sizes", (1, 32, 64))))
+        print(f"🔥 Embedding model warmed up in {time.perf_counter() - start:.1f}s")
+    set_ready("model")
+
+    qa = get_qa_pipeline()
+    if qa.reranker is not None and cfg.get("enabled", True):
+        qa.reranker.warm_up()
+        print(f"🔥 Reranker {qa.reranker.model_name} warmed up")
+    if qa.load():
+        print(f"📚 Loaded {qa.store.ntotal} vectors from {qa.store.index_path}")
+    # Pick up documents ingested by other uvicorn workers (vector_store.shared)
+    qa.watch_index()
+    if cfg.get("enabled", True):
+        # Touch the index (and its memory-mapped chunks) once before traffic
+        qa.store.search(embed_texts([WARMUP_TEXT], use_cache=False)[0], k=1)
+    set_ready("index")
+
+
+def _start_up_in_background() -> None:
+    try:
+        start_up()
+    except Exception:
+        # Stays not ready: the orchestrator restarts the process
+        logger.exception("Startup failed")
 
 
 @asynccontextmanager
@@ -14,14 +67,17 @@ async def lifespan(app: FastAPI):
     Application startup and shutdown logic.
     """
     # ------------------- Startup -------------------
-    # Place for:
-    # - loading models
-    # - warming up vector stores
-    # - initializing external services
+    # Models and the index load in the background (see `start_up`);
+    # /api/ready reports 503 until they are done.
     print("🚀 API starting up...")
+    threading.Thread(target=_start_up_in_background, name="startup", daemon=True).start()
+
     yield
     # ------------------- Shutdown ------------------
     print("🛑 API shutting down...")
+    # Fail readiness first so the load balancer drains this replica
+    set_ready("model", False)
+    shutdown_ingestion_manager()
 
 
 app = FastAPI(
@@ -41,6 +97,45 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ------------------------------------------------------------------
+# Metrics
+# ------------------------------------------------------------------
+register_pipeline_collector(peek_qa_pipeline, peek_ingestion_manager)
+
+
+# Served while the models load; other API routes answer 503 until ready
+_PROBES = ("/api/health", "/api/ready")
+
+
+@app.middleware("http")
+async def reject_until_ready(request: Request, call_next):
+    path = request.url.path
+    if path.startswith("/api/") and path not in _PROBES and not is_ready():
+        return JSONResponse(
+            {"detail": "Service is starting up"}, status_code=503, headers={"Retry-After": "1"}
+        )
+    return await call_next(request)
+
+
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    start = time.perf_counter()
+    response = await call_next(request)
+    # Label by route template, not raw path, to keep cardinality bounded
+    route = request.scope.get("route")
+    REQUEST_LATENCY.labels(
+        request.method,
+        route.path if route is not None else "unmatched",
+        response.status_code,
+    ).observe(time.perf_counter() - start)
+    return response
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    body, content_type = render_metrics()
+    return Response(content=body, media_type=content_type)
+
 # ------------------------------------------------------------------
 # Routes
 # ------------------------------------------------------------------
@@ -0,0 +1,204 @@
+# api/metrics.py
+# -------------------- Prometheus metrics for the request hot path -------------------- #
+
+import time
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+import anyio.to_thread
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+
+from embeddings import peek_embedding_batcher, peek_embedding_cache
+
+# Sub-millisecond to multi-second: covers a cached embedding up to LLM generation
+_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+STAGE_LATENCY = Histogram(
+    "rag_stage_duration_seconds",
+    "Time spent in each stage of answering a query",
+    ["stage"],
+    buckets=_BUCKETS,
+)
+TIME_TO_FIRST_TOKEN = Histogram(
+    "rag_time_to_first_token_seconds",
+    "Time from the start of generation to the first answer fragment",
+    buckets=_BUCKETS,
+)
+REQUEST_LATENCY = Histogram(
+    "rag_http_request_duration_seconds",
+    "HTTP request latency until the response starts",
+    ["method", "route", "status"],
+    buckets=_BUCKETS,
+)
+THREADPOOL_IN_USE = Gauge(
+    "rag_threadpool_threads_in_use",
+    "Worker threads borrowed from the request thread pool",
+)
+THREADPOOL_LIMIT = Gauge(
+    "rag_threadpool_threads_limit",
+    "Size of the request thread pool",
+)
+
+
+@contextmanager
+def observe(stage: str) -> Iterator[None]:
+    """
+    Record the duration of a block under `rag_stage_duration_seconds`.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.labels(stage).observe(time.perf_counter() - start)
+
+
+def timed_tokens(tokens: Iterator[str]) -> Iterator[str]:
+    """
+    Wrap a lazy token stream so time-to-first-token and total generation
+    time are recorded as it is consumed.
+    """
+    start = time.perf_counter()
+    first = True
+    try:
+        for token in tokens:
+            if first:
+                TIME_TO_FIRST_TOKEN.observe(time.perf_counter() - start)
+                first = False
+            yield token
+    finally:
+        STAGE_LATENCY.labels("generate").observe(time.perf_counter() - start)
+
+
+class PipelineCollector:
+    """
+    Scrape-time metrics read from the live pipeline, embedding caches and
+    ingestion manager, so the hot path pays nothing to keep them current.
+    A scrape never creates any of them: whatever is not up yet (e.g. while
+    startup is still loading the models) is left out.
+    """
+
+    def __init__(self, get_pipeline: Callable, get_ingestion: Callable):
+        """
+        Parameters
+        ----------
+        get_pipeline : Callable[[], QAPipeline | None]
+            Returns the shared QA pipeline, or None until startup finished.
+        get_ingestion : Callable[[], IngestionManager | None]
+            Returns the ingestion manager, or None if it was never started.
+        """
+        self.get_pipeline = get_pipeline
+        self.get_ingestion = get_ingestion
+
+    def collect(self):
+        pipeline = self.get_pipeline()
+        if pipeline is not None:
+            yield from self._collect_pipeline(pipeline)
+
+        cache = peek_embedding_cache()
+        if cache is not None:
+            stats = cache.stats()
+            yield GaugeMetricFamily(
+                "rag_embedding_cache_entries", "Entries in the in-memory embedding cache",
+                value=stats["size"],
+            )
+            requests = CounterMetricFamily(
+                "rag_embedding_cache_requests", "Embedding cache lookups", labels=["result"]
+            )
+            requests.add_metric(["hit"], stats["hits"])
+            requests.add_metric(["miss"], stats["misses"])
+            yield requests
+
+        batcher = peek_embedding_batcher()
+        if batcher is not None:
+            yield CounterMetricFamily(
+                "rag_embedding_batches", "Encode calls made by the query batcher",
+                value=batcher.batches,
+            )
+            yield CounterMetricFamily(
+                "rag_embedding_batched_queries", "Queries encoded by the query batcher",
+                value=batcher.items,
+            )
+
+        ingestion = self.get_ingestion()
+        if ingestion is not None:
+            stats = ingestion.stats()
+            jobs = GaugeMetricFamily("rag_ingestion_jobs", "Ingestion jobs by state", labels=["state"])
+            jobs.add_metric(["queued"], stats["jobs_queued"])
+            jobs.add_metric(["running"], stats["jobs_running"])
+            yield jobs
+            yield GaugeMetricFamily(
+                "rag_ingestion_files_pending", "Uploaded files not yet ingested",
+                value=stats["files_pending"],
+            )
+
+    def _collect_pipeline(self, pipeline):
+        yield GaugeMetricFamily(
+            "rag_index_vectors", "Live vectors in the vector store", value=pipeline.store.ntotal
+        )
+        yield GaugeMetricFamily(
+            "rag_documents", "Documents in the document registry", value=len(pipeline.documents)
+        )
+
+        store_stats = getattr(pipeline.store, "stats", None)
+        if store_stats is not None:
+            failures = CounterMetricFamily(
+                "rag_shard_failures", "Shards left out of a request", labels=["shard", "reason"]
+            )
+            for (shard, reason), count in store_stats().items():
+                failures.add_metric([str(shard), reason], count)
+            yield failures
+
+        reranker = pipeline.reranker
+        if reranker is not None:
+            stats = reranker.stats()
+            lookups = CounterMetricFamily(
+                "rag_rerank_cache_requests", "Rerank score cache lookups per chunk", labels=["result"]
+            )
+            lookups.add_metric(["hit"], stats["hits"])
+            lookups.add_metric(["miss"], stats["misses"])
+            yield lookups
+            yield GaugeMetricFamily(
+                "rag_rerank_candidates", "Current candidate budget per query",
+                value=stats["candidates"],
+            )
+
+        if pipeline.sessions is not None:
+            yield GaugeMetricFamily(
+                "rag_sessions", "Conversations in the session store", value=len(pipeline.sessions)
+            )
+
+        answer_cache = pipeline.answer_cache
+        if answer_cache is not None:
+            stats = answer_cache.stats()
+            yield GaugeMetricFamily(
+                "rag_answer_cache_entries", "Answers in the semantic answer cache",
+                value=stats["size"],
+            )
+            requests = CounterMetricFamily(
+                "rag_answer_cache_requests", "Semantic answer cache lookups", labels=["result"]
+            )
+            requests.add_metric(["hit"], stats["hits"])
+            requests.add_metric(["miss"], stats["misses"])
+            yield requests
+
+
+def register_pipeline_collector(get_pipeline: Callable, get_ingestion: Callable) -> None:
+    REGISTRY.register(PipelineCollector(get_pipeline, get_ingestion))
+
+
+def render_metrics() -> tuple:
+    """
+    Current metrics in the Prometheus text format, with its content type.
+    Must be called from the event loop (reads the thread pool limiter).
+    """
+    limiter = anyio.to_thread.current_default_thread_limiter()
+    THREADPOOL_IN_USE.set(limiter.borrowed_tokens)
+    THREADPOOL_LIMIT.set(limiter.total_tokens)
+    return generate_latest(), CONTENT_TYPE_LATEST
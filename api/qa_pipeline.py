@@ -1,8 +1,21 @@
 # api/qa_pipeline.py
 
-from typing import List, Tuple
-from embeddings import embed_texts
-from vector_store import SimpleVectorStore
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+import numpy as np
+from answer_cache import CachedAnswer, SemanticAnswerCache, build_answer_cache, exact_terms
+from documents import DocumentRecord, DocumentRegistry, DocumentTexts, chunk_hash, document_id
+from embeddings import embed_texts, embed_query
+from generators import Generator, FakeGenerator, build_generator
+from index_sync import IndexSync
+from metrics import observe, timed_tokens
+from reranker import CrossEncoderReranker, build_reranker
+from schemas import ChatMessage
+from sessions import SessionStore, build_session_store, truncate_history
+from sharded_store import ShardedVectorStore
+from vector_store import SearchResult, SimpleVectorStore
+from utils import get_config
 
 
 class QAPipeline:
@@ -11,7 +24,27 @@ class QAPipeline:
     Designed to be extended with an LLM and conversational memory.
     """
 
-    def __init__(self, embedding_dim: int = 384):
+    def __init__(
+        self,
+        embedding_dim: int = 384,
+        index_path: str | None = None,
+        index_type: str = "flat",
+        min_score: float | None = 0.2,
+        max_score_gap: float | None = 0.15,
+        generator: Generator | None = None,
+        hybrid: bool = False,
+        rrf_k: int = 60,
+        candidates: int = 20,
+        reranker: CrossEncoderReranker | None = None,
+        answer_cache: SemanticAnswerCache | None = None,
+        sessions: SessionStore | None = None,
+        history_tokens: int = 1000,
+        sync: IndexSync | None = None,
+        shards: int = 1,
+        shard_addresses: List[str] | None = None,
+        shard_timeout: float | None = 1.0,
+        **store_params,
+    ):
         """
         Initialize the QA pipeline.
 
@@ -20,8 +53,122 @@ class QAPipeline:
         embedding_dim : int
             Dimension of the embedding vectors.
             Must match the embedding model output.
+        index_path : str | None
+            Directory where the vector store is persisted.
+        index_type : str
+            FAISS index type, one of `vector_store.INDEX_TYPES`.
+        min_score : float | None
+            Sources with a lower cosine similarity are never used.
+        max_score_gap : float | None
+            Sources scoring more than this below the best source are dropped,
+            so fewer than `max_sources` are used when relevance falls off.
+        generator : Generator | None
+            LLM backend producing answers (defaults to the local fake).
+        hybrid : bool
+            Fuse dense results with BM25 keyword results (reciprocal rank
+            fusion), so exact terms such as codes and names are found even
+            when their embeddings are not close to the query's.
+        rrf_k : int
+            Rank-fusion constant; larger values flatten rank differences.
+        candidates : int
+            Results taken from each retriever before fusion (hybrid only).
+        reranker : CrossEncoderReranker | None
+            Optional cross-encoder that re-scores an over-fetched candidate
+            set and keeps the best `max_sources`.
+        answer_cache : SemanticAnswerCache | None
+            Optional cache returning the stored answer of an earlier,
+            near-identical query while the corpus is unchanged. In hybrid
+            mode, queries with exact terms (codes, numbers) bypass it.
+        sessions : SessionStore | None
+            Optional server-side conversation history, keyed by session id.
+        history_tokens : int
+            Estimated tokens of past conversation allowed in a prompt; older
+            turns are left out, so prompt size stays bounded.
+        sync : IndexSync | None
+            Set when several processes serve the same `index_path`: writes
+            are serialized across them and each reloads after the others'
+            saves. The store should then memory-map its index (`mmap`).
+        shards : int
+            With more than one, chunks are partitioned across that many
+            shard processes (`ShardedVectorStore`).
+        shard_addresses : List[str] | None
+            "host:port" of shard servers to use instead of local processes.
+        shard_timeout : float | None
+            Seconds a search waits for each shard before answering without it.
+        **store_params
+            Index tuning parameters forwarded to `SimpleVectorStore`.
         """
-        self.store = SimpleVectorStore(dim=embedding_dim)
+        self.store: SimpleVectorStore | ShardedVectorStore
+        if shards > 1 or shard_addresses:
+            self.store = ShardedVectorStore(
+                dim=embedding_dim,
+                index_path=index_path,
+                shards=shards,
+                addresses=shard_addresses,
+                timeout=shard_timeout,
+                index_type=index_type,
+                lexical=hybrid,
+                **store_params,
+            )
+        else:
+            self.store = SimpleVectorStore(
+                dim=embedding_dim,
+                index_path=index_path,
+                index_type=index_type,
+                lexical=hybrid,
+                **store_params,
+            )
+        self.documents = DocumentRegistry()
+        self.texts = DocumentTexts(index_path)
+        self.hybrid = hybrid
+        self.rrf_k = rrf_k
+        self.candidates = candidates
+        self.reranker = reranker
+        self.answer_cache = answer_cache
+        self.sessions = sessions
+        self.history_tokens = history_tokens
+        self.sync = sync
+        self._write_lock = threading.RLock()
+        self.min_score = min_score
+        self.max_score_gap = max_score_gap
+        self.generator = generator or FakeGenerator()
+
+    @classmethod
+    def from_config(cls) -> "QAPipeline":
+        """
+        Build a pipeline from `vector_store_type` and the `vector_store`,
+        `retrieval`, `generator`, `reranker`, `answer_cache` and `sessions`
+        sections of the settings file.
+
+        With `vector_store.shared`, the index is memory-mapped and kept in
+        sync with the other worker processes using the same `index_path`.
+        """
+        config = get_config()
+        cfg = dict(config.get("vector_store") or {})
+        retrieval = config.get("retrieval") or {}
+        sessions = config.get("sessions") or {}
+        embedding_dim = cfg.pop("embedding_dim", 384)
+        index_path = cfg.pop("index_path", "data/vector_store")
+        shared = cfg.pop("shared", False)
+        reload_interval = cfg.pop("reload_interval", 1.0)
+        return cls(
+            embedding_dim=embedding_dim,
+            index_path=index_path,
+            index_type=config.get("vector_store_type", "flat"),
+            min_score=retrieval.get("min_score", 0.2),
+            max_score_gap=retrieval.get("max_score_gap", 0.15),
+            generator=build_generator(config.get("generator") or {}),
+            hybrid=retrieval.get("hybrid", False),
+            rrf_k=retrieval.get("rrf_k", 60),
+            candidates=retrieval.get("candidates", 20),
+            reranker=build_reranker(config.get("reranker") or {}),
+            answer_cache=build_answer_cache(config.get("answer_cache") or {}, embedding_dim),
+            sessions=build_session_store(sessions),
+            history_tokens=sessions.get("history_tokens", 1000),
+            sync=IndexSync(index_path, reload_interval) if shared else None,
+            mmap=shared,
+            **cfg,
+        )
 
     # ---------------------------------------------------------
     # Document ingestion
@@ -38,13 +185,221 @@ class QAPipeline:
         if not texts:
             raise ValueError("No documents provided for ingestion.")
 
-        embeddings = embed_texts(texts)
+        # Document chunks are stored once; caching them would only evict queries
+        embeddings = embed_texts(texts, use_cache=False)
         self.store.add_embeddings(embeddings, texts)
 
+    def is_unchanged(self, filename: str, digest: str) -> bool:
+        """
+        Whether this file is already stored with the same content hash.
+        """
+        existing = self.documents.get(document_id(filename))
+        return existing is not None and existing.content_hash == digest
+
+    def document_writer(
+        self,
+        filename: str,
+        digest: str,
+        size: int | None = None,
+        content_type: str | None = None,
+        batch_size: int = 64,
+        on_progress: Callable[[int], None] | None = None,
+    ) -> "DocumentWriter":
+        """
+        Writer that adds a document part by part (see DocumentWriter).
+        """
+        return DocumentWriter(
+            self,
+            filename,
+            digest,
+            size=size,
+            content_type=content_type,
+            batch_size=batch_size,
+            on_progress=on_progress,
+        )
+
+    def ingest_document(
+        self,
+        filename: str,
+        chunks: List[str],
+        digest: str,
+        size: int | None = None,
+        content_type: str | None = None,
+        spans: List[Tuple[int, int]] | None = None,
+        pages: List[Tuple[int, int]] | None = None,
+        text: str | None = None,
+        batch_size: int = 64,
+        on_progress: Callable[[int], None] | None = None,
+    ) -> int | None:
+        """
+        Add or replace a document, embedding only chunks not already stored.
+
+        A document whose content hash is unchanged is skipped entirely;
+        otherwise each chunk is looked up by hash and reused if any document
+        already stored it. Chunks only the previous version used are removed.
+
+        Parameters
+        ----------
+        filename : str
+            Original file name; determines the document id.
+        chunks : List[str]
+            Chunk texts of the document, in order.
+        digest : str
+            Content hash of the raw file.
+        size : int | None
+            File size in bytes.
+        content_type : str | None
+            MIME type of the file.
+        spans : List[Tuple[int, int]] | None
+            Character span of each chunk in `text`.
+        pages : List[Tuple[int, int]] | None
+            First and last page of each chunk.
+        text : str | None
+            Cleaned text of the document, kept in `texts`.
+        batch_size : int
+            Number of new chunks embedded per call.
+        on_progress : Callable[[int], None] | None
+            Called with the number of chunks embedded after each batch.
+
+        Returns
+        -------
+        int | None
+            Number of chunks newly embedded, or None if the document was
+            already stored with the same content.
+        """
+        if self.is_unchanged(filename, digest):
+            return None
+
+        writer = self.document_writer(
+            filename,
+            digest,
+            size=size,
+            content_type=content_type,
+            batch_size=batch_size,
+            on_progress=on_progress,
+        )
+        writer.add(chunks, spans, pages, text)
+        writer.commit()
+        return writer.embedded
+
+    def delete_document(self, doc_id: str) -> DocumentRecord | None:
+        """
+        Remove a document and any chunks no other document shares.
+        Returns the removed record, or None if it did not exist.
+        """
+        record = self.documents.get(doc_id)
+        if record is None:
+            return None
+
+        self.store.remove_chunks(self.documents.remove(doc_id))
+        self.texts.remove(doc_id)
+        return record
+
+    def list_documents(self) -> List[DocumentRecord]:
+        return list(self.documents.documents.values())
+
+    def cite(self, sources: List[str]) -> List[Dict[str, Any]]:
+        """
+        Where each source chunk comes from: one entry per document using
+        it, with the chunk's character span in the document's text (see
+        `texts`) and its pages, when known.
+        """
+        citations = []
+        for i, source in enumerate(sources):
+            chunk_id = self.documents.chunk_ids.get(chunk_hash(source))
+            if chunk_id is None:
+                continue
+            for record, position in self.documents.locate(chunk_id):
+                citations.append({
+                    "source": i,
+                    "document_id": record.id,
+                    "filename": record.filename,
+                    "span": record.spans[position] if position < len(record.spans) else None,
+                    "pages": record.pages[position] if position < len(record.pages) else None,
+                })
+        return citations
+
+    # ---------------------------------------------------------
+    # Persistence
+    # ---------------------------------------------------------
+    def load(self) -> bool:
+        """
+        Load the persisted vector store and document registry, if any.
+        """
+        if self.sync is None:
+            return self._load()
+        with self.sync.loading():
+            return self._load()
+
+    def save(self) -> None:
+        """
+        Persist the vector store, if an index path is configured.
+
+        A shared store is compacted first, so that other processes map a
+        single index, and then reloaded to map the files just written.
+        """
+        if self.store.index_path is None:
+            return
+        if self.sync is None:
+            self._save()
+            return
+        self.store.compact()
+        with self.sync.saving():
+            self._save()
+            self._load()
+
+    @contextmanager
+    def writing(self) -> Iterator[None]:
+        """
+        Hold the right to modify the documents and index for the block.
+
+        Writers in this process take turns, so a delete cannot run between
+        a DocumentWriter's `add` and its `commit`. With a shared store, this
+        also waits for writers in other processes and then reloads whatever
+        they saved, so changes are made on top of the latest version.
+        """
+        with self._write_lock:
+            if self.sync is None:
+                yield
+                return
+            with self.sync.writer():
+                if self.sync.changed():
+                    self.load()
+                yield
+
+    def watch_index(self) -> None:
+        """
+        Reload in the background whenever another process saves the shared
+        store. Does nothing if the store is not shared.
+        """
+        if self.sync is not None:
+            self.sync.watch(self.load)
+
+    def _load(self) -> bool:
+        if not self.store.load():
+            return False
+        self.documents.load(self.store.index_path)
+        if self.store.lexical_stale:
+            # Hybrid search was enabled on a store built without it
+            self.store.rebuild_lexical(self.documents.live_chunk_ids())
+        return True
+
+    def _save(self) -> None:
+        self.store.save()
+        self.documents.save(self.store.index_path)
+
     # ---------------------------------------------------------
     # Question answering
     # ---------------------------------------------------------
-    def answer(self, query: str, session_id: str | None = None) -> Tuple[str, List[str]]:
+    def answer(
+        self,
+        query: str,
+        session_id: str | None = None,
+        max_sources: int = 3,
+        nprobe: int | None = None,
+        ef_search: int | None = None,
+        history: List[ChatMessage] | None = None,
+    ) -> Tuple[str, List[str], float]:
         """
         Answer a user query using retrieved context.
 
@@ -53,46 +408,440 @@ class QAPipeline:
         query : str
             User query.
         session_id : str | None
-            Optional session identifier for future memory support.
+            Conversation the query belongs to. Its recent history is put in
+            the prompt, and the query and answer are added to it.
+        max_sources : int
+            Upper bound on the number of sources used as context.
+        nprobe : int | None
+            IVF cells to visit for this query (IVF indexes only).
+        ef_search : int | None
+            HNSW search depth for this query (HNSW indexes only).
+        history : List[ChatMessage] | None
+            Conversation sent by the client, used instead of the session's
+            stored history.
+
+        Returns
+        -------
+        Tuple[str, List[str], float]
+            Generated answer, list of source documents and a confidence
+            score in [0, 1] derived from their similarity to the query.
+        """
+        sources, confidence, tokens = self.stream_answer(
+            query,
+            session_id,
+            max_sources=max_sources,
+            nprobe=nprobe,
+            ef_search=ef_search,
+            history=history,
+        )
+        return "".join(tokens), sources, confidence
+
+    def stream_answer(
+        self,
+        query: str,
+        session_id: str | None = None,
+        max_sources: int = 3,
+        nprobe: int | None = None,
+        ef_search: int | None = None,
+        history: List[ChatMessage] | None = None,
+    ) -> Tuple[List[str], float, Iterator[str]]:
+        """
+        Retrieve context for a query and start generating its answer.
+
+        Retrieval happens before this returns; generation is lazy, so the
+        caller can send the sources and then forward tokens as the backend
+        produces them. With a session store, the turn is added to the
+        session once the answer has been fully consumed.
 
         Returns
         -------
-        Tuple[str, List[str]]
-            Generated answer and list of source documents.
+        Tuple[List[str], float, Iterator[str]]
+            Sources, confidence and an iterator over answer fragments.
         """
         if not query.strip():
             raise ValueError("Query must not be empty.")
 
+        if history is None and session_id is not None and self.sessions is not None:
+            history = self.sessions.history(session_id)
+        history = truncate_history(history or [], self.history_tokens)
+
         # Embed query
-        query_embedding = embed_texts([query])[0]
+        with observe("embed"):
+            query_embedding = embed_query(query)
+
+        # A near-identical query may already have been answered, unless
+        # the conversation so far changes what it means
+        params = (max_sources, nprobe, ef_search)
+        version = self.store.version
+        use_cache = self._use_answer_cache(query) and not history
+        if use_cache:
+            cached = self.answer_cache.get(query, query_embedding, params, version)
+            if cached is not None:
+                tokens = iter([cached.answer])
+                if session_id is not None and self.sessions is not None:
+                    tokens = self._record_turn(tokens, session_id, query)
+                return cached.sources, cached.confidence, tokens
 
         # Retrieve top-k relevant documents
-        sources = self.store.search(query_embedding, k=3)
+        fetch = self._fetch_size(max_sources)
+        with observe("search"):
+            dense = self.store.search(
+                query_embedding,
+                k=fetch,
+                nprobe=nprobe,
+                ef_search=ef_search,
+                min_score=self.min_score,
+            )
+            candidates, confidence = self._retrieve(query, dense, fetch)
+
+        results = self._rerank(query, candidates, max_sources)
+        sources = [r.text for r in results]
+
+        with observe("prompt"):
+            prompt = self._build_prompt(query, sources, history)
+
+        tokens = timed_tokens(self.generator.stream(prompt))
+        if use_cache:
+            tokens = self._cache_answer(tokens, query, query_embedding, params, version, sources, confidence)
+        if session_id is not None and self.sessions is not None:
+            tokens = self._record_turn(tokens, session_id, query)
+        return sources, confidence, tokens
+
+    def answer_batch(
+        self,
+        queries: List[str],
+        max_sources: int = 3,
+        nprobe: int | None = None,
+        ef_search: int | None = None,
+    ) -> List[Tuple[str, List[str], float]]:
+        """
+        Answer many queries at once: one batched embedding call and one
+        FAISS search over the whole query matrix.
 
+        Parameters
+        ----------
+        queries : List[str]
+            User queries.
+        max_sources : int
+            Upper bound on the number of sources used per query.
+        nprobe : int | None
+            IVF cells to visit per query (IVF indexes only).
+        ef_search : int | None
+            HNSW search depth per query (HNSW indexes only).
+
+        Returns
+        -------
+        List[Tuple[str, List[str], float]]
+            (answer, sources, confidence) for each query, in input order.
+        """
+        if not queries:
+            raise ValueError("No queries provided.")
+        if any(not query.strip() for query in queries):
+            raise ValueError("Queries must not be empty.")
+
+        with observe("embed"):
+            query_embeddings = embed_texts(queries)
+
+        params = (max_sources, nprobe, ef_search)
+        version = self.store.version
+        answers: List[Tuple[str, List[str], float] | None] = [None] * len(queries)
+        for i, (query, embedding) in enumerate(zip(queries, query_embeddings)):
+            if self._use_answer_cache(query):
+                cached = self.answer_cache.get(query, embedding, params, version)
+                if cached is not None:
+                    answers[i] = tuple(cached)
+        todo = [i for i, answer in enumerate(answers) if answer is None]
+        if not todo:
+            return answers
+
+        fetch = self._fetch_size(max_sources)
+        with observe("search"):
+            all_results = self.store.search_batch(
+                query_embeddings[todo],
+                k=fetch,
+                nprobe=nprobe,
+                ef_search=ef_search,
+                min_score=self.min_score,
+            )
+
+        for i, dense in zip(todo, all_results):
+            query = queries[i]
+            candidates, confidence = self._retrieve(query, dense, fetch)
+            results = self._rerank(query, candidates, max_sources)
+            sources = [r.text for r in results]
+            with observe("prompt"):
+                prompt = self._build_prompt(query, sources)
+            answer = "".join(timed_tokens(self.generator.stream(prompt)))
+            answers[i] = (answer, sources, confidence)
+            if self._use_answer_cache(query):
+                self.answer_cache.put(
+                    query, query_embeddings[i], params, version, CachedAnswer(answer, sources, confidence)
+                )
+
+        return answers
+
+    def _cache_answer(
+        self,
+        tokens: Iterator[str],
+        query: str,
+        query_embedding: np.ndarray,
+        params: Tuple,
+        version: int,
+        sources: List[str],
+        confidence: float,
+    ) -> Iterator[str]:
+        """
+        Pass answer fragments through, caching the answer once it is
+        complete. An interrupted stream is not cached.
+        """
+        parts = []
+        for token in tokens:
+            parts.append(token)
+            yield token
+        self.answer_cache.put(
+            query, query_embedding, params, version, CachedAnswer("".join(parts), sources, confidence)
+        )
+
+    def _use_answer_cache(self, query: str) -> bool:
+        """
+        Whether `query` may be answered from (and stored in) the answer
+        cache. In hybrid mode a query with exact terms relies on BM25 to
+        find them, which a similar cached question does not guarantee.
+        """
+        if self.answer_cache is None:
+            return False
+        return not (self.hybrid and exact_terms(query))
+
+    def _record_turn(self, tokens: Iterator[str], session_id: str, query: str) -> Iterator[str]:
+        """
+        Pass answer fragments through, then add the query and the complete
+        answer to the session. An interrupted answer is not recorded.
+        """
+        asked = ChatMessage(role="user", content=query)
+        parts = []
+        for token in tokens:
+            parts.append(token)
+            yield token
+        self.sessions.append(session_id, [asked, ChatMessage(role="assistant", content="".join(parts))])
+
+    def _fetch_size(self, max_sources: int) -> int:
+        """
+        Results to retrieve per query: the reranker's current candidate
+        budget, at least `candidates` in hybrid mode, else `max_sources`.
+        """
+        fetch = max_sources
+        if self.reranker is not None:
+            fetch = self.reranker.candidate_budget(max_sources)
+        if self.hybrid:
+            fetch = max(fetch, self.candidates)
+        return fetch
+
+    def _retrieve(
+        self,
+        query: str,
+        dense: List[SearchResult],
+        limit: int,
+    ) -> Tuple[List[SearchResult], float]:
+        """
+        Up to `limit` candidates for a query from its dense results, fused
+        with BM25 results in hybrid mode, and the answer's confidence.
+
+        Confidence always comes from the dense scores: BM25 and rerank
+        scores are not comparable across queries.
+        """
+        # With a reranker, low-similarity candidates are its to judge
+        if self.reranker is None:
+            dense = self._select_sources(dense)
+        confidence = self._confidence(dense)
+        if not self.hybrid:
+            return dense[:limit], confidence
+
+        lexical = self.store.search_lexical(query, self.candidates)
+        return self._fuse(dense, lexical)[:limit], confidence
+
+    def _rerank(self, query: str, candidates: List[SearchResult], max_sources: int) -> List[SearchResult]:
+        if self.reranker is None:
+            return candidates[:max_sources]
+        with observe("rerank"):
+            return self.reranker.rerank(query, candidates, max_sources)
+
+    def _fuse(self, *rankings: List[SearchResult]) -> List[SearchResult]:
+        """
+        Reciprocal rank fusion: each chunk scores sum(1 / (rrf_k + rank))
+        over the rankings it appears in. Returned results carry that score.
+        """
+        scores: Dict[int, float] = {}
+        results: Dict[int, SearchResult] = {}
+        for ranking in rankings:
+            for rank, result in enumerate(ranking, start=1):
+                scores[result.chunk_id] = scores.get(result.chunk_id, 0.0) + 1.0 / (self.rrf_k + rank)
+                results.setdefault(result.chunk_id, result)
+
+        order = sorted(scores, key=scores.__getitem__, reverse=True)
+        return [results[cid]._replace(score=scores[cid]) for cid in order]
+
+    def _select_sources(self, results: List[SearchResult]) -> List[SearchResult]:
+        """
+        Dynamic k: keep only sources close in score to the best one.
+        """
+        if not results or self.max_score_gap is None:
+            return results
+
+        cutoff = results[0].score - self.max_score_gap
+        return [r for r in results if r.score >= cutoff]
+
+    @staticmethod
+    def _confidence(results: List[SearchResult]) -> float:
+        """
+        Confidence of an answer: the best source's cosine similarity,
+        clipped to [0, 1]. No sources means no confidence.
+        """
+        if not results:
+            return 0.0
+        return min(max(results[0].score, 0.0), 1.0)
+
+    @staticmethod
+    def _build_prompt(query: str, sources: List[str], history: List[ChatMessage] | None = None) -> str:
+        """
+        Build the generation prompt from retrieved sources and the
+        (already truncated) conversation history.
+        """
         # Build context
         context = "\n".join(sources) if sources else "No relevant documents found."
+        conversation = ""
+        if history:
+            turns = "\n".join(f"{m.role.capitalize()}: {m.content}" for m in history)
+            conversation = f"Conversation so far:\n{turns}\n\n"
 
         # Prompt template (LLM-ready)
-        prompt = (
+        return (
             "You are a helpful assistant.\n"
             "Use the following context to answer the question.\n\n"
             f"Context:\n{context}\n\n"
+            f"{conversation}"
             f"Question: {query}\n"
             "Answer:"
         )
 
-        # -----------------------------------------------------
-        # LLM CALL (stub for now)
-        # -----------------------------------------------------
-        # TODO:
-        # Replace this with a real LLM call (OpenAI, Ollama, etc.)
-        #
-        # answer = llm.generate(prompt)
-        # -----------------------------------------------------
-
-        answer = (
-            "This is a placeholder answer generated using retrieved context. "
-            + (sources[0] if sources else "")
+
+class DocumentWriter:
+    """
+    Adds one document to a pipeline in parts, so the chunks of its first
+    pages are embedded while later pages are still being extracted.
+
+    Each part's chunks are looked up by hash and only new ones embedded, as
+    in QAPipeline.ingest_document. The document record, and with it the
+    replacement of a previous version, is only registered on `commit`; a
+    writer that is aborted instead leaves the stored document unchanged.
+    Hold `QAPipeline.writing()` from the first `add` to `commit` or `abort`.
+
+    Parts given with their cleaned text are joined by a paragraph break
+    into the document's text, and their spans shifted to point into it.
+    """
+
+    def __init__(
+        self,
+        pipeline: QAPipeline,
+        filename: str,
+        digest: str,
+        size: int | None = None,
+        content_type: str | None = None,
+        batch_size: int = 64,
+        on_progress: Callable[[int], None] | None = None,
+    ):
+        self.pipeline = pipeline
+        self.filename = filename
+        self.digest = digest
+        self.size = size
+        self.content_type = content_type
+        self.batch_size = batch_size
+        self.on_progress = on_progress
+
+        self.chunk_ids: List[int] = []
+        self.spans: List[List[int]] = []
+        self.pages: List[List[int]] = []
+        self.embedded = 0
+        self._new_ids: List[int] = []  # chunks this writer stored
+        self._texts: List[str] = []  # cleaned text of the parts so far
+        self._length = 0  # characters of the document text so far
+
+    def add(
+        self,
+        chunks: List[str],
+        spans: List[Tuple[int, int]] | None = None,
+        pages: List[Tuple[int, int]] | None = None,
+        text: str | None = None,
+    ) -> int:
+        """
+        Store the next chunks of the document. Returns how many were newly
+        embedded.
+
+        With `text`, the cleaned text of this part, `spans` are relative to
+        it; without, they are taken as they are.
+        """
+        if text is not None:
+            offset = self._length + 2 if self._texts else 0
+            spans = [(start + offset, end + offset) for start, end in spans or []]
+            if text:
+                self._texts.append(text)
+                self._length = offset + len(text)
+
+        documents, store = self.pipeline.documents, self.pipeline.store
+
+        chunk_ids: List[int | None] = []
+        new_chunks: Dict[str, List[int]] = {}  # chunk hash -> positions in `chunks`
+        for i, text in enumerate(chunks):
+            h = chunk_hash(text)
+            cid = documents.chunk_ids.get(h)
+            chunk_ids.append(cid)
+            if cid is None:
+                new_chunks.setdefault(h, []).append(i)
+
+        pending = list(new_chunks.items())
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start : start + self.batch_size]
+            texts = [chunks[positions[0]] for _, positions in batch]
+            # Chunks not stored yet: kept out of the query embedding cache
+            ids = store.add_embeddings(embed_texts(texts, use_cache=False), texts)
+            self._new_ids.extend(ids)
+            for (h, positions), cid in zip(batch, ids):
+                documents.add_chunk(h, cid)
+                for i in positions:
+                    chunk_ids[i] = cid
+            if self.on_progress is not None:
+                self.on_progress(len(batch))
+
+        self.chunk_ids.extend(chunk_ids)
+        self.spans.extend(list(span) for span in spans or [])
+        self.pages.extend(list(page) for page in pages or [])
+        self.embedded += len(pending)
+        return len(pending)
+
+    def commit(self) -> DocumentRecord:
+        """
+        Register the document, replacing any previous version.
+        """
+        record = DocumentRecord(
+            id=document_id(self.filename),
+            filename=self.filename,
+            content_hash=self.digest,
+            chunk_ids=self.chunk_ids,
+            size=self.size,
+            content_type=self.content_type,
+            spans=self.spans,
+            pages=self.pages,
         )
+        self.pipeline.store.remove_chunks(self.pipeline.documents.register(record))
+        if self._texts:
+            self.pipeline.texts.put(record.id, "\n\n".join(self._texts))
+        else:
+            self.pipeline.texts.remove(record.id)
+        return record
 
-        return answer, sources
+    def abort(self) -> None:
+        """
+        Remove the chunks stored by `add` so far, leaving the documents and
+        index as they were before the writer started.
+        """
+        self.pipeline.store.remove_chunks(self.pipeline.documents.discard_chunks(self._new_ids))
+        self._new_ids = []
@@ -0,0 +1,193 @@
+# api/reranker.py
+# -------------------- cross-encoder re-ranking of retrieved chunks -------------------- #
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from vector_store import SearchResult
+
+DEFAULT_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+
+class CrossEncoderReranker:
+    """
+    Re-scores retrieval candidates with a cross-encoder, which reads query
+    and chunk together and ranks far more precisely than embedding
+    similarity, at a much higher cost per chunk.
+
+    The number of candidates scored per query adapts to load: it is the
+    most the latency budget allows given the measured cost per pair and
+    the number of requests currently reranking (which share the CPU),
+    clamped between the number of sources wanted and `max_candidates`.
+    Scores are cached per (query, chunk id), so repeated questions skip
+    the model entirely; chunk ids are never reused, so entries cannot go
+    stale.
+    """
+
+    def __init__(
+        self,
+        model: str = DEFAULT_MODEL,
+        batch_size: int = 16,
+        max_candidates: int = 20,
+        latency_budget_ms: float = 150.0,
+        cache_size: int = 50_000,
+        max_length: int = 512,
+        device: str = "cpu",
+    ):
+        """
+        Parameters
+        ----------
+        model : str
+            Cross-encoder model name or path.
+        batch_size : int
+            Pairs scored per forward pass.
+        max_candidates : int
+            Candidates scored per query when the service is idle.
+        latency_budget_ms : float
+            Target reranking time per request; fewer candidates are scored
+            when the measured cost would exceed it.
+        cache_size : int
+            (query, chunk id) scores kept in the LRU cache.
+        max_length : int
+            Token limit for a query + chunk pair.
+        device : str
+            Torch device.
+        """
+        self.model_name = model
+        self.batch_size = batch_size
+        self.max_candidates = max_candidates
+        self.latency_budget = latency_budget_ms / 1000.0
+        self.cache_size = cache_size
+        self.max_length = max_length
+        self.device = device
+
+        self.hits = 0
+        self.misses = 0
+
+        self._model = None
+        self._model_lock = threading.Lock()
+        self._cache: "OrderedDict[Tuple[str, int], float]" = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+        self._pair_cost: Optional[float] = None  # EWMA seconds per scored pair
+        self._in_flight = 0
+        self._state_lock = threading.Lock()
+
+    def get_model(self):
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    from sentence_transformers import CrossEncoder
+
+                    self._model = CrossEncoder(
+                        self.model_name, device=self.device, max_length=self.max_length
+                    )
+        return self._model
+
+    def warm_up(self) -> None:
+        """
+        Load the model and time one batch, seeding the per-pair cost.
+        """
+        pairs = [("warm-up query", "warm-up passage")] * self.batch_size
+        start = time.perf_counter()
+        self.get_model().predict(pairs, batch_size=self.batch_size, show_progress_bar=False)
+        self._record_cost(time.perf_counter() - start, len(pairs))
+
+    # ---------------------------------------------------------
+    # Candidate budget
+    # ---------------------------------------------------------
+    def candidate_budget(self, k: int) -> int:
+        """
+        Number of candidates to fetch and score for a request wanting k.
+        """
+        with self._state_lock:
+            cost, in_flight = self._pair_cost, self._in_flight
+
+        if cost is None:
+            return max(k, self.max_candidates)
+        affordable = int(self.latency_budget / (cost * (in_flight + 1)))
+        return max(k, min(self.max_candidates, affordable))
+
+    def _record_cost(self, seconds: float, pairs: int) -> None:
+        per_pair = seconds / pairs
+        with self._state_lock:
+            if self._pair_cost is None:
+                self._pair_cost = per_pair
+            else:
+                self._pair_cost = 0.8 * self._pair_cost + 0.2 * per_pair
+
+    # ---------------------------------------------------------
+    # Reranking
+    # ---------------------------------------------------------
+    def rerank(self, query: str, candidates: List[SearchResult], k: int) -> List[SearchResult]:
+        """
+        Best k candidates by cross-encoder score, which replaces their
+        retrieval score.
+        """
+        if not candidates:
+            return []
+
+        key = " ".join(query.lower().split())
+        scores: Dict[int, float] = {}
+        missing: List[SearchResult] = []
+        with self._cache_lock:
+            for result in candidates:
+                score = self._cache.get((key, result.chunk_id))
+                if score is None:
+                    missing.append(result)
+                else:
+                    self._cache.move_to_end((key, result.chunk_id))
+                    scores[result.chunk_id] = score
+            self.hits += len(candidates) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            scores.update(self._score(key, query, missing))
+
+        ranked = sorted(candidates, key=lambda r: scores[r.chunk_id], reverse=True)
+        return [r._replace(score=scores[r.chunk_id]) for r in ranked[:k]]
+
+    def _score(self, key: str, query: str, results: List[SearchResult]) -> Dict[int, float]:
+        with self._state_lock:
+            self._in_flight += 1
+        try:
+            start = time.perf_counter()
+            raw = self.get_model().predict(
+                [(query, r.text) for r in results],
+                batch_size=self.batch_size,
+                show_progress_bar=False,
+            )
+            self._record_cost(time.perf_counter() - start, len(results))
+        finally:
+            with self._state_lock:
+                self._in_flight -= 1
+
+        scores = {r.chunk_id: float(s) for r, s in zip(results, raw)}
+        with self._cache_lock:
+            for chunk_id, score in scores.items():
+                self._cache[(key, chunk_id)] = score
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return scores
+
+    def stats(self) -> Dict[str, float]:
+        with self._cache_lock:
+            size = len(self._cache)
+        return {
+            "cache_size": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "candidates": self.candidate_budget(0),
+        }
+
+
+def build_reranker(cfg: Dict[str, Any]) -> Optional[CrossEncoderReranker]:
+    """
+    Build a reranker from a `reranker` settings section, or None if disabled.
+    """
+    cfg = dict(cfg)
+    if not cfg.pop("enabled", False):
+        return None
+    return CrossEncoderReranker(**cfg)
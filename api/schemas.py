@@ -18,11 +18,18 @@ class ChatRequest(BaseModel):
     prompt: str = Field(..., description="User's question or prompt")
     history: Optional[List[ChatMessage]] = Field(
         default=None,
-        description="Optional previous conversation history"
+        description=(
+            "Optional previous conversation history. Usually omitted: the "
+            "server keeps the history of each session_id"
+        )
     )
     session_id: Optional[str] = Field(
         default=None,
-        description="Session identifier for conversation continuity"
+        description="Session identifier for conversation continuity; without one nothing is stored"
+    )
+    new_session: bool = Field(
+        default=False,
+        description="Start a session when no session_id is sent; its id is returned"
     )
     max_sources: int = Field(
         default=3,
@@ -30,6 +37,30 @@ class ChatRequest(BaseModel):
         le=10,
         description="Maximum number of sources to retrieve"
     )
+    nprobe: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="IVF cells to probe for this request (IVF indexes only)"
+    )
+    ef_search: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="HNSW search depth for this request (HNSW indexes only)"
+    )
+
+
+class Citation(BaseModel):
+    source: int = Field(..., description="Index of the cited chunk in `sources`")
+    document_id: str = Field(..., description="Document the chunk belongs to")
+    filename: str = Field(..., description="Name (or relative path) of that document")
+    span: Optional[List[int]] = Field(
+        default=None,
+        description="[start, end) characters of the chunk in GET /documents/{document_id}/text"
+    )
+    pages: Optional[List[int]] = Field(
+        default=None,
+        description="First and last page of the chunk (PDFs only)"
+    )
 
 
 class ChatResponse(BaseModel):
@@ -38,6 +69,10 @@ class ChatResponse(BaseModel):
         default_factory=list,
         description="List of source documents used"
     )
+    citations: List[Citation] = Field(
+        default_factory=list,
+        description="Where each source comes from; a chunk shared by several documents is cited in each"
+    )
     confidence: Optional[float] = Field(
         default=None,
         ge=0.0,
@@ -50,6 +85,38 @@ class ChatResponse(BaseModel):
     )
 
 
+class BatchChatRequest(BaseModel):
+    prompts: List[str] = Field(
+        ...,
+        min_length=1,
+        max_length=10000,
+        description="Questions to answer independently (no conversation state)"
+    )
+    max_sources: int = Field(
+        default=3,
+        ge=1,
+        le=10,
+        description="Maximum number of sources to retrieve per question"
+    )
+    nprobe: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="IVF cells to probe per question (IVF indexes only)"
+    )
+    ef_search: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="HNSW search depth per question (HNSW indexes only)"
+    )
+
+
+class BatchChatResponse(BaseModel):
+    results: List[ChatResponse] = Field(
+        default_factory=list,
+        description="One response per prompt, in request order"
+    )
+
+
 # ------------------------------------------------------------------
 # Upload-related schemas
 # ------------------------------------------------------------------
@@ -64,6 +131,40 @@ class UploadResponse(BaseModel):
         default=None,
         description="Additional message"
     )
+    job_id: Optional[str] = Field(
+        default=None,
+        description="Ingestion job identifier for progress polling"
+    )
+
+
+class IngestionStatusResponse(BaseModel):
+    job_id: str = Field(..., description="Ingestion job identifier")
+    status: str = Field(..., description="queued, running, completed or failed")
+    files_total: int = Field(..., description="Number of files in the job")
+    files_processed: int = Field(default=0, description="Files extracted and embedded")
+    chunks_total: int = Field(default=0, description="Chunks produced so far")
+    chunks_embedded: int = Field(default=0, description="Chunks embedded and stored")
+    chunks_reused: int = Field(
+        default=0,
+        description="Chunks already stored by an earlier upload (not re-embedded)"
+    )
+    files_unchanged: int = Field(
+        default=0,
+        description="Files skipped because their content was already ingested"
+    )
+    errors: List[str] = Field(
+        default_factory=list,
+        description="Per-file error messages"
+    )
+    warnings: List[str] = Field(
+        default_factory=list,
+        description="Problems that did not stop a file, such as skipped PDF pages"
+    )
+    created_at: datetime = Field(..., description="Job creation timestamp")
+    finished_at: Optional[datetime] = Field(
+        default=None,
+        description="Job completion timestamp"
+    )
 
 
 # ------------------------------------------------------------------
@@ -121,6 +222,14 @@ class HealthResponse(BaseModel):
     )
 
 
+class ReadinessResponse(BaseModel):
+    ready: bool = Field(..., description="Whether the service accepts traffic")
+    checks: Dict[str, bool] = Field(
+        default_factory=dict,
+        description="Startup steps and whether each has completed"
+    )
+
+
 # ------------------------------------------------------------------
 # Configuration schema (optional / future use)
 # ------------------------------------------------------------------
@@ -0,0 +1,313 @@
+# api/sessions.py
+# -------------------- server-side conversation history per session -------------------- #
+
+import sqlite3
+from abc import ABC, abstractmethod
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from schemas import ChatMessage
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count of a text (about 4 characters per token for English
+    with BPE tokenizers). Only used to budget prompt history.
+    """
+    return len(text) // 4 + 1
+
+
+def truncate_history(messages: List[ChatMessage], max_tokens: int) -> List[ChatMessage]:
+    """
+    The most recent messages whose estimated tokens fit in `max_tokens`,
+    oldest first. Older messages are dropped whole, never cut midway.
+    """
+    kept: List[ChatMessage] = []
+    budget = max_tokens
+    for message in reversed(messages):
+        budget -= estimate_tokens(message.content)
+        if budget < 0:
+            break
+        kept.append(message)
+    kept.reverse()
+    return kept
+
+
+class SessionStore(ABC):
+    """
+    Conversation history keyed by session id.
+
+    Each session keeps at most `max_messages` messages, the oldest dropped
+    first, and a session not used for `idle_ttl` seconds is forgotten.
+    """
+
+    def __init__(self, max_messages: int = 50, idle_ttl: Optional[float] = 3600.0):
+        """
+        Parameters
+        ----------
+        max_messages : int
+            Messages kept per session (user and assistant turns both count).
+        idle_ttl : float | None
+            Seconds after its last use before a session is evicted; None
+            keeps sessions until `max_messages` pushes their turns out.
+        """
+        self.max_messages = max_messages
+        self.idle_ttl = idle_ttl
+
+    @abstractmethod
+    def __len__(self) -> int:
+        ...
+
+    @abstractmethod
+    def history(self, session_id: str) -> List[ChatMessage]:
+        """
+        Messages of a session, oldest first (empty for an unknown session).
+        """
+
+    @abstractmethod
+    def append(self, session_id: str, messages: List[ChatMessage]) -> None:
+        """
+        Add messages to a session, creating it if needed.
+        """
+
+    @abstractmethod
+    def delete(self, session_id: str) -> bool:
+        """
+        Forget a session. Returns False if it did not exist.
+        """
+
+    @abstractmethod
+    def evict_idle(self) -> int:
+        """
+        Drop sessions idle for longer than `idle_ttl`; returns how many.
+        """
+
+
+class InMemorySessionStore(SessionStore):
+    """
+    Sessions held in this process: one ring buffer (bounded deque) per
+    session, in least-recently-used order so idle sessions are found at the
+    front. Not shared between workers.
+    """
+
+    def __init__(
+        self,
+        max_messages: int = 50,
+        idle_ttl: Optional[float] = 3600.0,
+        max_sessions: int = 10_000,
+    ):
+        """
+        Parameters
+        ----------
+        max_messages : int
+            Messages kept per session.
+        idle_ttl : float | None
+            Seconds after its last use before a session is evicted.
+        max_sessions : int
+            Least recently used sessions are evicted beyond this.
+        """
+        super().__init__(max_messages, idle_ttl)
+        self.max_sessions = max_sessions
+
+        # session id -> (last use, messages), least recently used first
+        self._sessions: "OrderedDict[str, Tuple[float, Deque[ChatMessage]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._sessions)
+
+    def history(self, session_id: str) -> List[ChatMessage]:
+        with self._lock:
+            self._evict_idle(time.monotonic())
+            entry = self._sessions.get(session_id)
+            if entry is None:
+                return []
+            return list(self._touch(session_id, entry[1]))
+
+    def append(self, session_id: str, messages: List[ChatMessage]) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._evict_idle(now)
+            entry = self._sessions.get(session_id)
+            buffer = entry[1] if entry is not None else deque(maxlen=self.max_messages)
+            buffer.extend(messages)
+            self._touch(session_id, buffer, now)
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def evict_idle(self) -> int:
+        with self._lock:
+            return self._evict_idle(time.monotonic())
+
+    def _touch(self, session_id: str, buffer: Deque[ChatMessage], now: float | None = None) -> Deque[ChatMessage]:
+        self._sessions[session_id] = (time.monotonic() if now is None else now, buffer)
+        self._sessions.move_to_end(session_id)
+        return buffer
+
+    def _evict_idle(self, now: float) -> int:
+        # Called with the lock held; idle sessions are all at the front
+        if self.idle_ttl is None:
+            return 0
+        evicted = 0
+        while self._sessions:
+            last_used, _ = next(iter(self._sessions.values()))
+            if now - last_used <= self.idle_ttl:
+                break
+            self._sessions.popitem(last=False)
+            evicted += 1
+        return evicted
+
+
+class SQLiteSessionStore(SessionStore):
+    """
+    Sessions in a local SQLite file (WAL mode), so every worker process
+    opening the same file sees the same conversations.
+
+    Each append trims the session back to its last `max_messages` rows;
+    idle sessions are deleted at most once per `evict_interval` seconds.
+    """
+
+    def __init__(
+        self,
+        path: str = "data/sessions.sqlite3",
+        max_messages: int = 50,
+        idle_ttl: Optional[float] = 3600.0,
+        evict_interval: float = 60.0,
+    ):
+        """
+        Parameters
+        ----------
+        path : str
+            SQLite database file, shared by all workers.
+        max_messages : int
+            Messages kept per session.
+        idle_ttl : float | None
+            Seconds after its last use before a session is evicted.
+        evict_interval : float
+            Minimum seconds between two idle-session sweeps.
+        """
+        super().__init__(max_messages, idle_ttl)
+        self.path = path
+        self.evict_interval = evict_interval
+        self._last_sweep = 0.0
+        self._lock = threading.Lock()
+
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=5.0)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.executescript(
+            "CREATE TABLE IF NOT EXISTS sessions "
+            "(session_id TEXT PRIMARY KEY, last_used REAL NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS sessions_last_used ON sessions (last_used);"
+            "CREATE TABLE IF NOT EXISTS messages "
+            "(id INTEGER PRIMARY KEY AUTOINCREMENT, session_id TEXT NOT NULL, "
+            "role TEXT NOT NULL, content TEXT NOT NULL, timestamp TEXT NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS messages_session ON messages (session_id, id);"
+        )
+        self._db.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def history(self, session_id: str) -> List[ChatMessage]:
+        now = time.time()
+        with self._lock, self._db:
+            touched = self._db.execute(
+                "UPDATE sessions SET last_used = ? WHERE session_id = ? AND last_used >= ?",
+                (now, session_id, self._idle_cutoff(now)),
+            ).rowcount
+            if not touched:
+                return []
+            rows = self._db.execute(
+                "SELECT role, content, timestamp FROM messages WHERE session_id = ? "
+                "ORDER BY id DESC LIMIT ?",
+                (session_id, self.max_messages),
+            ).fetchall()
+
+        return [
+            ChatMessage(role=role, content=content, timestamp=datetime.fromisoformat(timestamp))
+            for role, content, timestamp in reversed(rows)
+        ]
+
+    def append(self, session_id: str, messages: List[ChatMessage]) -> None:
+        now = time.time()
+        with self._lock, self._db:
+            if now - self._last_sweep >= self.evict_interval:
+                self._evict_idle(now)
+
+            # A session that went idle starts over, as in memory
+            self._db.execute(
+                "DELETE FROM messages WHERE session_id = ? AND EXISTS "
+                "(SELECT 1 FROM sessions WHERE session_id = ? AND last_used < ?)",
+                (session_id, session_id, self._idle_cutoff(now)),
+            )
+            self._db.execute(
+                "INSERT INTO sessions (session_id, last_used) VALUES (?, ?) "
+                "ON CONFLICT (session_id) DO UPDATE SET last_used = excluded.last_used",
+                (session_id, now),
+            )
+            self._db.executemany(
+                "INSERT INTO messages (session_id, role, content, timestamp) VALUES (?, ?, ?, ?)",
+                [(session_id, m.role, m.content, m.timestamp.isoformat()) for m in messages],
+            )
+            # Ring buffer: keep only the newest max_messages rows
+            self._db.execute(
+                "DELETE FROM messages WHERE session_id = ? AND id <= "
+                "(SELECT id FROM messages WHERE session_id = ? ORDER BY id DESC LIMIT 1 OFFSET ?)",
+                (session_id, session_id, self.max_messages),
+            )
+
+    def delete(self, session_id: str) -> bool:
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM messages WHERE session_id = ?", (session_id,))
+            return self._db.execute(
+                "DELETE FROM sessions WHERE session_id = ?", (session_id,)
+            ).rowcount > 0
+
+    def evict_idle(self) -> int:
+        with self._lock, self._db:
+            return self._evict_idle(time.time())
+
+    def _idle_cutoff(self, now: float) -> float:
+        return float("-inf") if self.idle_ttl is None else now - self.idle_ttl
+
+    def _evict_idle(self, now: float) -> int:
+        # Called with the lock held, inside a transaction
+        self._last_sweep = now
+        if self.idle_ttl is None:
+            return 0
+        cutoff = self._idle_cutoff(now)
+        self._db.execute(
+            "DELETE FROM messages WHERE session_id IN "
+            "(SELECT session_id FROM sessions WHERE last_used < ?)",
+            (cutoff,),
+        )
+        return self._db.execute("DELETE FROM sessions WHERE last_used < ?", (cutoff,)).rowcount
+
+
+def build_session_store(cfg: Dict[str, Any]) -> Optional[SessionStore]:
+    """
+    Build a session store from a `sessions` settings section, or None if
+    disabled. `backend` is "memory" (this process only) or "sqlite"
+    (shared by every worker opening `path`).
+    """
+    cfg = dict(cfg)
+    cfg.pop("history_tokens", None)  # read by the pipeline
+    if not cfg.pop("enabled", True):
+        return None
+
+    backend = cfg.pop("backend", "memory")
+    if backend == "memory":
+        cfg.pop("path", None)
+        return InMemorySessionStore(**cfg)
+    if backend == "sqlite":
+        return SQLiteSessionStore(**cfg)
+    raise ValueError(f"Unknown session backend: {backend!r}")
@@ -0,0 +1,589 @@
+# api/sharded_store.py
+# -------------------- vector store partitioned across shard processes -------------------- #
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import threading
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Any, Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from documents import chunk_hash
+from vector_store import SearchResult, SimpleVectorStore
+
+logger = logging.getLogger(__name__)
+
+Address = Tuple[str, int]
+
+# Store methods and attributes a shard serves
+_SHARD_METHODS = frozenset(
+    {
+        "add_embeddings", "remove_chunks", "search_batch", "search_lexical", "rebuild_lexical",
+        "train", "compact", "save", "load",
+    }
+)
+_SHARD_ATTRIBUTES = frozenset({"ntotal", "segments", "lexical_stale"})
+
+
+class ShardError(RuntimeError):
+    """
+    A request failed inside a shard process.
+    """
+
+
+def parse_address(address: str) -> Address:
+    """
+    "host:port" -> (host, port).
+    """
+    host, _, port = address.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+# ------------------------------------------------------------------
+# Shard server
+# ------------------------------------------------------------------
+def _shard_authkey() -> bytes:
+    # Shared secret of remote shard servers and their clients
+    authkey = os.environ.get("SHARD_AUTHKEY")
+    if not authkey:
+        raise ValueError("SHARD_AUTHKEY must be set to use remote vector shards.")
+    return authkey.encode()
+
+
+def serve_shard(listener: Listener, store: SimpleVectorStore) -> None:
+    """
+    Answer store requests on every connection accepted by `listener`, each
+    connection in its own thread. Runs until the process exits.
+    """
+    while True:
+        conn = listener.accept()
+        threading.Thread(target=_handle, args=(store, conn), name="shard-conn", daemon=True).start()
+
+
+def _handle(store: SimpleVectorStore, conn: Connection) -> None:
+    with conn:
+        while True:
+            try:
+                method, args, kwargs = conn.recv()
+            except (EOFError, OSError):
+                return
+            try:
+                if method in _SHARD_METHODS:
+                    reply = (True, getattr(store, method)(*args, **kwargs))
+                elif method in _SHARD_ATTRIBUTES:
+                    reply = (True, getattr(store, method))
+                else:
+                    raise AttributeError(f"Shards do not serve {method!r}")
+            except Exception as e:
+                logger.exception("Shard request %s failed", method)
+                reply = (False, f"{type(e).__name__}: {e}")
+            try:
+                conn.send(reply)
+            except (EOFError, OSError):
+                return  # the client gave up waiting
+
+
+def _run_local_shard(ready: Connection, authkey: bytes, dim: int, index_path: str | None, params: dict) -> None:
+    # Entry point of a shard subprocess started by ShardedVectorStore
+    store = SimpleVectorStore(dim=dim, index_path=index_path, **params)
+    listener = Listener(("127.0.0.1", 0), authkey=authkey)
+    ready.send(listener.address)
+    ready.close()
+    serve_shard(listener, store)
+
+
+class _ShardClient:
+    """
+    Connections to one shard. Each request borrows an idle connection (or
+    opens one), so concurrent requests do not queue behind each other; a
+    connection whose request timed out is closed, never reused.
+    """
+
+    def __init__(self, address: Address, authkey: bytes, process: multiprocessing.Process | None = None):
+        self.address = address
+        self.authkey = authkey
+        self.process = process
+        self._idle: List[Connection] = []
+        self._lock = threading.Lock()
+
+    def call(self, timeout: float | None, method: str, *args, **kwargs) -> Any:
+        with self._lock:
+            conn = self._idle.pop() if self._idle else None
+        if conn is None:
+            conn = Client(self.address, authkey=self.authkey)
+
+        try:
+            conn.send((method, args, kwargs))
+            if timeout is not None and not conn.poll(timeout):
+                raise TimeoutError(f"Shard {self.address} did not answer {method} within {timeout}s")
+            ok, result = conn.recv()
+        except BaseException:
+            conn.close()
+            raise
+
+        with self._lock:
+            self._idle.append(conn)
+        if not ok:
+            raise ShardError(result)
+        return result
+
+    def close(self) -> None:
+        with self._lock:
+            for conn in self._idle:
+                conn.close()
+            self._idle.clear()
+        if self.process is not None:
+            self.process.terminate()
+            self.process.join(timeout=5)
+
+
+# ------------------------------------------------------------------
+# Sharded store
+# ------------------------------------------------------------------
+class ShardedVectorStore:
+    """
+    A vector store partitioned across shard processes, with the interface
+    of SimpleVectorStore.
+
+    Each chunk is routed to one shard by the hash of its text (chunks are
+    content-addressed, so a chunk shared by several documents is stored
+    once). A shard is a SimpleVectorStore served by a subprocess started
+    here, or by a shard server on another host
+    (`python sharded_store.py --listen host:port`). Chunk ids are global:
+    `local id * shards + shard`, so no id mapping is kept.
+
+    Searches fan out to every shard in parallel and the top-k results are
+    merged by score. A shard that fails or does not answer within
+    `timeout` seconds is left out of that result, so a slow shard degrades
+    recall instead of failing the query. Writes wait for every shard they
+    touch and raise if one fails; an add that fails on one shard is rolled
+    back on the others.
+
+    Shard failures are counted per shard (`stats`). BM25 scores are
+    computed per shard, so lexical results merge approximately.
+    """
+
+    MANIFEST_FILE = "shards.json"
+
+    def __init__(
+        self,
+        dim: int = 384,
+        index_path: str | None = None,
+        shards: int = 2,
+        addresses: List[str] | None = None,
+        timeout: float | None = 1.0,
+        **store_params,
+    ):
+        """
+        Parameters
+        ----------
+        dim : int
+            Embedding dimension.
+        index_path : str | None
+            Directory of the store. Local shards persist to its `shard-<i>`
+            subdirectories; remote shards to their own index path.
+        shards : int
+            Number of local shard processes to start (ignored with
+            `addresses`). Fixed for the lifetime of a persisted store.
+        addresses : List[str] | None
+            "host:port" of running shard servers to use instead of local
+            processes. They authenticate with the SHARD_AUTHKEY environment
+            variable.
+        timeout : float | None
+            Seconds a search waits for each shard; None waits indefinitely.
+        **store_params
+            Arguments forwarded to each shard's `SimpleVectorStore`.
+        """
+        self.dim = dim
+        self.index_path = index_path
+        self.timeout = timeout
+        self.lexical_stale = False
+        self.version = 0
+
+        if addresses:
+            authkey = _shard_authkey()
+            self._shards = [_ShardClient(parse_address(a), authkey) for a in addresses]
+        else:
+            self._shards = self._start_local(shards, store_params)
+
+        self._pool = ThreadPoolExecutor(max_workers=4 * len(self._shards), thread_name_prefix="shard")
+        self._failures: Counter = Counter()  # (shard, reason) -> count
+        self._lock = threading.Lock()
+
+    def _start_local(self, shards: int, store_params: dict) -> List[_ShardClient]:
+        # "spawn" avoids forking a parent that already holds torch/faiss threads
+        context = multiprocessing.get_context("spawn")
+        authkey = os.urandom(16)
+        started = []
+        for i in range(shards):
+            path = None if self.index_path is None else os.path.join(self.index_path, f"shard-{i}")
+            parent, child = context.Pipe(duplex=False)
+            process = context.Process(
+                target=_run_local_shard,
+                args=(child, authkey, self.dim, path, store_params),
+                name=f"vector-shard-{i}",
+                daemon=True,
+            )
+            process.start()
+            child.close()
+            started.append((parent, process))
+
+        clients = []
+        for i, (parent, process) in enumerate(started):
+            if not parent.poll(120):
+                raise RuntimeError(f"Vector shard {i} did not start")
+            clients.append(_ShardClient(parent.recv(), authkey, process))
+            parent.close()
+        return clients
+
+    @property
+    def shards(self) -> int:
+        return len(self._shards)
+
+    @property
+    def ntotal(self) -> int:
+        """
+        Number of live vectors in the shards that answered.
+        """
+        return sum(self._gather("ntotal").values())
+
+    @property
+    def segments(self) -> int:
+        """
+        Number of staging segments across the shards that answered.
+        """
+        return sum(self._gather("segments").values())
+
+    def stats(self) -> Dict[Tuple[int, str], int]:
+        """
+        Failed shard requests so far, keyed by (shard, "timeout" | "error").
+        """
+        with self._lock:
+            return dict(self._failures)
+
+    def close(self) -> None:
+        """
+        Stop the local shard processes and drop connections.
+        """
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        for shard in self._shards:
+            shard.close()
+
+    # ---------------------------------------------------------
+    # Chunk ids
+    # ---------------------------------------------------------
+    def _route(self, text: str) -> int:
+        return int(chunk_hash(text)[:16], 16) % len(self._shards)
+
+    def _split(self, chunk_ids: Iterable[int]) -> List[List[int]]:
+        """
+        Global chunk ids -> local ids, per shard.
+        """
+        n = len(self._shards)
+        local: List[List[int]] = [[] for _ in range(n)]
+        for cid in chunk_ids:
+            local[cid % n].append(cid // n)
+        return local
+
+    def _globalize(self, shard: int, results: List[SearchResult]) -> List[SearchResult]:
+        n = len(self._shards)
+        return [r._replace(chunk_id=r.chunk_id * n + shard) for r in results]
+
+    # ---------------------------------------------------------
+    # Fan-out
+    # ---------------------------------------------------------
+    def _scatter(self, calls: Dict[int, Tuple[str, tuple, dict]], timeout: float | None) -> Dict[int, Future]:
+        return {
+            shard: self._pool.submit(self._shards[shard].call, timeout, method, *args, **kwargs)
+            for shard, (method, args, kwargs) in calls.items()
+        }
+
+    def _gather(self, method: str, *args, **kwargs) -> Dict[int, Any]:
+        """
+        Call every shard in parallel and return the answers that came back
+        within the timeout; failed and late shards are logged and counted.
+        """
+        calls = {shard: (method, args, kwargs) for shard in range(len(self._shards))}
+        futures = self._scatter(calls, self.timeout)
+        wait(futures.values(), timeout=None if self.timeout is None else self.timeout + 1.0)
+
+        answers = {}
+        for shard, future in futures.items():
+            if not future.done():
+                future.cancel()
+                self._failed(shard, method, "timeout", "no answer")
+                continue
+            try:
+                answers[shard] = future.result()
+            except TimeoutError as e:
+                self._failed(shard, method, "timeout", e)
+            except (ShardError, OSError, EOFError) as e:
+                self._failed(shard, method, "error", e)
+        return answers
+
+    def _broadcast(self, calls: Dict[int, Tuple[str, tuple, dict]]) -> Dict[int, Any]:
+        """
+        Call shards in parallel, waiting for all; raises if any fails.
+        """
+        futures = self._scatter(calls, None)
+        return {shard: future.result() for shard, future in futures.items()}
+
+    def _failed(self, shard: int, method: str, reason: str, error: Any) -> None:
+        logger.warning("Shard %d left out of %s (%s): %r", shard, method, reason, error)
+        with self._lock:
+            self._failures[shard, reason] += 1
+
+    # ---------------------------------------------------------
+    # Training
+    # ---------------------------------------------------------
+    def train(self, sample: np.ndarray) -> None:
+        """
+        Train every shard's index on the same sample.
+        """
+        self._broadcast({shard: ("train", (sample,), {}) for shard in range(len(self._shards))})
+
+    def compact(self) -> None:
+        self._broadcast({shard: ("compact", (), {}) for shard in range(len(self._shards))})
+
+    # ---------------------------------------------------------
+    # Add / remove embeddings
+    # ---------------------------------------------------------
+    def add_embeddings(self, embeddings: np.ndarray, docs: List[str]) -> List[int]:
+        """
+        Add embeddings and their chunk texts, each to the shard its text
+        hashes to. Returns the global chunk ids assigned to `docs`, in order.
+
+        If any shard fails, the chunks other shards added are removed again
+        before the error is raised, so none of `docs` become searchable.
+        """
+        if len(embeddings) != len(docs):
+            raise ValueError("Number of embeddings must match number of documents.")
+
+        if embeddings.ndim != 2 or embeddings.shape[1] != self.dim:
+            raise ValueError(
+                f"Embeddings must have shape (n, {self.dim}). "
+                f"Got {embeddings.shape}."
+            )
+
+        rows: Dict[int, List[int]] = {}
+        for i, text in enumerate(docs):
+            rows.setdefault(self._route(text), []).append(i)
+
+        futures = self._scatter(
+            {
+                shard: ("add_embeddings", (embeddings[positions], [docs[i] for i in positions]), {})
+                for shard, positions in rows.items()
+            },
+            None,
+        )
+        wait(futures.values())
+
+        local_ids: Dict[int, List[int]] = {}
+        error: BaseException | None = None
+        for shard, future in futures.items():
+            try:
+                local_ids[shard] = future.result()
+            except Exception as e:
+                error = error or e
+        if error is not None:
+            self._undo_add(local_ids)
+            raise error
+
+        n = len(self._shards)
+        ids = [0] * len(docs)
+        for shard, positions in rows.items():
+            for i, local in zip(positions, local_ids[shard]):
+                ids[i] = local * n + shard
+        self._changed()
+        return ids
+
+    def remove_chunks(self, chunk_ids: Iterable[int]) -> int:
+        """
+        Remove live chunks from search results. Returns the number removed.
+        """
+        calls = {
+            shard: ("remove_chunks", (local,), {})
+            for shard, local in enumerate(self._split(chunk_ids))
+            if local
+        }
+        removed = sum(self._broadcast(calls).values())
+        if removed:
+            self._changed()
+        return removed
+
+    def _undo_add(self, local_ids: Dict[int, List[int]]) -> None:
+        """
+        Remove chunks just added to some shards, after another shard failed
+        the same add. A shard that cannot undo is logged and left as is.
+        """
+        calls = {shard: ("remove_chunks", (ids,), {}) for shard, ids in local_ids.items() if ids}
+        for shard, future in self._scatter(calls, None).items():
+            try:
+                future.result()
+            except Exception:
+                logger.exception("Shard %d could not roll back a failed add", shard)
+
+    def _changed(self) -> None:
+        with self._lock:
+            self.version += 1
+
+    # ---------------------------------------------------------
+    # Search
+    # ---------------------------------------------------------
+    def search(
+        self,
+        query_embedding: np.ndarray,
+        k: int = 5,
+        nprobe: int | None = None,
+        ef_search: int | None = None,
+        min_score: float | None = None,
+    ) -> List[SearchResult]:
+        """
+        Search every shard for the top-k most similar chunks, best first.
+        """
+        if query_embedding.ndim == 1:
+            query_embedding = query_embedding.reshape(1, -1)
+
+        return self.search_batch(
+            query_embedding, k, nprobe=nprobe, ef_search=ef_search, min_score=min_score
+        )[0]
+
+    def search_batch(
+        self,
+        query_embeddings: np.ndarray,
+        k: int = 5,
+        nprobe: int | None = None,
+        ef_search: int | None = None,
+        min_score: float | None = None,
+    ) -> List[List[SearchResult]]:
+        """
+        Search every shard for the top-k of each row of an (n, d) query
+        matrix, in parallel, and merge the per-shard results by score.
+        """
+        if query_embeddings.ndim != 2 or query_embeddings.shape[1] != self.dim:
+            raise ValueError(
+                f"Query embeddings must have shape (n, {self.dim}). "
+                f"Got {query_embeddings.shape}."
+            )
+
+        answers = self._gather(
+            "search_batch", query_embeddings, k, nprobe=nprobe, ef_search=ef_search, min_score=min_score
+        )
+        merged: List[List[SearchResult]] = [[] for _ in range(len(query_embeddings))]
+        for shard, rows in answers.items():
+            for row, results in zip(merged, rows):
+                row.extend(self._globalize(shard, results))
+        return [sorted(row, key=lambda r: r.score, reverse=True)[:k] for row in merged]
+
+    def search_lexical(self, query: str, k: int = 5) -> List[SearchResult]:
+        """
+        BM25 search on every shard, merged by score. Each shard scores with
+        its own term statistics, so the merge is approximate.
+        """
+        results: List[SearchResult] = []
+        for shard, rows in self._gather("search_lexical", query, k).items():
+            results.extend(self._globalize(shard, rows))
+        return sorted(results, key=lambda r: r.score, reverse=True)[:k]
+
+    def rebuild_lexical(self, chunk_ids: Iterable[int]) -> None:
+        """
+        Rebuild every shard's BM25 index from its live chunks.
+        """
+        calls = {
+            shard: ("rebuild_lexical", (local,), {})
+            for shard, local in enumerate(self._split(chunk_ids))
+        }
+        self._broadcast(calls)
+        self.lexical_stale = False
+        self._changed()
+
+    # ---------------------------------------------------------
+    # Persistence
+    # ---------------------------------------------------------
+    def save(self) -> None:
+        """
+        Have every shard persist itself, and record the shard count.
+        """
+        if self.index_path is None:
+            raise ValueError("No index_path configured for saving.")
+
+        self._broadcast({shard: ("save", (), {}) for shard in range(len(self._shards))})
+
+        os.makedirs(self.index_path, exist_ok=True)
+        manifest = os.path.join(self.index_path, self.MANIFEST_FILE)
+        with open(manifest + ".tmp", "w") as f:
+            json.dump({"shards": len(self._shards)}, f)
+        os.replace(manifest + ".tmp", manifest)
+
+    def load(self) -> bool:
+        """
+        Have every shard load its persisted state. Returns False if nothing
+        has been saved yet.
+
+        Chunk ids encode the shard count, so a store saved with a different
+        number of shards cannot be loaded.
+        """
+        if self.index_path is None:
+            return False
+
+        manifest = os.path.join(self.index_path, self.MANIFEST_FILE)
+        if not os.path.exists(manifest):
+            return False
+        with open(manifest) as f:
+            saved = json.load(f)["shards"]
+        if saved != len(self._shards):
+            raise ValueError(
+                f"Persisted store has {saved} shards, {len(self._shards)} configured. "
+                f"Re-ingest to change the shard count."
+            )
+
+        loaded = self._broadcast({shard: ("load", (), {}) for shard in range(len(self._shards))})
+        stale = self._broadcast({shard: ("lexical_stale", (), {}) for shard in range(len(self._shards))})
+        self.lexical_stale = any(stale.values())
+        self._changed()
+        return any(loaded.values())
+
+
+# ------------------------------------------------------------------
+# Standalone shard server
+# ------------------------------------------------------------------
+def main() -> None:
+    """
+    Serve one shard for `vector_store.shard_addresses` on another host,
+    built from the local settings file.
+    """
+    from utils import get_config, setup_logging
+
+    parser = argparse.ArgumentParser(description=main.__doc__)
+    parser.add_argument("--listen", required=True, help="host:port to accept connections on")
+    parser.add_argument("--index-path", required=True, help="directory this shard persists to")
+    args = parser.parse_args()
+    setup_logging()
+
+    config = get_config()
+    params = dict(config.get("vector_store") or {})
+    dim = params.pop("embedding_dim", 384)
+    for key in ("index_path", "shards", "shard_addresses", "shard_timeout", "shared", "reload_interval"):
+        params.pop(key, None)
+
+    store = SimpleVectorStore(
+        dim=dim,
+        index_path=args.index_path,
+        index_type=config.get("vector_store_type", "flat"),
+        lexical=(config.get("retrieval") or {}).get("hybrid", False),
+        **params,
+    )
+    if store.load():
+        logger.info("Loaded %d vectors from %s", store.ntotal, args.index_path)
+
+    serve_shard(Listener(parse_address(args.listen), authkey=_shard_authkey()), store)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,11 @@ import os
 import yaml
 import logging
 import re
-from typing import List, Dict, Any
+import signal
+import threading
+import unicodedata
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 from pathlib import Path
 
 # ------------------------------------------------------------------
@@ -60,20 +64,157 @@ def setup_logging(level: str = "INFO") -> None:
 # Text preprocessing
 # ------------------------------------------------------------------
 
+# Compatibility characters common in PDF text (ligatures, the non-breaking
+# and thin spaces of French typography). Replacing them up front lets most
+# text pass the NFKC check and skip the much slower full normalization.
+_COMPAT_CHARS = {
+    "\ufb00": "ff", "\ufb01": "fi", "\ufb02": "fl", "\ufb03": "ffi",
+    "\ufb04": "ffl", "\ufb05": "st", "\ufb06": "st",
+    "\u00a0": " ", "\u202f": " ", "\u2009": " ",
+}
+
+# The rest works on UTF-8 bytes. Multi-byte sequences only use bytes
+# >= 0x80, so byte-level translation never touches non-ASCII letters.
+
+# Line endings become "\n", tabs and ASCII separators spaces; other ASCII
+# control characters are deleted.
+_ASCII_TABLE = bytes.maketrans(b"\r\v\f\t\x1c\x1d\x1e\x1f", b"\n\n\n     ")
+_ASCII_DELETE = bytes(range(0x00, 0x09)) + bytes(range(0x0E, 0x1C)) + b"\x7f"
+
+# Non-ASCII line breaks and spaces NFKC leaves alone, and invisible
+# characters: C1 controls, soft hyphen, zero-width space, direction marks
+# and BOM. Zero-width (non-)joiners are kept, as they shape Arabic, Indic
+# and emoji text.
+_NON_ASCII_TABLE = {
+    "\x85": "\n", "\u2028": "\n", "\u2029": "\n\n", "\u1680": " ",
+    **dict.fromkeys(
+        [chr(c) for c in range(0x80, 0xA0) if c != 0x85]
+        + list("\u00ad\u061c\u180e\u200b\u200e\u200f\u202a\u202b\u202c\u202d\u202e")
+        + [chr(c) for c in range(0x2060, 0x2070) if c != 0x2065]
+        + list("\ufeff\ufff9\ufffa\ufffb"),
+        "",
+    ),
+}
+_NON_ASCII_TABLE = {k.encode("utf-8"): v.encode("utf-8") for k, v in _NON_ASCII_TABLE.items()}
+_NON_ASCII_RE = re.compile(b"|".join(re.escape(k) for k in _NON_ASCII_TABLE))
+
+# Every pattern below starts with a literal byte, so the regex engine skips
+# straight to candidate positions.
+_HYPHENATION_RE = re.compile(rb"-\n *(?=[A-Za-z\xc3-\xf4])")
+_PARAGRAPH_RE = re.compile(rb"\n *\n[ \n]*")
+_SPACES_RE = re.compile(rb"  +")
+_PARAGRAPH = b"\x00"  # marks a paragraph break until the final join; NUL is deleted from input
+
+# Where a stream buffer can be cut: after the last letter or digit that is
+# followed by whitespace (not after a hyphen, a combining mark or an
+# invisible character, which the next piece may still change).
+_STREAM_CUT_RE = re.compile(r".*\w(?=\s)", re.DOTALL)
+
+
+def _char_at(data: bytes, i: int) -> str:
+    """
+    The character whose UTF-8 encoding starts at byte i.
+    """
+    lead = data[i]
+    width = 1 if lead < 0xC0 else 2 if lead < 0xE0 else 3 if lead < 0xF0 else 4
+    return data[i : i + width].decode("utf-8", "replace")[:1]
+
+
+def _char_before(data: bytes, i: int) -> str:
+    """
+    The character whose UTF-8 encoding ends just before byte i.
+    """
+    start = i - 1
+    while start > 0 and i - start < 4 and 0x80 <= data[start] < 0xC0:
+        start -= 1
+    return data[start:i].decode("utf-8", "replace")[-1:]
+
+
+def _dehyphenate(match: "re.Match[bytes]") -> bytes:
+    # "exam-\nple" -> "example", but "Jean-\nPierre" -> "Jean-Pierre"
+    data, start, end = match.string, match.start(), match.end()
+    after = _char_at(data, end)
+    if start == 0 or not (_char_before(data, start).isalpha() and after.isalpha()):
+        return match.group()
+    return b"" if after.islower() else b"-"
+
+
+def _clean_utf8(text: str) -> bytes:
+    """
+    clean_text as UTF-8, with paragraph breaks still marked by
+    _PARAGRAPH and a separator (b" " or _PARAGRAPH) possibly left at
+    either end, so consecutive pieces of a stream can be cleaned apart.
+    """
+    if not text.isascii():
+        for char, replacement in _COMPAT_CHARS.items():
+            if char in text:
+                text = text.replace(char, replacement)
+        if not unicodedata.is_normalized("NFKC", text):
+            text = unicodedata.normalize("NFKC", text)
+
+    data = text.encode("utf-8", "surrogatepass")
+    if b"\r\n" in data:
+        data = data.replace(b"\r\n", b"\n")
+    data = data.translate(_ASCII_TABLE, _ASCII_DELETE)
+    if not text.isascii():
+        data = _NON_ASCII_RE.sub(lambda m: _NON_ASCII_TABLE[m.group()], data)
+
+    if b"-\n" in data:
+        data = _HYPHENATION_RE.sub(_dehyphenate, data)
+    data = _PARAGRAPH_RE.sub(_PARAGRAPH, data)
+    data = _SPACES_RE.sub(b" ", data.replace(b"\n", b" "))
+    return data.replace(b" " + _PARAGRAPH, _PARAGRAPH)
+
+
+def _decode(data: bytes) -> str:
+    return data.replace(_PARAGRAPH, b"\n\n").decode("utf-8", "surrogatepass")
+
+
 def clean_text(text: str) -> str:
     """
     Clean and normalize raw text.
+
+    Applies NFKC normalization (ligatures, full-width forms and non-breaking
+    spaces become their plain equivalents), drops control and zero-width
+    characters, and rejoins words hyphenated across PDF line breaks. Single
+    line breaks and runs of spaces collapse to one space; blank lines are
+    kept as a single paragraph break ("\n\n"). Non-ASCII letters are kept.
     """
     if not text:
         return ""
+    return _decode(_clean_utf8(text).strip(b" " + _PARAGRAPH))
 
-    # Normalize whitespace
-    text = re.sub(r"\s+", " ", text.strip())
 
-    # Remove non-printable characters
-    text = re.sub(r"[^\x20-\x7E\n]", "", text)
+def iter_clean_text(pieces: Iterable[str]) -> Iterator[str]:
+    """
+    Streaming clean_text: normalize text arriving in pieces (pages, reads
+    from a file) without holding all of it. The concatenated output equals
+    clean_text of the concatenated input.
 
-    return text
+    Each piece is cut after its last complete word; the rest waits for the
+    next piece, so hyphenated words and whitespace runs spanning pieces are
+    handled as if the text were whole.
+    """
+    pending = ""
+    started = False
+    for piece in pieces:
+        pending += piece
+        match = _STREAM_CUT_RE.match(pending)
+        if match is None:
+            continue
+        data = _clean_utf8(pending[: match.end()])
+        pending = pending[match.end():]
+        if not started:
+            data = data.lstrip(b" " + _PARAGRAPH)
+            started = bool(data)
+        if data:
+            yield _decode(data)
+
+    data = _clean_utf8(pending).rstrip(b" " + _PARAGRAPH)
+    if not started:
+        data = data.lstrip(b" " + _PARAGRAPH)
+    if data.strip(b" " + _PARAGRAPH):
+        yield _decode(data)
 
 
 def chunk_text(
@@ -130,9 +271,12 @@ def extract_text_from_file(file_path: str) -> str:
     """
     Extract text from a file.
 
-    Currently supports plain text files.
-    Can be extended to PDF, DOCX, etc.
+    Supports PDF (via pypdf) and plain text files.
+    Can be extended to DOCX, etc.
     """
+    if file_path.lower().endswith(".pdf"):
+        return extract_text_from_pdf(file_path)
+
     try:
         with open(file_path, "r", encoding="utf-8") as f:
             return f.read()
@@ -144,6 +288,90 @@ def extract_text_from_file(file_path: str) -> str:
         return ""
 
 
+def extract_text_from_pdf(file_path: str) -> str:
+    """
+    Extract text from every page of a PDF file.
+    """
+    try:
+        return "\n".join(text or "" for _, text in iter_pdf_pages(file_path))
+    except Exception as e:
+        logging.error(f"Failed to extract text from {file_path}: {e}")
+        return ""
+
+
+class PageTimeout(TimeoutError):
+    pass
+
+
+@contextmanager
+def _time_limit(seconds: Optional[float]):
+    """
+    Raise PageTimeout in the block after `seconds`. Uses SIGALRM, so it
+    only applies in a process's main thread (as in pool workers) on POSIX;
+    elsewhere the block runs unbounded.
+    """
+    if (
+        not seconds
+        or not hasattr(signal, "setitimer")
+        or threading.current_thread() is not threading.main_thread()
+    ):
+        yield
+        return
+
+    def on_alarm(signum, frame):
+        raise PageTimeout(f"no result after {seconds}s")
+
+    previous = signal.signal(signal.SIGALRM, on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def count_pdf_pages(file_path: str) -> int:
+    from pypdf import PdfReader
+
+    return len(PdfReader(file_path).pages)
+
+
+def iter_pdf_pages(
+    file_path: str,
+    first_page: int = 1,
+    last_page: Optional[int] = None,
+    page_timeout: Optional[float] = None,
+) -> Iterator[Tuple[int, Optional[str]]]:
+    """
+    Yield (page number, text) for each page of a PDF as it is extracted.
+
+    Parameters
+    ----------
+    file_path : str
+        Path to the PDF.
+    first_page, last_page : int, int | None
+        1-based, inclusive page range (defaults to the whole document).
+    page_timeout : float | None
+        Seconds allowed per page. A page that takes longer, or fails to
+        parse, is logged and yielded with text None, and extraction moves
+        on to the next page.
+    """
+    from pypdf import PdfReader  # imported by extraction workers only
+
+    reader = PdfReader(file_path)
+    total = len(reader.pages)
+    last_page = total if last_page is None else min(last_page, total)
+
+    for number in range(first_page, last_page + 1):
+        try:
+            with _time_limit(page_timeout):
+                text = reader.pages[number - 1].extract_text() or ""
+        except Exception as e:
+            logging.warning(f"Skipping page {number} of {file_path}: {e}")
+            text = None
+        yield number, text
+
+
 # ------------------------------------------------------------------
 # Error handling helpers
 # ------------------------------------------------------------------
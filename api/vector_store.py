@@ -1,17 +1,312 @@
 # api/vector_store.py
 
+import logging
+import os
+import threading
 import faiss
 import numpy as np
-from typing import List
+from typing import FrozenSet, Iterable, List, NamedTuple, Tuple
+
+from chunk_store import ChunkStore, VectorFile
+from lexical_index import BM25Index
+
+logger = logging.getLogger(__name__)
+
+
+class SearchResult(NamedTuple):
+    """
+    One retrieved chunk.
+    """
+
+    text: str
+    score: float  # cosine similarity to the query
+    chunk_id: int
+
+
+# ------------------------------------------------------------------
+# Index construction
+# ------------------------------------------------------------------
+INDEX_TYPES = ("flat", "flat_fp16", "flat_sq8", "flat_pq", "ivf_flat", "ivf_sq8", "ivf_pq", "hnsw")
+
+# Historical value of `vector_store_type` in settings.yaml
+INDEX_TYPE_ALIASES = {"faiss": "flat"}
+
+
+def build_index(
+    dim: int,
+    index_type: str = "flat",
+    nlist: int = 1024,
+    pq_m: int = 48,
+    pq_nbits: int = 8,
+    hnsw_m: int = 32,
+    ef_construction: int = 200,
+) -> faiss.Index:
+    """
+    Build an empty inner-product FAISS index of the requested type.
+
+    Every index accepts caller-assigned ids (`add_with_ids`): IVF indexes
+    natively, flat and HNSW indexes through an `IndexIDMap2` wrapper.
+
+    The `flat_*` variants are exhaustive like "flat" but store compressed
+    codes instead of float32 vectors: float16 (2x smaller), 8-bit scalar
+    quantization (4x) or product quantization (`dim * 4 / pq_m`x with
+    8-bit codes). Pair them with the store's `rerank` option to recover
+    exact scores for the top candidates.
+
+    Parameters
+    ----------
+    dim : int
+        Dimension of embedding vectors.
+    index_type : str
+        One of INDEX_TYPES.
+    nlist : int
+        Number of IVF cells (ivf_* only).
+    pq_m : int
+        Number of PQ sub-quantizers; must divide `dim` (*_pq only).
+    pq_nbits : int
+        Bits per PQ code (*_pq only).
+    hnsw_m : int
+        Graph degree (hnsw only).
+    ef_construction : int
+        Build-time search depth (hnsw only).
+    """
+    index_type = INDEX_TYPE_ALIASES.get(index_type, index_type)
+
+    if index_type == "flat":
+        return faiss.IndexIDMap2(faiss.IndexFlatIP(dim))
+
+    if index_type.endswith("_pq") and dim % pq_m != 0:
+        raise ValueError(f"pq_m ({pq_m}) must divide the embedding dimension ({dim}).")
+
+    if index_type == "flat_fp16":
+        return faiss.IndexIDMap2(
+            faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_fp16, faiss.METRIC_INNER_PRODUCT)
+        )
+
+    if index_type == "flat_sq8":
+        return faiss.IndexIDMap2(
+            faiss.IndexScalarQuantizer(dim, faiss.ScalarQuantizer.QT_8bit, faiss.METRIC_INNER_PRODUCT)
+        )
+
+    if index_type == "flat_pq":
+        return faiss.IndexIDMap2(faiss.IndexPQ(dim, pq_m, pq_nbits, faiss.METRIC_INNER_PRODUCT))
+
+    if index_type == "ivf_flat":
+        return faiss.index_factory(dim, f"IVF{nlist},Flat", faiss.METRIC_INNER_PRODUCT)
+
+    if index_type == "ivf_sq8":
+        return faiss.index_factory(dim, f"IVF{nlist},SQ8", faiss.METRIC_INNER_PRODUCT)
+
+    if index_type == "ivf_pq":
+        return faiss.index_factory(
+            dim, f"IVF{nlist},PQ{pq_m}x{pq_nbits}", faiss.METRIC_INNER_PRODUCT
+        )
+
+    if index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, hnsw_m, faiss.METRIC_INNER_PRODUCT)
+        index.hnsw.efConstruction = ef_construction
+        return faiss.IndexIDMap2(index)
+
+    raise ValueError(
+        f"Unknown index type '{index_type}'. Expected one of {INDEX_TYPES}."
+    )
+
+
+def base_index(index: faiss.Index) -> faiss.Index:
+    """
+    The index doing the actual search, unwrapped from any id map.
+    """
+    if isinstance(index, faiss.IndexIDMap):
+        return faiss.downcast_index(index.index)
+    return index
+
+
+def _search_params(
+    index: faiss.Index,
+    nprobe: int | None = None,
+    ef_search: int | None = None,
+    selector: faiss.IDSelector | None = None,
+) -> faiss.SearchParameters | None:
+    """
+    Per-query search parameters for the given index, or None for defaults.
+    """
+    base = base_index(index)
+
+    if isinstance(base, faiss.IndexIVF):
+        if nprobe is None and selector is None:
+            return None
+        return faiss.SearchParametersIVF(nprobe=nprobe or base.nprobe, sel=selector)
+
+    if isinstance(base, faiss.IndexHNSW):
+        if ef_search is None and selector is None:
+            return None
+        return faiss.SearchParametersHNSW(efSearch=ef_search or base.hnsw.efSearch, sel=selector)
+
+    if selector is not None:
+        return faiss.SearchParameters(sel=selector)
+
+    return None
+
+
+def _supports_selector(index: faiss.Index) -> bool:
+    """
+    Whether searches of this index can exclude ids with an IDSelector
+    (IndexPQ rejects search parameters).
+    """
+    return not isinstance(base_index(index), faiss.IndexPQ)
+
+
+def _copy_index(index: faiss.Index, mapped: bool = False) -> faiss.Index:
+    """
+    A modifiable copy of an index. A memory-mapped index (and its clones)
+    only views its file, so it is copied through a serialized buffer.
+    """
+    if mapped:
+        return faiss.deserialize_index(faiss.serialize_index(index))
+    return faiss.clone_index(index)
+
+
+def _is_removable(index: faiss.Index) -> bool:
+    """
+    Whether vectors can be dropped from this index (HNSW graphs cannot).
+    """
+    return not isinstance(base_index(index), faiss.IndexHNSW)
+
+
+def _rebuild_without(index: faiss.Index, deleted: FrozenSet[int]) -> None:
+    """
+    Empty `index` (an id-mapped HNSW graph) and add back every vector not
+    in `deleted`, for indexes that cannot remove vectors in place.
+    """
+    ids = faiss.vector_to_array(index.id_map)
+    vectors = base_index(index).reconstruct_n(0, index.ntotal)
+    keep = ~np.isin(ids, np.fromiter(deleted, dtype="int64", count=len(deleted)))
+    index.reset()
+    if keep.any():
+        index.add_with_ids(vectors[keep], ids[keep])
+
+
+class _Segment(NamedTuple):
+    """
+    Chunks added since the last compaction, searched exactly. Never
+    modified once published: a removal publishes a copy with a new mask.
+    """
+
+    ids: np.ndarray  # int64 chunk ids
+    vectors: np.ndarray  # (n, dim) normalized float32
+    live: np.ndarray | None = None  # searchable rows, None when all are
+
+    @property
+    def size(self) -> int:
+        return len(self.ids) if self.live is None else int(self.live.sum())
+
+    def live_rows(self) -> Tuple[np.ndarray, np.ndarray]:
+        if self.live is None:
+            return self.ids, self.vectors
+        return self.ids[self.live], self.vectors[self.live]
+
+
+class _Snapshot(NamedTuple):
+    """
+    Immutable view of everything searchable. A query reads the current
+    snapshot once and searches only it; writers publish a new one.
+    """
+
+    index: faiss.Index
+    segments: Tuple[_Segment, ...]
+    deleted: FrozenSet[int]  # ids tombstoned in `index`
+    selector: faiss.IDSelector | None  # excludes `deleted` from index searches
+    ntotal: int
+
+
+def _make_snapshot(index: faiss.Index, segments: Tuple[_Segment, ...], deleted: FrozenSet[int]) -> _Snapshot:
+    selector = None
+    if deleted:
+        batch = faiss.IDSelectorBatch(np.fromiter(deleted, dtype="int64", count=len(deleted)))
+        selector = faiss.IDSelectorNot(batch)
+        # Keep the batch alive as long as the selector that references it
+        selector.referenced_batch = batch
+    ntotal = index.ntotal - len(deleted) + sum(segment.size for segment in segments)
+    return _Snapshot(index, segments, deleted, selector, ntotal)
+
+
+def _concat_segments(segments: Iterable[_Segment], dim: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Live ids and vectors of several segments as single arrays.
+    """
+    rows = [segment.live_rows() for segment in segments]
+    if not rows:
+        return np.empty(0, dtype="int64"), np.empty((0, dim), dtype="float32")
+    if len(rows) == 1:
+        return rows[0]
+    return np.concatenate([ids for ids, _ in rows]), np.vstack([vectors for _, vectors in rows])
 
 
 class SimpleVectorStore:
     """
-    Simple in-memory FAISS-based vector store.
-    Stores embeddings and their corresponding documents.
+    Simple FAISS-based vector store.
+    Stores embeddings and their corresponding documents, and can persist
+    both to `index_path` so restarts don't require re-embedding.
+
+    Every chunk gets a stable integer id (its position in the chunk store)
+    that is also its FAISS id, so chunks can be removed without rebuilding.
+
+    Searchable state is an immutable snapshot: the FAISS index, a few small
+    staging segments of recently added vectors (searched exactly) and a set
+    of tombstoned ids. Writers build a new segment (or a copy of the last
+    one, while it is small), or a new tombstone set, and publish a new
+    snapshot with a single attribute assignment; queries
+    read the snapshot once and never take a lock, so an ingestion in
+    progress does not block or disturb them. A background compaction
+    merges staging segments into a copy of the index (and drops tombstoned
+    vectors from it) once they exceed `merge_rows` or `merge_ratio` of the
+    index, or there are more than `max_segments`, then publishes that copy.
+    The copy briefly doubles the index's memory. HNSW graphs cannot drop
+    vectors, so they are rebuilt from their live vectors instead, once
+    tombstones reach `merge_ratio` of the index.
+
+    Approximate indexes (IVF, HNSW) and compressed ones (fp16, SQ8, PQ)
+    can be selected with `index_type`. IVF and quantized indexes need
+    training: vectors stay in the (exact) staging segments until
+    `train_size` of them are available, then compaction trains the index
+    on a sample and moves them into it.
+
+    With `rerank` set, full-precision vectors are also kept in an
+    append-only file that is memory-mapped once saved, and the top
+    `k * rerank` candidates from a compressed index are re-scored exactly
+    against them, so the index can be small without losing ranking quality.
+
+    With `lexical` set, a BM25 inverted index over the same chunk texts is
+    maintained alongside the vectors for exact-term search
+    (`search_lexical`).
+
+    With `mmap` set, `load` memory-maps the index file instead of reading
+    it, so worker processes loading the same directory share one copy in
+    the page cache, as they already do for chunk texts and rerank vectors.
+    A mapped index is never modified: compaction works on a private copy
+    until the next save and load map it again.
     """
 
-    def __init__(self, dim: int, index_path: str | None = None):
+    INDEX_FILE = "index.faiss"
+    SEGMENTS_FILE = "segments.npz"
+    DELETED_FILE = "deleted.npy"
+
+    def __init__(
+        self,
+        dim: int,
+        index_path: str | None = None,
+        index_type: str = "flat",
+        train_size: int | None = None,
+        nprobe: int = 16,
+        ef_search: int = 64,
+        rerank: int = 0,
+        lexical: bool = False,
+        max_segments: int = 8,
+        merge_rows: int = 10_000,
+        merge_ratio: float = 0.05,
+        mmap: bool = False,
+        **index_params,
+    ):
         """
         Initialize the vector store.
 
@@ -20,22 +315,131 @@ class SimpleVectorStore:
         dim : int
             Dimension of embedding vectors.
         index_path : str | None
-            Optional path for future persistence.
+            Optional directory used by `save` / `load`.
+        index_type : str
+            FAISS index type, see `build_index`.
+        train_size : int | None
+            Vectors to collect before training an IVF or quantized index
+            (defaults to 39 points per IVF cell or PQ centroid).
+        nprobe : int
+            Default number of IVF cells visited per query.
+        ef_search : int
+            Default HNSW search depth.
+        rerank : int
+            If > 0, keep float32 vectors on disk and re-score the top
+            `k * rerank` candidates of each search exactly. 0 disables it.
+        lexical : bool
+            Maintain a BM25 index of the chunk texts.
+        max_segments : int
+            Staging segments allowed before compaction merges them.
+        merge_rows : int
+            Staged vectors that trigger compaction into the index.
+        merge_ratio : float
+            Compaction also starts once staged vectors (or tombstones)
+            reach this fraction of the index, so large indexes are copied
+            proportionally less often. HNSW graphs are rebuilt once their
+            tombstones do.
+        mmap : bool
+            Memory-map the index file on `load` instead of reading it.
+        **index_params
+            Extra arguments forwarded to `build_index`.
         """
         self.dim = dim
 
         # Use inner product for cosine similarity (with normalized vectors)
-        self.index = faiss.IndexFlatIP(dim)
+        index = build_index(dim, index_type, **index_params)
+        self.index_type = INDEX_TYPE_ALIASES.get(index_type, index_type)
+        self.train_size = train_size or self._default_train_size(index_params)
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        self._apply_search_defaults(index)
+
+        self.max_segments = max_segments
+        self.merge_rows = merge_rows
+        self.merge_ratio = merge_ratio
+        self.mmap = mmap
+        self._mapped: faiss.Index | None = None  # the loaded index, if memory-mapped
 
-        self.documents: List[str] = []
+        self.documents = ChunkStore()
+        self.rerank = rerank
+        self.vectors: VectorFile | None = VectorFile(dim) if rerank > 0 else None
+        self.lexical: BM25Index | None = BM25Index() if lexical else None
+        # Set by `load` when the persisted store has no usable BM25 index
+        self.lexical_stale = False
         self.index_path = index_path
+        # Bumped whenever search results may change; caches of results
+        # derived from the store compare it
+        self.version = 0
+
+        self._snapshot = _make_snapshot(index, (), frozenset())
+        self._write_lock = threading.Lock()  # writers only; readers never block
+        self._compact_lock = threading.Lock()  # one compaction (or removal) at a time
+        self._compacting = False  # a background compaction thread is running
+        self._frozen = 0  # leading segments being compacted, not to be replaced
+
+    @property
+    def index(self) -> faiss.Index:
+        """
+        FAISS index of the current snapshot (staged vectors excluded).
+        """
+        return self._snapshot.index
+
+    @property
+    def ntotal(self) -> int:
+        """
+        Number of live vectors, including staged ones.
+        """
+        return self._snapshot.ntotal
+
+    @property
+    def segments(self) -> int:
+        """
+        Number of staging segments in the current snapshot.
+        """
+        return len(self._snapshot.segments)
 
     # ---------------------------------------------------------
-    # Add embeddings
+    # Training
     # ---------------------------------------------------------
-    def add_embeddings(self, embeddings: np.ndarray, docs: List[str]) -> None:
+    def _default_train_size(self, index_params: dict) -> int:
+        if self.index_type == "flat_sq8":
+            return 1000  # only per-dimension value ranges are learned
+        # FAISS wants ~39 points per centroid: IVF cells, and PQ codebook entries
+        centroids = index_params.get("nlist", 1024) if self.index_type.startswith("ivf") else 0
+        if self.index_type.endswith("_pq"):
+            centroids = max(centroids, 2 ** index_params.get("pq_nbits", 8))
+        return 39 * centroids
+
+    def train(self, sample: np.ndarray) -> None:
+        """
+        Train the index on a representative sample of embeddings and move
+        any staged vectors into it. No-op for indexes that need no training.
+        """
+        if self.index.is_trained:
+            return
+
+        sample = np.array(sample, dtype="float32")
+        faiss.normalize_L2(sample)
+        with self._compact_lock:
+            self._compact(self._begin_compaction(), sample)
+
+    def _apply_search_defaults(self, index: faiss.Index) -> None:
+        base = base_index(index)
+        if isinstance(base, faiss.IndexIVF):
+            base.nprobe = self.nprobe
+        elif isinstance(base, faiss.IndexHNSW):
+            base.hnsw.efSearch = self.ef_search
+
+    # ---------------------------------------------------------
+    # Add / remove embeddings
+    # ---------------------------------------------------------
+    def add_embeddings(self, embeddings: np.ndarray, docs: List[str]) -> List[int]:
         """
         Add embeddings and corresponding documents to the index.
+
+        The vectors are published as a new staging segment, searchable as
+        soon as this returns. Returns the chunk ids assigned to `docs`, in
+        order.
         """
         if len(embeddings) != len(docs):
             raise ValueError("Number of embeddings must match number of documents.")
@@ -46,42 +450,470 @@ class SimpleVectorStore:
                 f"Got {embeddings.shape}."
             )
 
-        # Ensure embeddings are float32
+        # A float32 copy the segment owns
         embeddings = embeddings.astype("float32")
 
         # Normalize for cosine similarity
         faiss.normalize_L2(embeddings)
 
-        self.index.add(embeddings)
-        self.documents.extend(docs)
+        with self._write_lock:
+            start = len(self.documents)
+            ids = np.arange(start, start + len(docs), dtype="int64")
+
+            # Texts first: a published id always has its chunk
+            self.documents.extend(docs)
+            if self.vectors is not None:
+                self.vectors.extend(embeddings)
+            if self.lexical is not None:
+                self.lexical.add(ids.tolist(), docs)
+
+            snapshot = self._snapshot
+            segments = snapshot.segments
+            segment = _Segment(ids, embeddings)
+            # Small batches go into a copy of the last segment, so the
+            # segment count tracks staged rows rather than add calls
+            if len(segments) > self._frozen:
+                last = segments[-1]
+                if len(last.ids) + len(ids) <= max(self.merge_rows // self.max_segments, 1):
+                    segment = _Segment(*_concat_segments((last, segment), self.dim))
+                    segments = segments[:-1]
+            self._snapshot = _make_snapshot(snapshot.index, segments + (segment,), snapshot.deleted)
+            self.version += 1
+            self._schedule_compaction()
+
+        return ids.tolist()
+
+    def remove_chunks(self, chunk_ids: Iterable[int]) -> int:
+        """
+        Remove live chunks from search results. Returns the number removed.
+
+        Chunk texts stay in the append-only chunk store. Staged vectors are
+        masked out; vectors in the index are tombstoned and dropped at the
+        next compaction. Waits for a running compaction to finish.
+        """
+        ids = np.fromiter(chunk_ids, dtype="int64")
+        if len(ids) == 0:
+            return 0
+
+        if self.lexical is not None:
+            self.lexical.remove(ids.tolist())
+
+        with self._compact_lock, self._write_lock:
+            snapshot = self._snapshot
+            removed = 0
+            staged = np.zeros(len(ids), dtype=bool)
+            segments = []
+            for segment in snapshot.segments:
+                hit = np.isin(segment.ids, ids)
+                staged |= np.isin(ids, segment.ids)
+                if segment.live is not None:
+                    hit &= segment.live
+                if hit.any():
+                    live = ~hit if segment.live is None else segment.live & ~hit
+                    segment = segment._replace(live=live)
+                    removed += int(hit.sum())
+                segments.append(segment)
+
+            indexed = {
+                int(i) for i in ids[~staged] if 0 <= i < len(self.documents)
+            } - snapshot.deleted
+            removed += len(indexed)
+
+            self._snapshot = _make_snapshot(snapshot.index, tuple(segments), snapshot.deleted | indexed)
+            self.version += 1
+            self._schedule_compaction()
+
+        return removed
 
     # ---------------------------------------------------------
-    # Search
+    # Compaction
     # ---------------------------------------------------------
-    def search(self, query_embedding: np.ndarray, k: int = 5) -> List[str]:
+    def compact(self) -> None:
         """
-        Search for top-k most similar documents.
+        Move every staged vector into the index now (training it first if
+        enough are staged) and drop tombstoned vectors where the index
+        allows it, or where an HNSW graph is due for a rebuild. Normally
+        left to the background compaction.
         """
-        if self.index.ntotal == 0:
-            return []
+        with self._compact_lock:
+            snapshot = self._begin_compaction()
+            if (
+                snapshot.segments
+                or (snapshot.deleted and _is_removable(snapshot.index))
+                or self._needs_rebuild(snapshot)
+            ):
+                self._compact(snapshot)
+
+    def _needs_compaction(self, snapshot: _Snapshot) -> bool:
+        if len(snapshot.segments) > self.max_segments:
+            return True
+
+        staged = sum(len(segment.ids) for segment in snapshot.segments)
+        index = snapshot.index
+        if not index.is_trained:
+            return staged >= self.train_size
 
+        threshold = self.merge_ratio * index.ntotal
+        if staged >= max(self.merge_rows, threshold):
+            return True
+        return bool(snapshot.deleted) and len(snapshot.deleted) >= threshold
+
+    def _needs_rebuild(self, snapshot: _Snapshot) -> bool:
+        """
+        Whether the index is an HNSW graph holding enough tombstones to be
+        rebuilt without them.
+        """
+        index = snapshot.index
+        return (
+            bool(snapshot.deleted)
+            and not _is_removable(index)
+            and len(snapshot.deleted) >= self.merge_ratio * index.ntotal
+        )
+
+    def _schedule_compaction(self) -> None:
+        # Called with the write lock held
+        if self._compacting or not self._needs_compaction(self._snapshot):
+            return
+        self._compacting = True
+        threading.Thread(target=self._compact_in_background, name="vector-compaction", daemon=True).start()
+
+    def _compact_in_background(self) -> None:
+        try:
+            while True:
+                with self._compact_lock:
+                    with self._write_lock:
+                        if not self._needs_compaction(self._snapshot):
+                            self._compacting = False
+                            return
+                    self._compact(self._begin_compaction())
+        except Exception:
+            logger.exception("Vector store compaction failed")
+            with self._write_lock:
+                self._compacting = False
+
+    def _begin_compaction(self) -> _Snapshot:
+        """
+        The snapshot to compact, its segments frozen until `_compact`
+        publishes the result. Called with the compaction lock held.
+        """
+        with self._write_lock:
+            snapshot = self._snapshot
+            self._frozen = len(snapshot.segments)
+            return snapshot
+
+    def _compact(self, snapshot: _Snapshot, sample: np.ndarray | None = None) -> None:
+        """
+        Merge the segments of `snapshot` and publish the result. Called with
+        the compaction lock held and the segments frozen, so only segments
+        appended since can change meanwhile; they are carried over to the
+        new snapshot.
+        """
+        try:
+            self._merge(snapshot, sample)
+        finally:
+            self._frozen = 0
+
+    def _merge(self, snapshot: _Snapshot, sample: np.ndarray | None) -> None:
+        merged = len(snapshot.segments)
+        ids, vectors = _concat_segments(snapshot.segments, self.dim)
+        index = snapshot.index
+        dropped: FrozenSet[int] = frozenset()
+
+        if index.is_trained or sample is not None or len(ids) >= self.train_size:
+            # The published index is never modified: work on a copy
+            index = _copy_index(index, mapped=index is self._mapped)
+            if not index.is_trained:
+                if sample is None:
+                    rng = np.random.default_rng(0)
+                    sample = vectors[np.sort(rng.choice(len(vectors), size=self.train_size, replace=False))]
+                index.train(sample)
+            if snapshot.deleted and _is_removable(index):
+                deleted = np.fromiter(snapshot.deleted, dtype="int64", count=len(snapshot.deleted))
+                index.remove_ids(faiss.IDSelectorBatch(deleted))
+                dropped = snapshot.deleted
+            elif self._needs_rebuild(snapshot):
+                _rebuild_without(index, snapshot.deleted)
+                dropped = snapshot.deleted
+            if len(ids):
+                index.add_with_ids(vectors, ids)
+            self._apply_search_defaults(index)
+            segments: Tuple[_Segment, ...] = ()
+        else:
+            # Untrained: keep staging, as one exact segment
+            segments = (_Segment(ids, vectors),)
+
+        with self._write_lock:
+            current = self._snapshot
+            self._snapshot = _make_snapshot(
+                index, segments + current.segments[merged:], current.deleted - dropped
+            )
+
+    # ---------------------------------------------------------
+    # Search
+    # ---------------------------------------------------------
+    def search(
+        self,
+        query_embedding: np.ndarray,
+        k: int = 5,
+        nprobe: int | None = None,
+        ef_search: int | None = None,
+        min_score: float | None = None,
+    ) -> List[SearchResult]:
+        """
+        Search for top-k most similar documents, best first.
+
+        `nprobe` (IVF) and `ef_search` (HNSW) override the store defaults
+        for this query only. Results scoring below `min_score` are dropped.
+        """
         if query_embedding.ndim == 1:
             query_embedding = query_embedding.reshape(1, -1)
 
-        if query_embedding.shape[1] != self.dim:
+        return self.search_batch(
+            query_embedding, k, nprobe=nprobe, ef_search=ef_search, min_score=min_score
+        )[0]
+
+    def search_batch(
+        self,
+        query_embeddings: np.ndarray,
+        k: int = 5,
+        nprobe: int | None = None,
+        ef_search: int | None = None,
+        min_score: float | None = None,
+    ) -> List[List[SearchResult]]:
+        """
+        Search for the top-k documents of every row of an (n, d) query matrix
+        in a single FAISS call, plus one matrix product per staging segment.
+
+        Returns one best-first result list per query.
+        """
+        if query_embeddings.ndim != 2 or query_embeddings.shape[1] != self.dim:
             raise ValueError(
-                f"Query embedding dimension mismatch. "
-                f"Expected {self.dim}, got {query_embedding.shape[1]}."
+                f"Query embeddings must have shape (n, {self.dim}). "
+                f"Got {query_embeddings.shape}."
             )
 
-        query_embedding = query_embedding.astype("float32")
-        faiss.normalize_L2(query_embedding)
+        n = len(query_embeddings)
+        snapshot = self._snapshot
+        if snapshot.ntotal == 0:
+            return [[] for _ in range(n)]
 
-        distances, indices = self.index.search(query_embedding, k)
+        query_embeddings = query_embeddings.astype("float32")
+        faiss.normalize_L2(query_embeddings)
 
-        results: List[str] = []
-        for idx in indices[0]:
-            if 0 <= idx < len(self.documents):
-                results.append(self.documents[idx])
+        parts = [self._search_segment(segment, query_embeddings, k) for segment in snapshot.segments]
+        if snapshot.index.ntotal > 0:
+            parts.append(self._search_index(snapshot, query_embeddings, k, nprobe, ef_search))
+
+        distances = np.hstack([d for d, _ in parts])
+        indices = np.hstack([i for _, i in parts])
+        if len(parts) > 1:
+            top = np.argsort(-distances, axis=1, kind="stable")[:, :k]
+            distances = np.take_along_axis(distances, top, axis=1)
+            indices = np.take_along_axis(indices, top, axis=1)
+
+        results: List[List[SearchResult]] = []
+        for row_distances, row_indices in zip(distances, indices):
+            row: List[SearchResult] = []
+            for score, idx in zip(row_distances, row_indices):
+                if min_score is not None and score < min_score:
+                    break  # scores are in descending order
+                if 0 <= idx < len(self.documents):
+                    row.append(SearchResult(self.documents[idx], float(score), int(idx)))
+            results.append(row)
 
         return results
+
+    def _search_index(
+        self,
+        snapshot: _Snapshot,
+        queries: np.ndarray,
+        k: int,
+        nprobe: int | None,
+        ef_search: int | None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        index = snapshot.index
+        fetch = k * self.rerank if self.vectors is not None else k
+
+        filtered = snapshot.selector is not None and not _supports_selector(index)
+        selector = None if filtered else snapshot.selector
+        if filtered:
+            fetch += len(snapshot.deleted)
+
+        params = _search_params(index, nprobe, ef_search, selector)
+        distances, indices = index.search(queries, fetch, params=params)
+
+        if filtered:
+            deleted = np.fromiter(snapshot.deleted, dtype="int64", count=len(snapshot.deleted))
+            gone = np.isin(indices, deleted)
+            indices[gone], distances[gone] = -1, -np.inf
+            top = np.argsort(-distances, axis=1, kind="stable")[:, : fetch - len(deleted)]
+            distances = np.take_along_axis(distances, top, axis=1)
+            indices = np.take_along_axis(indices, top, axis=1)
+
+        if self.vectors is not None:
+            distances, indices = self._rerank(queries, indices, k)
+        return distances, indices
+
+    @staticmethod
+    def _search_segment(segment: _Segment, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Exact search of a staging segment; masked rows come back as -1.
+        """
+        scores = queries @ segment.vectors.T
+        if segment.live is not None:
+            scores[:, ~segment.live] = -np.inf
+        k = min(k, scores.shape[1])
+        top = np.argsort(-scores, axis=1)[:, :k]
+        scores = np.take_along_axis(scores, top, axis=1)
+        return scores, np.where(np.isneginf(scores), -1, segment.ids[top])
+
+    def search_lexical(self, query: str, k: int = 5) -> List[SearchResult]:
+        """
+        BM25 search over chunk texts, best first. Scores are BM25 scores,
+        not cosine similarities. Empty if the lexical index is disabled.
+        """
+        if self.lexical is None:
+            return []
+        return [
+            SearchResult(self.documents[cid], score, cid)
+            for cid, score in self.lexical.search(query, k)
+        ]
+
+    def rebuild_lexical(self, chunk_ids: Iterable[int]) -> None:
+        """
+        Rebuild the BM25 index from the stored texts of the given live chunks.
+        """
+        lexical = BM25Index()
+        ids = sorted(chunk_ids)
+        lexical.add(ids, (self.documents[cid] for cid in ids))
+        self.lexical = lexical
+        self.lexical_stale = False
+        self.version += 1
+
+    def _rerank(self, queries: np.ndarray, candidates: np.ndarray, k: int):
+        """
+        Exact inner products between each query and its candidate ids,
+        keeping the best k. Missing candidates (-1) sort last.
+        """
+        n, fetch = candidates.shape
+        valid = candidates >= 0
+        vectors = self.vectors.take(candidates[valid])
+
+        scores = np.full((n, fetch), -np.inf, dtype="float32")
+        rows = np.nonzero(valid)[0]
+        scores[valid] = np.einsum("ij,ij->i", vectors, queries[rows])
+
+        top = np.argsort(-scores, axis=1)[:, :k]
+        return np.take_along_axis(scores, top, axis=1), np.take_along_axis(candidates, top, axis=1)
+
+    # ---------------------------------------------------------
+    # Persistence
+    # ---------------------------------------------------------
+    def save(self, index_path: str | None = None) -> None:
+        """
+        Persist the FAISS index, staging segments and chunk store to disk.
+        Writers wait until it is done; readers are not affected.
+        """
+        index_path = index_path or self.index_path
+        if index_path is None:
+            raise ValueError("No index_path configured for saving.")
+
+        os.makedirs(index_path, exist_ok=True)
+
+        with self._write_lock:
+            snapshot = self._snapshot
+
+            # Chunks first: an index never references chunks missing on disk
+            self.documents.save(index_path)
+            if self.vectors is not None:
+                self.vectors.save(index_path)
+            if self.lexical is not None:
+                self.lexical.save(index_path)
+
+            segments_file = os.path.join(index_path, self.SEGMENTS_FILE)
+            if snapshot.segments:
+                ids, vectors = _concat_segments(snapshot.segments, self.dim)
+                with open(segments_file + ".tmp", "wb") as f:
+                    np.savez(f, ids=ids, vectors=vectors)
+                os.replace(segments_file + ".tmp", segments_file)
+            elif os.path.exists(segments_file):
+                os.remove(segments_file)
+
+            deleted_file = os.path.join(index_path, self.DELETED_FILE)
+            with open(deleted_file + ".tmp", "wb") as f:
+                np.save(f, np.fromiter(snapshot.deleted, dtype="int64"))
+            os.replace(deleted_file + ".tmp", deleted_file)
+
+            index_file = os.path.join(index_path, self.INDEX_FILE)
+            tmp_file = index_file + ".tmp"
+            faiss.write_index(snapshot.index, tmp_file)
+            os.replace(tmp_file, index_file)
+
+    def load(self, index_path: str | None = None) -> bool:
+        """
+        Load a persisted index and memory-map its chunk store.
+        Returns False if nothing has been saved yet.
+
+        The persisted index keeps its own type, even if the configured
+        `index_type` has changed since it was built.
+        """
+        index_path = index_path or self.index_path
+        if index_path is None:
+            return False
+
+        index_file = os.path.join(index_path, self.INDEX_FILE)
+        if not os.path.exists(index_file):
+            return False
+
+        flags = faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY if self.mmap else 0
+        index = faiss.read_index(index_file, flags)
+        if index.d != self.dim:
+            raise ValueError(
+                f"Persisted index dimension mismatch. "
+                f"Expected {self.dim}, got {index.d}."
+            )
+
+        segments: Tuple[_Segment, ...] = ()
+        segments_file = os.path.join(index_path, self.SEGMENTS_FILE)
+        if os.path.exists(segments_file):
+            with np.load(segments_file) as data:
+                segments = (_Segment(data["ids"], data["vectors"]),)
+
+        deleted: FrozenSet[int] = frozenset()
+        deleted_file = os.path.join(index_path, self.DELETED_FILE)
+        if os.path.exists(deleted_file):
+            deleted = frozenset(np.load(deleted_file).tolist())
+
+        documents = ChunkStore()
+        if not documents.load(index_path):
+            raise ValueError(f"Chunk store missing from {index_path}.")
+
+        vectors = None
+        if self.rerank > 0:
+            vectors = VectorFile(self.dim)
+            if not vectors.load(index_path, len(documents)):
+                logger.warning(
+                    "Re-ranking disabled: %s has no full-precision vectors for all chunks "
+                    "(the index was built without `rerank`). Re-ingest to enable it.",
+                    index_path,
+                )
+                vectors = None
+
+        lexical, lexical_stale = None, False
+        if self.lexical is not None:
+            lexical = BM25Index()
+            lexical_stale = not lexical.load(index_path, len(documents))
+
+        self._apply_search_defaults(index)
+        with self._compact_lock, self._write_lock:
+            self.documents = documents
+            self.vectors = vectors
+            self.lexical = lexical
+            self.lexical_stale = lexical_stale
+            self._mapped = index if self.mmap else None
+            self._snapshot = _make_snapshot(index, segments, deleted)
+            self.version += 1
+            if not self.mmap:
+                # A mapped index is compacted by whoever writes it next
+                self._schedule_compaction()
+        return True
@@ -0,0 +1,115 @@
+# benchmarks/ann_benchmark.py
+# -------------------- recall vs latency of SimpleVectorStore index types -------------------- #
+#
+# Usage (from the repository root):
+#   python benchmarks/ann_benchmark.py --n 200000 --queries 500 --json ann.json
+#
+# Builds every index type on the same synthetic corpus, uses the flat index
+# as ground truth and reports recall@k, per-query latency and index bytes per
+# vector for a sweep of nprobe / efSearch / rerank values.
+
+import argparse
+import json
+import os
+import sys
+import time
+import faiss
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api"))
+
+from vector_store import SimpleVectorStore  # noqa: E402
+
+
+def make_corpus(n: int, dim: int, n_clusters: int = 256, seed: int = 0) -> np.ndarray:
+    """
+    Clustered unit vectors; uniform random vectors would make every ANN
+    index look worse than it does on real embeddings.
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((n_clusters, dim)).astype("float32")
+    labels = rng.integers(0, n_clusters, size=n)
+    data = centers[labels] + 1.5 * rng.standard_normal((n, dim)).astype("float32")
+    data /= np.linalg.norm(data, axis=1, keepdims=True)
+    return data
+
+
+def build_store(index_type: str, corpus: np.ndarray, **params) -> tuple:
+    store = SimpleVectorStore(dim=corpus.shape[1], index_type=index_type, **params)
+    start = time.perf_counter()
+    if not store.index.is_trained:
+        store.train(corpus[: store.train_size])
+    batch = 10_000
+    for i in range(0, len(corpus), batch):
+        rows = corpus[i : i + batch]
+        store.add_embeddings(rows, [str(j) for j in range(i, i + len(rows))])
+    store.compact()
+    return store, time.perf_counter() - start
+
+
+def run_queries(store: SimpleVectorStore, queries: np.ndarray, k: int, **search_params):
+    ids, latencies = [], []
+    for q in queries:
+        start = time.perf_counter()
+        results = store.search(q, k=k, **search_params)
+        latencies.append((time.perf_counter() - start) * 1000)
+        ids.append([r.chunk_id for r in results])
+    return ids, np.array(latencies)
+
+
+def recall_at_k(found, truth) -> float:
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+    return hits / sum(len(t) for t in truth)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n", type=int, default=100_000, help="corpus size")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=1024)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    corpus = make_corpus(args.n + args.queries, args.dim)
+    corpus, queries = corpus[: args.n], corpus[args.n :]
+
+    configs = [("flat", {}, [{}])]
+    configs.append(("ivf_flat", {"nlist": args.nlist}, [{"nprobe": p} for p in (1, 4, 16, 64)]))
+    configs.append(("ivf_pq", {"nlist": args.nlist, "pq_m": 48}, [{"nprobe": p} for p in (4, 16, 64)]))
+    configs.append(("hnsw", {"hnsw_m": 32}, [{"ef_search": e} for e in (16, 32, 64, 128)]))
+    # Compressed exhaustive indexes, without and with exact re-ranking
+    for index_type in ("flat_fp16", "flat_sq8", "flat_pq"):
+        for rerank in (0, 4):
+            configs.append((index_type, {"pq_m": 48, "rerank": rerank}, [{}]))
+
+    truth = None
+    rows = []
+    for index_type, build_params, sweep in configs:
+        store, build_s = build_store(index_type, corpus, **build_params)
+        bytes_per_vector = faiss.serialize_index(store.index).nbytes / args.n
+        for search_params in sweep:
+            found, latencies = run_queries(store, queries, args.k, **search_params)
+            if truth is None:
+                truth = found
+            rows.append({
+                "index_type": index_type,
+                **build_params,
+                **search_params,
+                "build_s": round(build_s, 2),
+                "bytes_per_vector": round(bytes_per_vector, 1),
+                f"recall@{args.k}": round(recall_at_k(found, truth), 4),
+                "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+                "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+                "qps": round(1000 / float(latencies.mean()), 1),
+            })
+            print(json.dumps(rows[-1]))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"n": args.n, "dim": args.dim, "k": args.k, "results": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
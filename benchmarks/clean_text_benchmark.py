@@ -0,0 +1,128 @@
+# benchmarks/clean_text_benchmark.py
+# -------------------- text normalization throughput: clean_text vs the old regexes -------------------- #
+#
+# Usage (from the repository root):
+#   python benchmarks/clean_text_benchmark.py --mb 50 --json clean.json
+#   python benchmarks/clean_text_benchmark.py --corpus extracted.txt
+#
+# Builds a corpus that looks like PDF-extracted text in English, French and
+# Malagasy (lines wrapped at ~80 columns, words hyphenated across lines,
+# ligatures, non-breaking spaces, soft hyphens, page breaks), then reports
+# MB/s of UTF-8 input for the previous two-regex implementation, the
+# current clean_text and its streaming variant fed 64 KiB pieces. Also
+# reports how many non-ASCII letters each implementation keeps.
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api"))
+
+from utils import clean_text, iter_clean_text  # noqa: E402
+
+WORDS = (
+    "the quarterly report shows revenue growth across every region and the "
+    "board approved the financial plan for next year "
+    "le rapport trimestriel présente une croissance du chiffre d’affaires dans "
+    "toutes les régions et le conseil a approuvé le budget de l’année prochaine "
+    "été élève déjà façon côté réunion financière bénéfice "
+    "ny tatitra isam-telovolana dia mampiseho fitomboana amin'ny faritra rehetra "
+    "ary nankatoavin'ny filankevitra ny tetibola ho an'ny taona ho avy "
+    "manao ahoana tsara fampandrosoana fivoarana"
+).split()
+
+
+def legacy_clean_text(text: str) -> str:
+    """
+    clean_text before the rewrite: two full-string regex passes.
+    """
+    if not text:
+        return ""
+    text = re.sub(r"\s+", " ", text.strip())
+    text = re.sub(r"[^\x20-\x7E\n]", "", text)
+    return text
+
+
+def make_corpus(mb: float, seed: int = 0) -> str:
+    rng = np.random.default_rng(seed)
+    words = np.array(WORDS)
+    pages, size = [], 0
+    while size < mb * 1e6:
+        lines = []
+        for _ in range(rng.integers(3, 8)):  # paragraphs
+            paragraph = " ".join(words[rng.integers(0, len(words), rng.integers(40, 160))])
+            paragraph = paragraph.replace("fi", "\ufb01", int(rng.integers(0, 3)))
+            paragraph = paragraph.replace(" ?", "\u00a0?").replace(" :", "\u00a0:")
+            line = ""
+            for word in paragraph.split(" "):
+                if len(line) + len(word) > 80:
+                    if len(word) > 6 and rng.random() < 0.3:
+                        cut = len(word) // 2
+                        lines.append(f"{line} {word[:cut]}-")
+                        word = word[cut:]
+                    else:
+                        lines.append(line)
+                    line = word
+                else:
+                    line = f"{line} {word}" if line else word
+            lines.append(line + ".")
+            lines.append("")
+        page = "\n".join(lines).replace("tion", "ti\u00adon", 1)
+        pages.append(page)
+        size += len(page.encode("utf-8"))
+    return "\f".join(pages)
+
+
+def throughput(fn, text: str, repeat: int) -> float:
+    mb = len(text.encode("utf-8")) / 1e6
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - start)
+    return mb / best
+
+
+def stream(text: str, piece: int = 65536) -> str:
+    return "".join(iter_clean_text(text[i : i + piece] for i in range(0, len(text), piece)))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mb", type=float, default=20.0, help="synthetic corpus size")
+    parser.add_argument("--corpus", default=None, help="UTF-8 text file to use instead")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", default=None)
+    args = parser.parse_args()
+
+    if args.corpus:
+        with open(args.corpus, encoding="utf-8", errors="ignore") as f:
+            text = f.read()
+    else:
+        text = make_corpus(args.mb)
+
+    non_ascii = sum(1 for c in text if c.isalpha() and not c.isascii())
+    print(f"{len(text.encode('utf-8')) / 1e6:.1f} MB, {non_ascii} non-ASCII letters\n")
+    print(f"{'implementation':<16} {'MB/s':>8} {'speedup':>8} {'non-ASCII kept':>15}")
+
+    rows = []
+    baseline = None
+    for name, fn in (("legacy", legacy_clean_text), ("clean_text", clean_text), ("streaming", stream)):
+        rate = throughput(fn, text, args.repeat)
+        baseline = baseline or rate
+        output = fn(text)
+        kept = sum(1 for c in output if c.isalpha() and not c.isascii())
+        rows.append({"implementation": name, "mb_per_s": rate, "non_ascii_letters": kept})
+        print(f"{name:<16} {rate:>8.1f} {rate / baseline:>7.2f}x {kept:>15}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "results": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
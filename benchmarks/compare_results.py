@@ -0,0 +1,66 @@
+# benchmarks/compare_results.py
+# -------------------- diff two benchmark reports -------------------- #
+#
+# Usage (from the repository root):
+#   git stash && python benchmarks/micro_benchmarks.py --fake-embeddings --json before.json
+#   git stash pop && python benchmarks/micro_benchmarks.py --fake-embeddings --json after.json
+#   python benchmarks/compare_results.py before.json after.json --threshold 0.1
+#
+# Compares the JSON reports written by micro_benchmarks.py or
+# load_test.py: throughput and p50/p99 latency of every benchmark present
+# in both, and peak RSS. Changes beyond `--threshold` (relative) are
+# flagged; with `--fail` the script exits non-zero on a regression, so it
+# can gate a change in CI. Timings on shared machines are noisy; compare
+# runs from the same host.
+
+import argparse
+import json
+import sys
+
+# (field, True if higher is better)
+FIELDS = (("throughput_per_s", True), ("p50_ms", False), ("p99_ms", False))
+
+
+def change(before: float, after: float) -> float:
+    return (after - before) / before if before else 0.0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("before")
+    parser.add_argument("after")
+    parser.add_argument("--threshold", type=float, default=0.1, help="relative change worth flagging")
+    parser.add_argument("--fail", action="store_true", help="exit 1 if anything regressed")
+    args = parser.parse_args()
+
+    with open(args.before) as f:
+        before = json.load(f)
+    with open(args.after) as f:
+        after = json.load(f)
+
+    print(f"{before.get('benchmark')}: {before.get('commit')} -> {after.get('commit')}\n")
+    print(f"{'benchmark':<18} {'metric':<17} {'before':>11} {'after':>11} {'change':>8}")
+
+    regressions = 0
+    rows = [
+        (name, field, higher_is_better, before["results"][name][field], after["results"][name][field])
+        for name in before["results"]
+        if name in after["results"]
+        for field, higher_is_better in FIELDS
+    ]
+    rows.append(("peak_rss", "self_mb", False, before["peak_rss_mb"]["self"], after["peak_rss_mb"]["self"]))
+
+    for name, field, higher_is_better, old, new in rows:
+        delta = change(old, new)
+        worse = delta < -args.threshold if higher_is_better else delta > args.threshold
+        better = delta > args.threshold if higher_is_better else delta < -args.threshold
+        flag = "  worse" if worse else "  better" if better else ""
+        regressions += worse
+        print(f"{name:<18} {field:<17} {old:>11.3f} {new:>11.3f} {delta:>+7.1%}{flag}")
+
+    if args.fail and regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
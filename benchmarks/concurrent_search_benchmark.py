@@ -0,0 +1,128 @@
+# benchmarks/concurrent_search_benchmark.py
+# -------------------- search latency while an upload is being ingested -------------------- #
+#
+# Usage (from the repository root):
+#   python benchmarks/concurrent_search_benchmark.py --n 200000 --upload 10000 --json concurrent.json
+#   python benchmarks/concurrent_search_benchmark.py --index-type hnsw --readers 8
+#
+# Fills a SimpleVectorStore with `--n` synthetic vectors, then measures
+# per-query search latency from `--readers` threads twice: with the store
+# idle, and while a writer adds `--upload` chunks in embedding-sized
+# batches (and replaces a previous version of them, as a re-upload does).
+# `--embed-ms` paces the writer like the embedding model would; with 0 it
+# adds as fast as it can and mostly measures CPU contention.
+# Snapshot publishing and background compaction should leave p99 where it
+# was; the report also shows how many staging segments were seen.
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api"))
+
+from vector_store import SimpleVectorStore  # noqa: E402
+
+
+def unit_vectors(n: int, dim: int, rng: np.random.Generator) -> np.ndarray:
+    data = rng.standard_normal((n, dim)).astype("float32")
+    data /= np.linalg.norm(data, axis=1, keepdims=True)
+    return data
+
+
+def read_load(store: SimpleVectorStore, queries: np.ndarray, k: int, stop: threading.Event, out: list) -> None:
+    i = 0
+    while not stop.is_set():
+        start = time.perf_counter()
+        store.search(queries[i % len(queries)], k=k)
+        out.append((time.perf_counter() - start) * 1000)
+        i += 1
+
+
+def measure(store, queries, args, writer=None) -> dict:
+    stop = threading.Event()
+    latencies = [[] for _ in range(args.readers)]
+    readers = [
+        threading.Thread(target=read_load, args=(store, queries, args.k, stop, latencies[i]))
+        for i in range(args.readers)
+    ]
+    for thread in readers:
+        thread.start()
+
+    segments = []
+    start = time.perf_counter()
+    if writer is None:
+        time.sleep(args.seconds)
+    else:
+        writer(segments)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    for thread in readers:
+        thread.join()
+
+    ms = np.concatenate([np.array(l) for l in latencies])
+    return {
+        "queries": int(len(ms)),
+        "qps": len(ms) / elapsed,
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p99_ms": float(np.percentile(ms, 99)),
+        "max_segments_seen": max(segments, default=store.segments),
+        "seconds": elapsed,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n", type=int, default=100_000, help="vectors in the store before the upload")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--upload", type=int, default=10_000, help="chunks added during the measurement")
+    parser.add_argument("--batch", type=int, default=64, help="chunks per add_embeddings call")
+    parser.add_argument("--embed-ms", type=float, default=20.0, help="simulated embedding time per batch")
+    parser.add_argument("--index-type", default="flat")
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--seconds", type=float, default=5.0, help="duration of the idle measurement")
+    parser.add_argument("--json", default=None)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    store = SimpleVectorStore(dim=args.dim, index_type=args.index_type, nlist=256)
+    corpus = unit_vectors(args.n, args.dim, rng)
+    for i in range(0, args.n, 10_000):
+        rows = corpus[i : i + 10_000]
+        store.add_embeddings(rows, ["chunk"] * len(rows))
+    store.compact()
+
+    queries = unit_vectors(1000, args.dim, rng)
+    upload = unit_vectors(args.upload, args.dim, rng)
+    previous = list(range(min(args.upload, args.n)))
+
+    def writer(segments: list) -> None:
+        for i in range(0, len(upload), args.batch):
+            time.sleep(args.embed_ms / 1000)
+            rows = upload[i : i + args.batch]
+            store.add_embeddings(rows, ["new chunk"] * len(rows))
+            segments.append(store.segments)
+        store.remove_chunks(previous)
+
+    results = {"idle": measure(store, queries, args)}
+    results["upload"] = measure(store, queries, args, writer)
+
+    print(f"{args.n} vectors ({args.index_type}), {args.readers} readers, upload of {args.upload}\n")
+    print(f"{'phase':<8} {'queries':>8} {'qps':>9} {'p50 ms':>8} {'p99 ms':>8} {'segments':>9}")
+    for phase, r in results.items():
+        print(
+            f"{phase:<8} {r['queries']:>8} {r['qps']:>9.0f} {r['p50_ms']:>8.2f} "
+            f"{r['p99_ms']:>8.2f} {r['max_segments_seen']:>9}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+# benchmarks/embedding_backends.py
+# -------------------- throughput and fp32 parity of embedding backends -------------------- #
+#
+# Usage (from the repository root):
+#   python benchmarks/embedding_backends.py --n 2000 --backends torch int8 onnx --json emb.json
+#   python benchmarks/embedding_backends.py --corpus data/sample.txt --min-cosine 0.99
+#
+# Encodes the same texts with every backend, using fp32 PyTorch as the
+# baseline, and reports texts/s plus how far each backend drifts from it:
+# per-text cosine similarity and top-k neighbour overlap (what retrieval
+# actually sees). Exits non-zero if a backend's mean cosine falls below
+# --min-cosine, so it can gate a config change in CI.
+
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api"))
+
+from embeddings import EMBEDDING_BACKENDS, load_embedding_model  # noqa: E402
+
+WORDS = (
+    "the model index query document vector search answer context chunk retrieval "
+    "embedding latency throughput server request cache memory token sentence page "
+    "report policy customer invoice contract meeting project budget schedule risk "
+    "quarterly revenue growth team product release feature support issue update"
+).split()
+
+
+def make_texts(n: int, seed: int = 0) -> list:
+    """
+    Synthetic sentences of 8-60 words, roughly the spread of queries and chunks.
+    """
+    rng = np.random.default_rng(seed)
+    return [
+        " ".join(rng.choice(WORDS, size=rng.integers(8, 61)))
+        for _ in range(n)
+    ]
+
+
+def load_texts(path: str, n: int) -> list:
+    with open(path, encoding="utf-8", errors="ignore") as f:
+        texts = [line.strip() for line in f if line.strip()]
+    return texts[:n]
+
+
+def encode(model, texts: list, batch_size: int) -> tuple:
+    model.encode(texts[:batch_size], batch_size=batch_size)  # warm-up
+    start = time.perf_counter()
+    vectors = model.encode(
+        texts,
+        batch_size=batch_size,
+        convert_to_numpy=True,
+        normalize_embeddings=True,
+    ).astype("float32")
+    return vectors, time.perf_counter() - start
+
+
+def topk_overlap(baseline: np.ndarray, other: np.ndarray, k: int, n_queries: int) -> float:
+    """
+    Mean fraction of each query's k nearest neighbours shared with the baseline.
+    """
+    queries = slice(0, min(n_queries, len(baseline)))
+    base = np.argsort(-(baseline[queries] @ baseline.T), axis=1)[:, :k]
+    test = np.argsort(-(other[queries] @ other.T), axis=1)[:, :k]
+    return float(np.mean([len(set(a) & set(b)) / k for a, b in zip(base, test)]))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default="sentence-transformers/all-MiniLM-L6-v2")
+    parser.add_argument("--backends", nargs="+", default=list(EMBEDDING_BACKENDS))
+    parser.add_argument("--onnx-file", default=None)
+    parser.add_argument("--corpus", default=None, help="text file, one text per line")
+    parser.add_argument("--n", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, default=32)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--min-cosine", type=float, default=0.99)
+    parser.add_argument("--json", default=None)
+    args = parser.parse_args()
+
+    texts = load_texts(args.corpus, args.n) if args.corpus else make_texts(args.n)
+
+    baseline_model = load_embedding_model(args.model, backend="torch", device="cpu")
+    baseline, elapsed = encode(baseline_model, texts, args.batch_size)
+    baseline_rate = len(texts) / elapsed
+    del baseline_model
+
+    print(f"{len(texts)} texts, batch size {args.batch_size}, model {args.model}\n")
+    print(f"{'backend':<8} {'texts/s':>9} {'speedup':>8} {'cos mean':>9} {'cos min':>8} {'top-k':>6}")
+
+    rows = []
+    failed = False
+    for backend in args.backends:
+        if backend == "torch":
+            vectors, rate = baseline, baseline_rate
+        else:
+            try:
+                model = load_embedding_model(
+                    args.model, backend=backend, device="cpu", onnx_file=args.onnx_file
+                )
+            except ImportError as e:
+                print(f"{backend:<8} skipped: {e}")
+                continue
+            vectors, elapsed = encode(model, texts, args.batch_size)
+            rate = len(texts) / elapsed
+            del model
+
+        cosine = np.sum(baseline * vectors, axis=1)
+        row = {
+            "backend": backend,
+            "texts_per_s": rate,
+            "speedup": rate / baseline_rate,
+            "cosine_mean": float(cosine.mean()),
+            "cosine_min": float(cosine.min()),
+            "topk_overlap": topk_overlap(baseline, vectors, args.k, args.queries),
+        }
+        rows.append(row)
+        failed |= row["cosine_mean"] < args.min_cosine
+
+        print(
+            f"{backend:<8} {rate:>9.1f} {row['speedup']:>7.2f}x {row['cosine_mean']:>9.4f} "
+            f"{row['cosine_min']:>8.4f} {row['topk_overlap']:>6.3f}"
+        )
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "results": rows}, f, indent=2)
+
+    if failed:
+        print(f"\nParity check failed: mean cosine below {args.min_cosine}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+# benchmarks/harness.py
+# -------------------- shared helpers of the benchmark suite -------------------- #
+#
+# Imported by micro_benchmarks.py and load_test.py; not run directly.
+# Provides the synthetic corpus (10k / 100k / 1M chunks), the fake
+# embedding mode, latency percentiles, peak RSS and the JSON report that
+# compare_results.py diffs between two commits.
+
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api"))
+
+from utils import get_config  # noqa: E402
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+CORPUS_SIZES = {"10k": 10_000, "100k": 100_000, "1M": 1_000_000}
+
+WORDS = (
+    "the model index query document vector search answer context chunk retrieval "
+    "embedding latency throughput server request cache memory token sentence page "
+    "report policy customer invoice contract meeting project budget schedule risk "
+    "quarterly revenue growth team product release feature support issue update "
+    "account billing refund shipping warranty license renewal audit compliance "
+    "security incident backup storage network database migration deployment"
+).split()
+
+
+# ------------------------------------------------------------------
+# Synthetic corpus
+# ------------------------------------------------------------------
+def corpus_size(size: str) -> int:
+    """
+    Number of chunks for "10k", "100k", "1M" or a plain integer.
+    """
+    return CORPUS_SIZES.get(size) or int(size)
+
+
+def synthetic_chunks(n: int, words: int = 120, seed: int = 0) -> List[str]:
+    """
+    `n` chunk texts of about `words` words. Each one carries a unique
+    "ref<i>" term, so exact-term queries have a single right answer.
+    """
+    rng = np.random.default_rng(seed)
+    vocabulary = np.array(WORDS)
+    lengths = rng.integers(words // 2, words * 3 // 2, size=n)
+    picks = rng.integers(0, len(vocabulary), size=int(lengths.sum()))
+    chunks, start = [], 0
+    for i, length in enumerate(lengths):
+        body = " ".join(vocabulary[picks[start : start + length]])
+        chunks.append(f"Record ref{i}. {body.capitalize()}.")
+        start += length
+    return chunks
+
+
+def synthetic_queries(n: int, corpus: int, seed: int = 1) -> List[str]:
+    """
+    Questions mixing vocabulary words with a reference of the corpus.
+    """
+    rng = np.random.default_rng(seed)
+    return [
+        f"What does ref{rng.integers(corpus)} say about {' and '.join(rng.choice(WORDS, size=3))}?"
+        for _ in range(n)
+    ]
+
+
+def unit_vectors(n: int, dim: int, seed: int = 0) -> np.ndarray:
+    data = np.random.default_rng(seed).standard_normal((n, dim)).astype("float32")
+    data /= np.linalg.norm(data, axis=1, keepdims=True)
+    return data
+
+
+def write_documents(directory: str, chunks: List[str], per_file: int) -> List[str]:
+    """
+    Write the chunks as text files of `per_file` paragraphs; returns the paths.
+    """
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for i in range(0, len(chunks), per_file):
+        path = os.path.join(directory, f"doc-{i // per_file:06d}.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n\n".join(chunks[i : i + per_file]))
+        paths.append(path)
+    return paths
+
+
+# ------------------------------------------------------------------
+# Fake embedding mode
+# ------------------------------------------------------------------
+def use_fake_embeddings(dim: int = 384) -> None:
+    """
+    Switch the loaded settings to the deterministic "fake" embedding
+    backend, so nothing is downloaded. Chunking counts words (the token
+    chunker would fetch the model's tokenizer) and re-ranking is disabled.
+    Must run before the embedding model is first used.
+    """
+    config = get_config()
+    config["embedding_model"] = {"name": "fake", "backend": "fake", "dim": dim}
+    config["ingestion"] = {**(config.get("ingestion") or {}), "chunker": "words"}
+    config["reranker"] = {**(config.get("reranker") or {}), "enabled": False}
+
+
+# ------------------------------------------------------------------
+# Measurement
+# ------------------------------------------------------------------
+def summarize(latencies_ms: List[float], elapsed: float, items: int | None = None) -> Dict[str, float]:
+    """
+    Throughput and latency percentiles of a run of timed calls.
+    `items` counts units of work (texts, queries) when a call does several.
+    """
+    ms = np.array(latencies_ms, dtype="float64")
+    count = len(ms) if items is None else items
+    return {
+        "calls": int(len(ms)),
+        "throughput_per_s": count / elapsed if elapsed else 0.0,
+        "p50_ms": float(np.percentile(ms, 50)) if len(ms) else 0.0,
+        "p95_ms": float(np.percentile(ms, 95)) if len(ms) else 0.0,
+        "p99_ms": float(np.percentile(ms, 99)) if len(ms) else 0.0,
+    }
+
+
+def time_calls(
+    call: Callable[[int], object],
+    seconds: float,
+    items_per_call: int = 1,
+    min_calls: int = 5,
+    warmup: int = 1,
+) -> Dict[str, float]:
+    """
+    Call `call(i)` repeatedly for about `seconds` (at least `min_calls`
+    times) and summarize; throughput counts `items_per_call` per call.
+    """
+    for i in range(warmup):
+        call(i)
+
+    latencies = []
+    start = time.perf_counter()
+    i = 0
+    while i < min_calls or time.perf_counter() - start < seconds:
+        t = time.perf_counter()
+        call(i)
+        latencies.append((time.perf_counter() - t) * 1000)
+        i += 1
+    return summarize(latencies, time.perf_counter() - start, i * items_per_call)
+
+
+def peak_rss_mb() -> Dict[str, float]:
+    """
+    Peak resident set size of this process and of its finished children.
+    """
+    # ru_maxrss is in kilobytes on Linux, bytes on macOS
+    scale = 1 / 1024 if sys.platform != "darwin" else 1 / 1024 / 1024
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss * scale,
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def report(benchmark: str, args: dict, results: dict, path: str | None) -> dict:
+    """
+    Assemble the JSON report (with commit, machine and peak RSS) and write
+    it to `path` if given.
+    """
+    data = {
+        "benchmark": benchmark,
+        "commit": _git_commit(),
+        "machine": {"python": platform.python_version(), "cpus": os.cpu_count()},
+        "args": args,
+        "results": results,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    if path:
+        with open(path, "w") as f:
+            json.dump(data, f, indent=2)
+    return data
+
+
+def print_table(results: Dict[str, Dict[str, float]]) -> None:
+    print(f"{'benchmark':<32} {'calls':>7} {'per s':>10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for name, r in results.items():
+        print(
+            f"{name:<32} {r['calls']:>7} {r['throughput_per_s']:>10.1f} "
+            f"{r['p50_ms']:>9.3f} {r['p95_ms']:>9.3f} {r['p99_ms']:>9.3f}"
+        )
+
@@ -0,0 +1,123 @@
+# benchmarks/import_time.py
+# -------------------- import time and cold start of the API process -------------------- #
+#
+# Usage (from the repository root):
+#   python benchmarks/import_time.py --runs 5 --json startup.json
+#   python benchmarks/compare_results.py before.json startup.json --fail
+#
+# Measures two things in fresh processes, `--runs` times each:
+#   import_main   `python -X importtime -c "import main"`, the cost of
+#                 importing the app before uvicorn can bind its port; the
+#                 report lists the `--top` packages with the most import
+#                 time of their own (the last run's)
+#   first_health  from spawning `uvicorn main:app` to the first 200 from
+#                 /api/health
+# Models and the index load in the background after startup, so neither
+# number should include them; a heavy import creeping back into the
+# module level shows up here first.
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, Tuple
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api"))
+
+import harness  # noqa: E402
+from harness import summarize  # noqa: E402
+
+API_DIR = os.path.join(harness.REPO_ROOT, "api")
+
+
+def import_time() -> Tuple[float, Dict[str, float]]:
+    """
+    Import `main` in a fresh interpreter; returns the total in ms and the
+    self time in ms of each top-level package (numpy, fastapi, ...).
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import main"],
+        cwd=API_DIR, capture_output=True, text=True, check=True,
+    )
+    # Lines look like "import time:  self [us] | cumulative | imported package",
+    # indented by nesting depth
+    total, packages = 0.0, defaultdict(float)
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        packages[name.strip().split(".")[0]] += int(own) / 1000
+        if not name.startswith("  "):
+            total += int(cumulative) / 1000
+    return total, packages
+
+
+def first_health(port: int, timeout: float) -> float:
+    """
+    Start uvicorn and return the ms until /api/health first answers 200.
+    """
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=API_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    # One client for all polls: building one per request costs enough CPU
+    # to slow the server down on a small machine
+    client = httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=1)
+    try:
+        while time.perf_counter() - start < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f"uvicorn exited with code {server.returncode}")
+            try:
+                if client.get("/api/health").status_code == 200:
+                    return (time.perf_counter() - start) * 1000
+            except httpx.TransportError:
+                pass
+            time.sleep(0.02)
+        raise TimeoutError(f"/api/health did not answer within {timeout}s")
+    finally:
+        client.close()
+        server.terminate()
+        server.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=15, help="slowest packages to report")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds to wait for /api/health")
+    parser.add_argument("--json", default=None)
+    args = parser.parse_args()
+
+    imports, healths = [], []
+    for run in range(args.runs):
+        total, packages = import_time()
+        imports.append(total)
+        healths.append(first_health(args.port, args.timeout))
+        print(f"  run {run + 1}: import main {imports[-1]:.0f} ms, first /api/health {healths[-1]:.0f} ms")
+
+    # Throughput here is runs per second of wall time spent in the step
+    slowest = sorted(packages.items(), key=lambda p: p[1], reverse=True)[: args.top]
+    results = {
+        "import_main": {
+            **summarize(imports, sum(imports) / 1000),
+            "slowest_packages": [{"package": name, "self_ms": ms} for name, ms in slowest],
+        },
+        "first_health": summarize(healths, sum(healths) / 1000),
+    }
+
+    print("\nSlowest packages to import (last run):")
+    for name, ms in slowest:
+        print(f"  {ms:>9.1f} ms  {name}")
+    print()
+    harness.print_table(results)
+    harness.report("startup", vars(args), results, args.json)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# benchmarks/lexical_benchmark.py
+# -------------------- BM25 index build throughput and lookup latency -------------------- #
+#
+# Usage (from the repository root):
+#   python benchmarks/lexical_benchmark.py --n 1000000 --json bm25.json
+#
+# Indexes a synthetic corpus with a Zipf-distributed vocabulary (a few very
+# common words, a long tail of rare ones, plus unique product codes), then
+# times lookups for rare-term, mixed and code queries before and after the
+# delta is merged into a segment by `save`.
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api"))
+
+from lexical_index import BM25Index  # noqa: E402
+
+
+def make_corpus(n: int, words_per_chunk: int, vocab_size: int, seed: int = 0):
+    """
+    Batches of (chunk ids, texts), 10k chunks at a time.
+    """
+    rng = np.random.default_rng(seed)
+    vocab = np.array([f"w{i}" for i in range(vocab_size)])
+    p = 1.0 / np.arange(1, vocab_size + 1)
+    p /= p.sum()
+    for start in range(0, n, 10_000):
+        ids = list(range(start, min(start + 10_000, n)))
+        words = vocab[rng.choice(vocab_size, size=(len(ids), words_per_chunk), p=p)]
+        yield ids, [f"{' '.join(row)} SKU-{i:07d}" for i, row in zip(ids, words)]
+
+
+def time_queries(index: BM25Index, queries, k: int) -> dict:
+    latencies = []
+    for q in queries:
+        start = time.perf_counter()
+        index.search(q, k)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies = np.array(latencies)
+    return {
+        "p50_ms": round(float(np.percentile(latencies, 50)), 3),
+        "p99_ms": round(float(np.percentile(latencies, 99)), 3),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n", type=int, default=200_000, help="number of chunks")
+    parser.add_argument("--words", type=int, default=60, help="words per chunk")
+    parser.add_argument("--vocab", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--json", help="write results to this file")
+    args = parser.parse_args()
+
+    index = BM25Index()
+    build_s = 0.0
+    for ids, texts in make_corpus(args.n, args.words, args.vocab):
+        start = time.perf_counter()
+        index.add(ids, texts)
+        build_s += time.perf_counter() - start
+
+    rng = np.random.default_rng(1)
+    query_sets = {
+        "code": [f"SKU-{i:07d}" for i in rng.integers(0, args.n, args.queries)],
+        "rare_terms": [
+            " ".join(f"w{w}" for w in rng.integers(args.vocab // 10, args.vocab, 3))
+            for _ in range(args.queries)
+        ],
+        "mixed_terms": [
+            " ".join(f"w{w}" for w in rng.integers(0, args.vocab, 5))
+            for _ in range(args.queries)
+        ],
+    }
+
+    rows = []
+    for phase in ("delta", "segment"):
+        if phase == "segment":
+            with tempfile.TemporaryDirectory() as tmp:
+                start = time.perf_counter()
+                index.save(tmp)
+                merge_s = time.perf_counter() - start
+        for name, queries in query_sets.items():
+            row = {"phase": phase, "queries": name, **time_queries(index, queries, args.k)}
+            rows.append(row)
+            print(json.dumps(row))
+
+    summary = {
+        "n": args.n,
+        "build_s": round(build_s, 2),
+        "chunks_per_s": round(args.n / build_s),
+        "merge_s": round(merge_s, 2),
+    }
+    print(json.dumps(summary))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({**summary, "results": rows}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
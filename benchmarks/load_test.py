@@ -0,0 +1,185 @@
+# benchmarks/load_test.py
+# -------------------- in-process load test of /api/upload and /api/chat -------------------- #
+#
+# Usage (from the repository root):
+#   python benchmarks/load_test.py --fake-embeddings --size 10k --concurrency 16 --json load.json
+#   python benchmarks/load_test.py --size 100k --requests 2000 --endpoint /api/chat/stream
+#   python benchmarks/compare_results.py before.json load.json
+#
+# Runs the FastAPI app in this process (startup and shutdown included)
+# behind an httpx ASGI transport, so no server or port is needed. First
+# uploads a synthetic corpus of `--size` chunks as text files from
+# `--upload-concurrency` clients and waits for ingestion to finish, then
+# sends `--requests` questions from `--concurrency` clients. Reports
+# throughput, p50/p95/p99 latency, errors and peak RSS as JSON.
+#
+# The app works in a temporary directory (index, uploads, sessions), so
+# the real data/ is never touched. `--fake-embeddings` uses the
+# deterministic stand-in model instead of downloading the configured one.
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+import httpx
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api"))
+
+import harness  # noqa: E402
+from harness import corpus_size, summarize, synthetic_chunks, synthetic_queries, write_documents  # noqa: E402
+from utils import get_config  # noqa: E402
+
+
+async def wait_until_ready(client: httpx.AsyncClient, timeout: float = 600.0) -> float:
+    """
+    Poll /api/ready until the models and the index have loaded in the
+    background; returns the seconds waited.
+    """
+    start = time.perf_counter()
+    while (await client.get("/api/ready")).status_code != 200:
+        if time.perf_counter() - start > timeout:
+            raise TimeoutError(f"/api/ready did not answer 200 within {timeout}s")
+        await asyncio.sleep(0.1)
+    return time.perf_counter() - start
+
+
+async def upload(client: httpx.AsyncClient, paths: list, args) -> dict:
+    """
+    Upload files in requests of `--files-per-upload` and wait for every
+    ingestion job to finish.
+    """
+    groups = [paths[i : i + args.files_per_upload] for i in range(0, len(paths), args.files_per_upload)]
+    queue: asyncio.Queue = asyncio.Queue()
+    for group in groups:
+        queue.put_nowait(group)
+
+    latencies, jobs, errors = [], [], 0
+
+    async def worker() -> None:
+        nonlocal errors
+        while not queue.empty():
+            group = queue.get_nowait()
+            files = []
+            for path in group:
+                with open(path, "rb") as f:
+                    files.append(("files", (os.path.basename(path), f.read(), "text/plain")))
+            start = time.perf_counter()
+            response = await client.post("/api/upload", files=files)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code == 200:
+                jobs.append(response.json()["job_id"])
+            else:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.upload_concurrency)))
+    accepted = time.perf_counter() - start
+
+    chunks = 0
+    for job_id in jobs:
+        while True:
+            status = (await client.get(f"/api/upload/{job_id}")).json()
+            if status["status"] in ("completed", "failed"):
+                chunks += status["chunks_embedded"]
+                errors += len(status.get("errors") or [])
+                break
+            await asyncio.sleep(0.2)
+    ingested = time.perf_counter() - start
+
+    return {
+        **summarize(latencies, accepted),
+        "errors": errors,
+        "files": len(paths),
+        "chunks_embedded": chunks,
+        "ingest_seconds": ingested,
+        "chunks_per_s": chunks / ingested if ingested else 0.0,
+    }
+
+
+async def chat(client: httpx.AsyncClient, queries: list, args) -> dict:
+    """
+    Send `--requests` questions from `--concurrency` concurrent clients.
+    """
+    latencies, errors = [], 0
+    next_query = iter(range(args.requests))
+
+    async def worker() -> None:
+        nonlocal errors
+        for i in next_query:
+            body = {"prompt": queries[i % len(queries)]}
+            start = time.perf_counter()
+            response = await client.post(args.endpoint, json=body)
+            await response.aread()  # a stream counts until its last event
+            latencies.append((time.perf_counter() - start) * 1000)
+            errors += response.status_code != 200
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    return {**summarize(latencies, time.perf_counter() - start), "errors": errors}
+
+
+async def run(args) -> dict:
+    # Imported here: the settings and working directory must be final first
+    from main import app
+
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+            print(f"Ready after {await wait_until_ready(client):.1f}s")
+            n = corpus_size(args.size)
+            print(f"Uploading {n} chunks...")
+            paths = write_documents("corpus", synthetic_chunks(n, words=args.chunk_words), args.chunks_per_file)
+            results["upload"] = await upload(client, paths, args)
+            r = results["upload"]
+            print(f"  {r['chunks_embedded']} chunks ingested in {r['ingest_seconds']:.1f}s ({r['errors']} errors)")
+
+            print(f"Sending {args.requests} questions to {args.endpoint}...")
+            results["chat"] = await chat(client, synthetic_queries(1000, n), args)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", default="10k", help="corpus chunks: 10k, 100k, 1M or a number")
+    parser.add_argument("--chunk-words", type=int, default=120, help="average words per synthetic chunk")
+    parser.add_argument("--chunks-per-file", type=int, default=200)
+    parser.add_argument("--files-per-upload", type=int, default=5)
+    parser.add_argument("--upload-concurrency", type=int, default=2)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--endpoint", default="/api/chat", choices=["/api/chat", "/api/chat/stream"])
+    parser.add_argument("--fake-embeddings", action="store_true", help="use the deterministic fake model")
+    parser.add_argument("--json", default=None)
+    args = parser.parse_args()
+    json_path = os.path.abspath(args.json) if args.json else None
+
+    get_config()  # read config/settings.yaml before leaving the repository root
+    if args.fake_embeddings:
+        harness.use_fake_embeddings()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="rag-load-") as workdir:
+        # Relative data/ paths in the loaded settings now land here
+        os.chdir(workdir)
+        try:
+            results = asyncio.run(run(args))
+        finally:
+            os.chdir(cwd)
+
+    print()
+    print(f"{'phase':<8} {'requests':>9} {'per s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+    for phase, r in results.items():
+        print(
+            f"{phase:<8} {r['calls']:>9} {r['throughput_per_s']:>9.1f} {r['p50_ms']:>9.1f} "
+            f"{r['p95_ms']:>9.1f} {r['p99_ms']:>9.1f} {r['errors']:>7}"
+        )
+    data = harness.report("load", vars(args), results, json_path)
+    print(f"\nPeak RSS: {data['peak_rss_mb']['self']:.0f} MB (child processes {data['peak_rss_mb']['children']:.0f} MB)")
+
+
+if __name__ == "__main__":
+    main()
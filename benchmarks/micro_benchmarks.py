@@ -0,0 +1,118 @@
+# benchmarks/micro_benchmarks.py
+# -------------------- per-function timings of the hot path -------------------- #
+#
+# Usage (from the repository root):
+#   python benchmarks/micro_benchmarks.py --size 100k --fake-embeddings --json micro.json
+#   python benchmarks/micro_benchmarks.py --size 1M --index-type ivf_flat --only search search_batch
+#   python benchmarks/compare_results.py before.json micro.json
+#
+# Times each hot function on its own: text cleaning and chunking, chunk
+# and query embedding, adding to and searching a SimpleVectorStore (dense
+# and BM25) filled with a synthetic corpus of `--size` chunks, and prompt
+# building. Reports calls/s (items/s for batched calls), p50/p95/p99 and
+# peak RSS as JSON to diff between commits.
+#
+# The store is filled with random unit vectors rather than embedded
+# chunks, so 1M chunks load in seconds; search cost does not depend on
+# what the vectors encode. `--fake-embeddings` times the deterministic
+# stand-in model instead of downloading the configured one.
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api"))
+
+import harness  # noqa: E402
+from harness import corpus_size, synthetic_chunks, synthetic_queries, time_calls, unit_vectors  # noqa: E402
+
+BENCHMARKS = (
+    "clean_text", "chunk_text", "word_chunker", "token_chunker", "embed_texts", "embed_query",
+    "search", "search_batch", "search_lexical", "build_prompt", "add_embeddings",
+)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size", default="10k", help="corpus chunks: 10k, 100k, 1M or a number")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--index-type", default="flat")
+    parser.add_argument("--fake-embeddings", action="store_true", help="use the deterministic fake model")
+    parser.add_argument("--seconds", type=float, default=2.0, help="time spent on each benchmark")
+    parser.add_argument("--batch", type=int, default=64, help="texts per embed_texts / add_embeddings call")
+    parser.add_argument("--only", nargs="+", choices=BENCHMARKS, default=None)
+    parser.add_argument("--json", default=None)
+    args = parser.parse_args()
+
+    if args.fake_embeddings:
+        harness.use_fake_embeddings(args.dim)
+
+    # Imported after the settings are final
+    from chunking import get_chunker
+    from embeddings import embed_query, embed_texts, get_model_config
+    from qa_pipeline import QAPipeline
+    from utils import chunk_text, clean_text
+    from vector_store import SimpleVectorStore
+
+    selected = set(args.only or BENCHMARKS)
+    if args.fake_embeddings:
+        selected.discard("token_chunker")
+
+    n = corpus_size(args.size)
+    print(f"Building a corpus of {n} chunks...")
+    start = time.perf_counter()
+    chunks = synthetic_chunks(n)
+    queries = synthetic_queries(1000, n)
+    document = "\n\n".join(chunks[:200])  # about 25k words
+
+    results = {}
+
+    def run(name: str, call, items_per_call: int = 1) -> None:
+        if name in selected:
+            results[name] = r = time_calls(call, args.seconds, items_per_call)
+            print(f"  {name:<16} {r['throughput_per_s']:>10.1f}/s  p50 {r['p50_ms']:.3f} ms  p99 {r['p99_ms']:.3f} ms")
+
+    run("clean_text", lambda i: clean_text(document))
+    run("chunk_text", lambda i: chunk_text(document, 300, 50))
+    run("word_chunker", lambda i: get_chunker(None, 254, 32).chunk(document))
+    run("token_chunker", lambda i: get_chunker(get_model_config()["name"], 254, 32).chunk(document))
+
+    def embed_batch(i: int) -> None:
+        start = i * args.batch % (n - args.batch)
+        embed_texts(chunks[start : start + args.batch], use_cache=False)
+
+    run("embed_texts", embed_batch, args.batch)
+    # A new text every call, so the query cache never answers
+    run("embed_query", lambda i: embed_query(f"{queries[i % len(queries)]} #{i}"))
+
+    store = SimpleVectorStore(dim=args.dim, index_type=args.index_type, lexical="search_lexical" in selected)
+    vectors = unit_vectors(n, args.dim)
+    for i in range(0, n, 10_000):
+        store.add_embeddings(vectors[i : i + 10_000], chunks[i : i + 10_000])
+    store.compact()
+    print(f"Store of {store.ntotal} vectors ready in {time.perf_counter() - start:.1f}s")
+
+    query_vectors = unit_vectors(1024, args.dim, seed=1)
+    run("search", lambda i: store.search(query_vectors[i % 1024], k=5))
+    run("search_batch", lambda i: store.search_batch(query_vectors[i % 32 * 32 : i % 32 * 32 + 32], k=5), 32)
+    run("search_lexical", lambda i: store.search_lexical(queries[i % len(queries)], k=20))
+    run("build_prompt", lambda i: QAPipeline._build_prompt(queries[i % len(queries)], chunks[i % 100 : i % 100 + 5]))
+
+    new_vectors = unit_vectors(args.batch * 100, args.dim, seed=2)
+    run(
+        "add_embeddings",
+        lambda i: store.add_embeddings(
+            new_vectors[i % 100 * args.batch : (i % 100 + 1) * args.batch], chunks[: args.batch]
+        ),
+        args.batch,
+    )
+
+    print()
+    harness.print_table(results)
+    data = harness.report("micro", vars(args), results, args.json)
+    print(f"\nPeak RSS: {data['peak_rss_mb']['self']:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
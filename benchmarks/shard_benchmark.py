@@ -0,0 +1,111 @@
+# benchmarks/shard_benchmark.py
+# -------------------- single store vs. scatter-gather over shard processes -------------------- #
+#
+# Usage (from the repository root):
+#   python benchmarks/shard_benchmark.py --n 1000000 --shards 1 2 4 --json shards.json
+#   python benchmarks/shard_benchmark.py --index-type hnsw --readers 8
+#
+# Fills a SimpleVectorStore and ShardedVectorStores of `--shards` local
+# shard processes with the same `--n` synthetic vectors, then measures
+# per-query search latency from `--readers` threads and the recall of
+# each sharded store against the single one. With approximate indexes
+# the shards' merged top-k can differ slightly from one large index.
+# Shards search in parallel, so latency should stay flat as the corpus
+# grows as long as there are cores (or hosts) for them.
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "api"))
+
+from sharded_store import ShardedVectorStore  # noqa: E402
+from vector_store import SimpleVectorStore  # noqa: E402
+
+
+def unit_vectors(n: int, dim: int, rng: np.random.Generator) -> np.ndarray:
+    data = rng.standard_normal((n, dim)).astype("float32")
+    data /= np.linalg.norm(data, axis=1, keepdims=True)
+    return data
+
+
+def latency(store, queries: np.ndarray, k: int, readers: int) -> dict:
+    per_reader = np.array_split(queries, readers)
+    latencies = [[] for _ in range(readers)]
+
+    def run(i: int) -> None:
+        for query in per_reader[i]:
+            start = time.perf_counter()
+            store.search(query, k=k)
+            latencies[i].append((time.perf_counter() - start) * 1000)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(readers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    ms = np.concatenate([np.array(l) for l in latencies])
+    return {
+        "qps": len(ms) / elapsed,
+        "p50_ms": float(np.percentile(ms, 50)),
+        "p99_ms": float(np.percentile(ms, 99)),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--n", type=int, default=200_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--shards", type=int, nargs="+", default=[2, 4])
+    parser.add_argument("--index-type", default="flat")
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--json", default=None)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    corpus = unit_vectors(args.n, args.dim, rng)
+    texts = [f"chunk {i}" for i in range(args.n)]
+    queries = unit_vectors(args.queries, args.dim, rng)
+
+    single = SimpleVectorStore(dim=args.dim, index_type=args.index_type, nlist=256)
+    for i in range(0, args.n, 10_000):
+        single.add_embeddings(corpus[i : i + 10_000], texts[i : i + 10_000])
+    single.compact()
+    truth = [{r.text for r in row} for row in single.search_batch(queries, args.k)]
+
+    results = {"1 (in process)": {**latency(single, queries, args.k, args.readers), "recall": 1.0}}
+    for shards in args.shards:
+        store = ShardedVectorStore(
+            dim=args.dim, shards=shards, timeout=None, index_type=args.index_type, nlist=256
+        )
+        try:
+            for i in range(0, args.n, 10_000):
+                store.add_embeddings(corpus[i : i + 10_000], texts[i : i + 10_000])
+            store.compact()
+            got = store.search_batch(queries, args.k)
+            recall = np.mean([len(t & {r.text for r in row}) / args.k for t, row in zip(truth, got)])
+            results[str(shards)] = {**latency(store, queries, args.k, args.readers), "recall": float(recall)}
+        finally:
+            store.close()
+
+    print(f"{args.n} vectors ({args.index_type}), {args.readers} readers, k={args.k}\n")
+    print(f"{'shards':<15} {'qps':>9} {'p50 ms':>8} {'p99 ms':>8} {'recall':>7}")
+    for shards, r in results.items():
+        print(f"{shards:<15} {r['qps']:>9.0f} {r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['recall']:>7.3f}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"args": vars(args), "results": results}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
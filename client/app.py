@@ -1,4 +1,6 @@
 # client/app.py
+import json
+import uuid
 import streamlit as st
 import requests
 
@@ -35,21 +37,59 @@ if uploaded_files:
 # -------------------------------
 # Chat section
 # -------------------------------
+def stream_events(resp):
+    """
+    Parse a Server-Sent Events response into (event, data) pairs.
+    """
+    event = "message"
+    for line in resp.iter_lines(decode_unicode=True):
+        if line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            yield event, json.loads(line[len("data:"):])
+            event = "message"
+
+
+# The server keeps the conversation; only the new question is sent
+if "session_id" not in st.session_state or st.button("New conversation"):
+    st.session_state.session_id = uuid.uuid4().hex
+
 user_input = st.text_input("Your question:")
+stream = st.checkbox("Stream answer", value=True)
 
 if st.button("Ask") and user_input.strip():
-    payload = {"prompt": user_input}
+    payload = {"prompt": user_input, "session_id": st.session_state.session_id}
 
     try:
-        resp = requests.post(f"{API_BASE}/chat", json=payload)
-        resp.raise_for_status()
-        data = resp.json()
+        if stream:
+            with requests.post(f"{API_BASE}/chat/stream", json=payload, stream=True) as resp:
+                resp.raise_for_status()
+
+                st.subheader("Answer")
+                placeholder = st.empty()
+                answer = ""
+                sources = []
+
+                for event, data in stream_events(resp):
+                    if event == "sources":
+                        sources = data.get("sources", [])
+                    elif event == "token":
+                        answer += data["token"]
+                        placeholder.markdown(answer + "▌")
+                    elif event == "error":
+                        st.error(data.get("detail", "Generation failed"))
+
+                placeholder.markdown(answer or "No answer")
+        else:
+            resp = requests.post(f"{API_BASE}/chat", json=payload)
+            resp.raise_for_status()
+            data = resp.json()
 
-        answer = data.get("answer", "No answer")
-        sources = data.get("sources", [])
+            answer = data.get("answer", "No answer")
+            sources = data.get("sources", [])
 
-        st.subheader("Answer")
-        st.write(answer)
+            st.subheader("Answer")
+            st.write(answer)
 
         if sources:
             st.subheader("Sources")
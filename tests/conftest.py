@@ -0,0 +1,43 @@
+# tests/conftest.py
+# -------------------- shared fixtures: offline settings and fresh singletons -------------------- #
+#
+# Run from the repository root:
+#   python -m pytest -q
+#
+# Nothing is downloaded: tests use the "fake" embedding backend (hashed
+# bag of words) and the fake generator, and work in a temporary directory.
+
+import os
+import sys
+
+import pytest
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, os.path.join(REPO_ROOT, "api"))
+
+import embeddings  # noqa: E402
+import utils  # noqa: E402
+
+
+@pytest.fixture
+def fake_config(tmp_path, monkeypatch):
+    """
+    config/settings.yaml switched to the offline fake backends, with the
+    working directory (and so every relative data/ path) in `tmp_path`.
+    Module-level singletons start empty and are restored afterwards.
+    """
+    config = utils.load_config(os.path.join(REPO_ROOT, "config", "settings.yaml"))
+    config["embedding_model"] = {"name": "fake", "backend": "fake", "dim": 384}
+    config["ingestion"] = {**config.get("ingestion", {}), "chunker": "words", "max_workers": 1}
+    config["reranker"] = {**config.get("reranker", {}), "enabled": False}
+    config["generator"] = {"backend": "fake"}
+    monkeypatch.setattr(utils, "_CONFIG", config)
+    monkeypatch.chdir(tmp_path)
+
+    monkeypatch.setattr(embeddings, "_model", None)
+    monkeypatch.setattr(embeddings, "_cache", None)
+    monkeypatch.setattr(embeddings, "_cache_initialized", False)
+    monkeypatch.setattr(embeddings, "_batcher", None)
+    embeddings._model_id.cache_clear()
+    yield config
+    embeddings._model_id.cache_clear()
@@ -0,0 +1,82 @@
+# tests/test_answer_cache.py
+
+import numpy as np
+import pytest
+
+from answer_cache import CachedAnswer, SemanticAnswerCache, exact_terms
+from qa_pipeline import QAPipeline
+
+DIM = 8
+PARAMS = (3, None, None)
+
+
+def embedding(seed: int) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal(DIM).astype("float32")
+
+
+def answer(text: str) -> CachedAnswer:
+    return CachedAnswer(text, [f"source of {text}"], 0.9)
+
+
+def test_exact_terms():
+    assert exact_terms("Why does ERR-404 appear in v2.1?") == {"err-404", "404", "v2.1", "v2", "1"}
+    assert exact_terms("why does the error appear") == frozenset()
+
+
+def test_near_duplicate_queries_share_an_answer():
+    cache = SemanticAnswerCache(DIM, threshold=0.95)
+    cache.put("what is the refund policy", embedding(0), PARAMS, 1, answer("refunds"))
+
+    close = embedding(0) + 0.01 * embedding(1)
+    assert cache.get("what's the refund policy", close, PARAMS, 1) == answer("refunds")
+    assert cache.get("something else", embedding(2), PARAMS, 1) is None
+    assert cache.get("what is the refund policy", embedding(0), (5, None, None), 1) is None
+    assert cache.stats() == {"size": 1, "hits": 1, "misses": 2}
+
+
+def test_exact_terms_must_match():
+    cache = SemanticAnswerCache(DIM, threshold=0.95)
+    cache.put("what does ERR-404 mean", embedding(0), PARAMS, 1, answer("404"))
+
+    # Same embedding, as a model may well give for such close questions
+    assert cache.get("what does ERR-405 mean", embedding(0), PARAMS, 1) is None
+    assert cache.get("what does err-404 mean?", embedding(0), PARAMS, 1) == answer("404")
+
+    cache.put("what does ERR-405 mean", embedding(0), PARAMS, 1, answer("405"))
+    assert cache.get("what does ERR-405 mean", embedding(0), PARAMS, 1) == answer("405")
+
+
+def test_new_corpus_version_empties_the_cache():
+    cache = SemanticAnswerCache(DIM)
+    cache.put("question", embedding(0), PARAMS, 1, answer("old"))
+    assert cache.get("question", embedding(0), PARAMS, 2) is None
+    assert len(cache) == 0
+
+    # Answers computed on an older version are not stored
+    cache.put("question", embedding(0), PARAMS, 1, answer("old"))
+    assert len(cache) == 0
+
+
+def test_least_recently_used_is_evicted():
+    cache = SemanticAnswerCache(DIM, max_entries=2)
+    for i in range(2):
+        cache.put(f"question {i}", embedding(i), PARAMS, 1, answer(str(i)))
+    assert cache.get("question 0", embedding(0), PARAMS, 1) is not None
+    cache.put("question 2", embedding(2), PARAMS, 1, answer("2"))
+
+    assert cache.get("question 1", embedding(1), PARAMS, 1) is None
+    assert cache.get("question 0", embedding(0), PARAMS, 1) == answer("0")
+
+
+@pytest.mark.parametrize("hybrid", [False, True])
+def test_pipeline_bypasses_the_cache_for_exact_terms_in_hybrid_mode(fake_config, hybrid):
+    qa = QAPipeline(index_path="data/vector_store", hybrid=hybrid, answer_cache=SemanticAnswerCache(384))
+    qa.ingest_document("codes.txt", ["error ERR-404 means the page is missing"], "digest")
+
+    for _ in range(2):
+        qa.answer("what does error ERR-404 mean")
+        qa.answer("what does the error mean")
+
+    stats = qa.answer_cache.stats()
+    assert stats["hits"] == (1 if hybrid else 2)
+    assert stats["size"] == (1 if hybrid else 2)
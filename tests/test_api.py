@@ -0,0 +1,205 @@
+# tests/test_api.py
+# -------------------- upload -> status -> chat -> delete through the app -------------------- #
+
+import json
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import endpoints
+
+
+def wait_for(client: TestClient, path: str, done, timeout: float = 60.0) -> dict:
+    deadline = time.monotonic() + timeout
+    while True:
+        response = client.get(path)
+        body = response.json()
+        if done(response, body):
+            return body
+        assert time.monotonic() < deadline, f"{path} still answers {body}"
+        time.sleep(0.05)
+
+
+@pytest.fixture
+def client(fake_config, monkeypatch):
+    monkeypatch.setattr(endpoints, "_qa_pipeline", None)
+    monkeypatch.setattr(endpoints, "_ingestion_manager", None)
+    monkeypatch.setattr(endpoints, "_readiness", {"model": False, "index": False})
+
+    from main import app
+
+    with TestClient(app) as client:
+        wait_for(client, "/api/ready", lambda response, body: response.status_code == 200)
+        yield client
+
+
+# The fake embedding model compares whitespace-separated words, so
+# questions below reuse the document's wording
+DOCUMENT = (
+    "The warranty covers parts and labour for two years after purchase.\n\n"
+    "Refunds are issued within fourteen days of a returned item arriving."
+)
+
+
+def upload(client: TestClient, name: str, text: str) -> dict:
+    response = client.post("/api/upload", files=[("files", (name, text.encode(), "text/plain"))])
+    assert response.status_code == 200
+    job_id = response.json()["job_id"]
+    return wait_for(client, f"/api/upload/{job_id}", lambda response, body: body["finished_at"] is not None)
+
+
+def test_health_and_ready(client):
+    assert client.get("/api/health").json()["status"] == "healthy"
+    assert client.get("/api/ready").json()["ready"]
+
+
+def test_upload_chat_delete(client):
+    status = upload(client, "policy.txt", DOCUMENT)
+    assert status["status"] == "completed"
+    assert status["errors"] == []
+    assert status["chunks_embedded"] > 0
+
+    documents = client.get("/api/documents").json()
+    assert documents["total"] == 1
+    doc_id = documents["documents"][0]["id"]
+
+    answer = client.post("/api/chat", json={"prompt": "does the warranty cover parts and labour"}).json()
+    assert any("warranty" in source for source in answer["sources"])
+    assert answer["session_id"] is None
+
+    # Citations locate each source in the document's text
+    text = client.get(f"/api/documents/{doc_id}/text").text
+    for citation in answer["citations"]:
+        assert citation["document_id"] == doc_id and citation["filename"] == "policy.txt"
+        start, end = citation["span"]
+        assert text[start:end] == answer["sources"][citation["source"]]
+    assert {c["source"] for c in answer["citations"]} == set(range(len(answer["sources"])))
+
+    # The same file again is recognized as unchanged
+    assert upload(client, "policy.txt", DOCUMENT)["files_unchanged"] == 1
+
+    assert client.delete(f"/api/documents/{doc_id}").status_code == 200
+    assert client.get("/api/documents").json()["total"] == 0
+    assert client.delete(f"/api/documents/{doc_id}").status_code == 404
+    assert client.get(f"/api/documents/{doc_id}/text").status_code == 404
+    answer = client.post("/api/chat", json={"prompt": "does the warranty cover parts and labour"}).json()
+    assert answer["sources"] == []
+
+
+def test_unsupported_upload(client):
+    response = client.post("/api/upload", files=[("files", ("image.png", b"...", "image/png"))])
+    assert response.status_code == 400
+
+
+def test_sessions_are_opt_in(client):
+    upload(client, "policy.txt", DOCUMENT)
+
+    first = client.post("/api/chat", json={"prompt": "What about refunds?", "new_session": True}).json()
+    session_id = first["session_id"]
+    assert session_id
+
+    client.post("/api/chat", json={"prompt": "And the warranty?", "session_id": session_id})
+    qa = endpoints.get_qa_pipeline()
+    assert [m.role for m in qa.sessions.history(session_id)] == ["user", "assistant"] * 2
+
+    assert client.delete(f"/api/chat/sessions/{session_id}").status_code == 204
+    assert client.delete(f"/api/chat/sessions/{session_id}").status_code == 404
+
+
+def test_chat_stream(client):
+    upload(client, "policy.txt", DOCUMENT)
+
+    with client.stream("POST", "/api/chat/stream", json={"prompt": "when are refunds issued"}) as response:
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        body = "".join(response.iter_text())
+
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.split("\n"))
+        events.append((lines["event"], json.loads(lines["data"])))
+
+    names = [name for name, _ in events]
+    assert names[0] == "sources" and names[-1] == "done"
+    assert set(names[1:-1]) == {"token"}
+    tokens = "".join(data["token"] for name, data in events if name == "token")
+    assert tokens == events[-1][1]["answer"]
+    assert any("Refunds" in source for source in events[0][1]["sources"])
+
+
+def test_batch_chat(client):
+    upload(client, "policy.txt", DOCUMENT)
+
+    response = client.post("/api/chat/batch", json={"prompts": ["the warranty covers", "refunds are issued"]})
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert len(results) == 2
+    assert all(result["sources"] for result in results)
+
+
+def test_metrics(client):
+    upload(client, "policy.txt", DOCUMENT)
+    client.post("/api/chat", json={"prompt": "when are refunds issued"})
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    lines = response.text.splitlines()
+    assert "rag_documents 1.0" in lines
+    assert any(line.startswith("rag_index_vectors ") for line in lines)
+    assert any(line.startswith('rag_stage_duration_seconds_count{stage="search"}') for line in lines)
+    assert any(line.startswith('rag_ingestion_jobs{state="queued"}') for line in lines)
+
+
+def test_metrics_scrape_creates_nothing(fake_config, monkeypatch):
+    monkeypatch.setattr(endpoints, "_qa_pipeline", None)
+    monkeypatch.setattr(endpoints, "_ingestion_manager", None)
+    monkeypatch.setattr(endpoints, "_readiness", {"model": True, "index": False})
+    from metrics import PipelineCollector
+
+    collector = PipelineCollector(endpoints.peek_qa_pipeline, endpoints.peek_ingestion_manager)
+    assert list(collector.collect()) == []
+    assert endpoints._qa_pipeline is None and endpoints._ingestion_manager is None
+
+
+def test_uploads_are_deleted(client, tmp_path, monkeypatch):
+    uploads = tmp_path / "data" / "uploads"
+
+    assert upload(client, "policy.txt", DOCUMENT)["status"] == "completed"
+    assert upload(client, "policy.txt", DOCUMENT)["files_unchanged"] == 1
+    assert upload(client, "broken.pdf", "not a pdf")["errors"]
+    assert list(uploads.iterdir()) == []
+
+    # A failure after some files were saved removes them too
+    def failing_submit(files):
+        raise RuntimeError("queue unavailable")
+
+    monkeypatch.setattr(endpoints.get_ingestion_manager(), "submit", failing_submit)
+    response = client.post(
+        "/api/upload",
+        files=[("files", ("a.txt", b"first file", "text/plain")), ("files", ("b.txt", b"second", "text/plain"))],
+    )
+    assert response.status_code == 500
+    assert list(uploads.iterdir()) == []
+
+
+def test_same_named_files_in_different_folders(client):
+    for folder in ("2023", "2024"):
+        upload(client, f"reports/{folder}/summary.txt", f"summary of {folder}")
+
+    response = client.post(
+        "/api/upload",
+        data={"keys": ["crm/account-7"]},
+        files=[("files", ("summary.txt", b"summary of account", "text/plain"))],
+    )
+    wait_for(client, f"/api/upload/{response.json()['job_id']}", lambda response, body: body["finished_at"])
+
+    names = sorted(d["filename"] for d in client.get("/api/documents").json()["documents"])
+    assert names == ["crm/account-7", "reports/2023/summary.txt", "reports/2024/summary.txt"]
+
+    response = client.post(
+        "/api/upload",
+        data={"keys": ["one", "two"]},
+        files=[("files", ("summary.txt", b"summary", "text/plain"))],
+    )
+    assert response.status_code == 400
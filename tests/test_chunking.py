@@ -0,0 +1,78 @@
+# tests/test_chunking.py
+
+import pytest
+from tokenizers import Tokenizer, models, pre_tokenizers
+from transformers import PreTrainedTokenizerFast
+
+from chunking import TokenChunker, word_offsets
+from ingestion import extract_chunks
+
+SENTENCES = [
+    f"Sentence {i} explains part {i} of the manual, including code ERR-{i:03d}." for i in range(60)
+]
+TEXT = " ".join(SENTENCES[:30]) + "\n\n" + " ".join(SENTENCES[30:])
+
+
+@pytest.fixture(scope="module")
+def tokenizer():
+    """
+    Offline stand-in for the embedding model's fast tokenizer: splits
+    words and punctuation, so it counts more tokens than words.
+    """
+    model = Tokenizer(models.WordLevel({"[UNK]": 0}, unk_token="[UNK]"))
+    model.pre_tokenizer = pre_tokenizers.BertPreTokenizer()
+    return PreTrainedTokenizerFast(tokenizer_object=model, unk_token="[UNK]")
+
+
+def n_tokens(tokenizer, text: str) -> int:
+    return len(tokenizer(text, add_special_tokens=False)["input_ids"])
+
+
+def test_chunks_fit_the_token_budget(tokenizer):
+    chunker = TokenChunker(tokenizer, chunk_size=50, overlap=10)
+    chunks, spans = chunker.chunk(TEXT)
+
+    assert len(chunks) > 5
+    assert all(n_tokens(tokenizer, chunk) <= 50 for chunk in chunks)
+    # Word counts would have let chunks overflow the budget
+    assert max(len(chunk.split()) for chunk in chunks) < 50
+    assert [TEXT[start:end] for start, end in spans] == chunks
+    assert spans[0][0] == 0 and spans[-1][1] == len(TEXT)
+
+
+def test_chunks_end_at_sentences_and_overlap(tokenizer):
+    # Sentences are 15 tokens long, so one starts in every overlap
+    chunker = TokenChunker(tokenizer, chunk_size=50, overlap=20)
+    spans = chunker.spans(TEXT)
+
+    for (start, end), (next_start, _) in zip(spans, spans[1:]):
+        assert TEXT[end - 1] == "."
+        assert next_start < end  # consecutive chunks overlap
+        assert TEXT[next_start:].startswith("Sentence")
+
+
+def test_chunks_prefer_paragraph_breaks(tokenizer):
+    # The paragraph break falls at token 450, in the second half of the window
+    chunker = TokenChunker(tokenizer, chunk_size=600, overlap=10)
+    chunks = chunker.chunk(TEXT)[0]
+    assert chunks[0] == " ".join(SENTENCES[:30])
+
+
+def test_word_mode_counts_words():
+    chunker = TokenChunker(None, chunk_size=20, overlap=5)
+    chunks = chunker.chunk(TEXT)[0]
+    assert all(len(chunk.split()) <= 20 for chunk in chunks)
+    assert word_offsets("  two  words ").tolist() == [[2, 5], [7, 12]]
+
+    with pytest.raises(ValueError):
+        TokenChunker(None, chunk_size=10, overlap=10)
+
+
+def test_extracted_part_slices_chunks_from_its_text(tmp_path):
+    path = tmp_path / "manual.txt"
+    path.write_text("  " + TEXT.replace(". ", ".\n"))
+
+    part = extract_chunks(str(path), chunk_size=40, overlap=8)
+    assert part.text == TEXT  # cleaned: single line breaks become spaces
+    assert part.chunks == [part.text[start:end] for start, end in part.spans]
+    assert part.pages == [] and part.skipped_pages == []
@@ -0,0 +1,82 @@
+# tests/test_documents.py
+
+from documents import DocumentRecord, DocumentRegistry, chunk_hash, document_id
+
+
+def record(name: str, chunk_ids) -> DocumentRecord:
+    return DocumentRecord(id=document_id(name), filename=name, content_hash=name, chunk_ids=list(chunk_ids))
+
+
+def test_document_id_uses_the_relative_path():
+    assert document_id("Report.PDF") == document_id("report.pdf")
+    assert document_id("Reports\\2024/./summary.pdf") == document_id("reports/2024/summary.pdf")
+    assert document_id("2023/summary.pdf") != document_id("2024/summary.pdf")
+    assert document_id("a.txt") != document_id("b.txt")
+
+
+def test_shared_chunk_removed_with_last_document():
+    registry = DocumentRegistry()
+    for cid, text in enumerate(["shared", "only a", "only b"]):
+        registry.add_chunk(chunk_hash(text), cid)
+
+    assert registry.register(record("a.txt", [0, 1])) == []
+    assert registry.register(record("b.txt", [0, 2])) == []
+    assert registry.live_chunk_ids() == [0, 1, 2]
+
+    assert registry.remove(document_id("a.txt")) == [1]
+    assert chunk_hash("only a") not in registry.chunk_ids
+    assert chunk_hash("shared") in registry.chunk_ids
+
+    assert sorted(registry.remove(document_id("b.txt"))) == [0, 2]
+    assert registry.live_chunk_ids() == []
+    assert registry.chunk_ids == {}
+
+
+def test_replacing_a_document_keeps_reused_chunks():
+    registry = DocumentRegistry()
+    registry.register(record("a.txt", [0, 1]))
+
+    # The new version drops chunk 0, keeps 1 and adds 2
+    assert registry.register(record("a.txt", [1, 2])) == [0]
+    assert registry.live_chunk_ids() == [1, 2]
+    assert len(registry) == 1
+
+
+def test_duplicate_chunks_in_one_document_count_once():
+    registry = DocumentRegistry()
+    registry.register(record("a.txt", [0, 0, 0]))
+    registry.register(record("b.txt", [0]))
+
+    assert registry.remove(document_id("a.txt")) == []
+    assert registry.remove(document_id("b.txt")) == [0]
+
+
+def test_discard_chunks_keeps_referenced_ones():
+    registry = DocumentRegistry()
+    registry.add_chunk(chunk_hash("kept"), 0)
+    registry.add_chunk(chunk_hash("orphan"), 1)
+    registry.register(record("a.txt", [0]))
+
+    assert registry.discard_chunks([0, 1]) == [1]
+    assert registry.chunk_ids == {chunk_hash("kept"): 0}
+
+
+def test_save_and_load(tmp_path):
+    registry = DocumentRegistry()
+    registry.add_chunk(chunk_hash("x"), 0)
+    registry.add_chunk(chunk_hash("y"), 1)
+    registry.register(record("a.txt", [0, 1]))
+    registry.register(record("b.txt", [1]))
+    registry.save(str(tmp_path))
+
+    loaded = DocumentRegistry()
+    assert loaded.load(str(tmp_path))
+    assert loaded.get(document_id("a.txt")).chunk_ids == [0, 1]
+    assert loaded.chunk_ids == registry.chunk_ids
+    # Reference counts are rebuilt from the records
+    assert loaded.remove(document_id("a.txt")) == [0]
+    assert loaded.remove(document_id("b.txt")) == [1]
+
+
+def test_load_without_file(tmp_path):
+    assert not DocumentRegistry().load(str(tmp_path))
@@ -0,0 +1,164 @@
+# tests/test_embeddings.py
+
+import threading
+
+import numpy as np
+import pytest
+
+import embeddings
+from embeddings import EmbeddingBatcher, EmbeddingCache, embed_texts
+
+
+def vector(seed: int) -> np.ndarray:
+    return np.random.default_rng(seed).standard_normal(8).astype("float32")
+
+
+# ------------------------------------------------------------------
+# EmbeddingCache
+# ------------------------------------------------------------------
+def test_cache_evicts_least_recently_used():
+    cache = EmbeddingCache(max_size=2)
+    cache.put_many(["a", "b"], [vector(0), vector(1)])
+    assert cache.get("a") is not None  # "b" is now the oldest
+    cache.put("c", vector(2))
+
+    assert cache.get("b") is None
+    assert np.array_equal(cache.get("a"), vector(0))
+    assert cache.stats() == {"size": 2, "hits": 2, "misses": 1}
+
+
+def test_cache_expires_entries(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(embeddings.time, "time", lambda: now[0])
+    cache = EmbeddingCache(ttl_seconds=10)
+    cache.put("a", vector(0))
+
+    now[0] += 5
+    assert cache.get("a") is not None
+    now[0] += 10
+    assert cache.get("a") is None
+    assert cache.stats()["size"] == 0
+
+
+def test_cache_disk_tier_is_shared(tmp_path):
+    path = str(tmp_path / "cache.sqlite3")
+    writer = EmbeddingCache(disk_path=path)
+    writer.put_many(["a", "b"], [vector(0), vector(1)])
+
+    reader = EmbeddingCache(disk_path=path)
+    found = reader.get_many(["a", "missing", "b"])
+    assert np.array_equal(found[0], vector(0))
+    assert found[1] is None
+    assert np.array_equal(found[2], vector(1))
+    # Disk hits are promoted to the in-memory tier
+    assert reader.stats() == {"size": 2, "hits": 2, "misses": 1}
+
+
+def test_cache_prunes_disk_rows(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(embeddings.time, "time", lambda: now[0])
+    monkeypatch.setattr(EmbeddingCache, "PRUNE_EVERY", 4)
+    path = str(tmp_path / "cache.sqlite3")
+    cache = EmbeddingCache(max_size=1, disk_path=path, max_disk_rows=3)
+
+    for i in range(4):
+        now[0] += 1
+        cache.put(f"key{i}", vector(i))
+
+    rows = cache._disk.execute("SELECT key FROM embeddings ORDER BY created").fetchall()
+    assert [key for (key,) in rows] == ["key1", "key2", "key3"]
+    assert EmbeddingCache(disk_path=path).get("key0") is None
+
+
+def test_embed_texts_encodes_each_text_once(fake_config, monkeypatch):
+    encoded = []
+    encode = embeddings._encode
+
+    def counting_encode(texts, batch_size, normalize):
+        encoded.extend(texts)
+        return encode(texts, batch_size, normalize)
+
+    monkeypatch.setattr(embeddings, "_encode", counting_encode)
+    first = embed_texts(["alpha", "beta", "alpha"])
+    second = embed_texts(["beta", "gamma"])
+
+    assert encoded == ["alpha", "beta", "gamma"]
+    assert np.array_equal(first[0], first[2])
+    assert np.array_equal(first[1], second[0])
+    assert embeddings.get_embedding_cache().stats()["misses"] == 3
+
+
+# ------------------------------------------------------------------
+# EmbeddingBatcher
+# ------------------------------------------------------------------
+def blocking_encode(monkeypatch) -> tuple:
+    """
+    Patch `_encode` so calls wait on an event, letting requests queue up
+    behind the first one, and fail while `failing` is set. Returns the two
+    events and the list of batch sizes.
+    """
+    release = threading.Event()
+    failing = threading.Event()
+    sizes = []
+    encode = embeddings._encode
+
+    def slow_encode(texts, batch_size, normalize):
+        sizes.append(len(texts))
+        release.wait(timeout=10)
+        if failing.is_set():
+            raise RuntimeError("encode failed")
+        return encode(texts, batch_size, normalize)
+
+    monkeypatch.setattr(embeddings, "_encode", slow_encode)
+    return release, failing, sizes
+
+
+def wait_until(condition) -> None:
+    for _ in range(1000):
+        if condition():
+            return
+        threading.Event().wait(0.01)
+    raise AssertionError("condition not reached")
+
+
+def test_batcher_matches_direct_encode(fake_config):
+    batcher = EmbeddingBatcher()
+    for text in ("first query", "second query"):
+        expected = embeddings._encode([text], 1, True)[0]
+        assert np.array_equal(batcher.embed(text, timeout=10), expected)
+
+
+def test_batcher_coalesces_concurrent_requests(fake_config, monkeypatch):
+    release, _, sizes = blocking_encode(monkeypatch)
+    batcher = EmbeddingBatcher(max_batch_size=8)
+
+    first = batcher.submit("query 0")
+    wait_until(lambda: sizes)  # the first batch is being encoded
+    futures = [batcher.submit(f"query {i}") for i in range(1, 13)]
+    release.set()
+
+    vectors = [first.result(timeout=10)] + [future.result(timeout=10) for future in futures]
+    assert sizes == [1, 8, 4]
+    assert batcher.batches == 3 and batcher.items == 13
+    for i, vector in enumerate(vectors):
+        assert np.array_equal(vector, embeddings._encode([f"query {i}"], 1, True)[0])
+
+
+def test_batcher_fails_every_request_in_a_batch(fake_config, monkeypatch):
+    release, failing, sizes = blocking_encode(monkeypatch)
+    batcher = EmbeddingBatcher()
+
+    failing.set()
+    first = batcher.submit("query 0")
+    wait_until(lambda: sizes)
+    futures = [batcher.submit(f"query {i}") for i in range(1, 4)]
+    release.set()
+
+    for future in [first] + futures:
+        with pytest.raises(RuntimeError, match="encode failed"):
+            future.result(timeout=10)
+    assert sizes == [1, 3]
+
+    # The batcher keeps serving after a failed batch
+    failing.clear()
+    assert batcher.embed("query 4", timeout=10).shape == (384,)
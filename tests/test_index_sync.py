@@ -0,0 +1,109 @@
+# tests/test_index_sync.py
+
+import threading
+
+import pytest
+
+from documents import document_id
+from index_sync import IndexSync
+from ingestion import IngestionJob, IngestionManager, JobStore
+from qa_pipeline import QAPipeline
+
+
+@pytest.fixture
+def workers(fake_config):
+    """
+    Two pipelines sharing one index directory, as two uvicorn workers do.
+    """
+    def worker() -> QAPipeline:
+        return QAPipeline(index_path="data/vector_store", sync=IndexSync("data/vector_store", 0.05), mmap=True)
+
+    return worker(), worker()
+
+
+def test_saves_are_picked_up_by_other_workers(workers):
+    first, second = workers
+    assert not first.load() and not second.load()
+
+    with first.writing():
+        first.ingest_document("a.txt", ["first worker chunk"], "digest-a")
+        first.save()
+    assert second.sync.changed()
+    assert second.load()
+    assert not second.sync.changed()
+    assert second.is_unchanged("a.txt", "digest-a")
+
+    # A writer starts from the latest save, so nothing is lost
+    with second.writing():
+        second.ingest_document("b.txt", ["second worker chunk"], "digest-b")
+        second.save()
+    first.load()
+    assert {r.filename for r in first.list_documents()} == {"a.txt", "b.txt"}
+    assert first.store.ntotal == 2
+
+
+def test_one_writer_at_a_time(workers):
+    first, second = workers
+    entered = threading.Event()
+
+    def write() -> None:
+        with second.sync.writer():
+            entered.set()
+
+    with first.sync.writer():
+        thread = threading.Thread(target=write)
+        thread.start()
+        assert not entered.wait(0.3)
+    assert entered.wait(5)
+    thread.join()
+
+
+def test_watch_reloads_in_the_background(workers):
+    first, second = workers
+    second.watch_index()
+
+    with first.writing():
+        first.ingest_document("a.txt", ["watched chunk"], "digest")
+        first.delete_document(document_id("a.txt"))
+        first.ingest_document("b.txt", ["watched chunk"], "digest")
+        first.save()
+
+    for _ in range(200):
+        if not second.sync.changed():
+            break
+        threading.Event().wait(0.05)
+    assert [r.filename for r in second.list_documents()] == ["b.txt"]
+
+
+def test_job_status_is_shared(tmp_path):
+    path = str(tmp_path / "jobs.sqlite3")
+    job = IngestionJob([("a.txt", "data/uploads/a.txt")])
+    job.status = "running"
+    job.errors.append("b.txt: unreadable")
+    JobStore(path).put(job)
+
+    seen = JobStore(path).get(job.id)
+    assert seen.to_status() == job.to_status()
+    assert JobStore(path).get("unknown") is None
+
+
+def test_jobs_are_reported_by_every_worker(fake_config, tmp_path):
+    qa = QAPipeline(index_path="data/vector_store")
+    store = JobStore(str(tmp_path / "jobs.sqlite3"))
+    running = IngestionManager(qa, max_workers=1, job_store=store)
+    other = IngestionManager(qa, max_workers=1, job_store=JobStore(store.path))
+    try:
+        upload = tmp_path / "a.txt"
+        upload.write_text("shared job status text")
+        job = running.submit([("a.txt", str(upload))])
+        for _ in range(400):
+            if running.get_job(job.id).finished_at is not None:
+                break
+            threading.Event().wait(0.05)
+
+        seen = other.get_job(job.id)
+        assert seen is not None and seen.status == "completed"
+        assert seen.files_processed == 1 and seen.chunks_embedded == job.chunks_embedded > 0
+    finally:
+        running.shutdown()
+        other.shutdown()
@@ -0,0 +1,102 @@
+# tests/test_ingestion.py
+
+import threading
+
+import ingestion
+from ingestion import IngestionManager, extract_chunks
+from qa_pipeline import QAPipeline
+
+
+def write_pdf(path, pages: list) -> None:
+    """
+    Write a minimal PDF with one line of Helvetica text per page.
+    """
+    n = len(pages)
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [%s] /Count %d >>" % (" ".join(f"{4 + 2 * i} 0 R" for i in range(n)), n),
+        "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i, text in enumerate(pages):
+        stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET"
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {5 + 2 * i} 0 R >>"
+        )
+        objects.append(f"<< /Length {len(stream)} >>\nstream\n{stream}\nendstream")
+
+    out = "%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n{body}\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n"
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets)
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+    path.write_bytes(out.encode("latin-1"))
+
+
+def page_text(number: int) -> str:
+    return " ".join(f"page{number} word{i}" for i in range(10))
+
+
+def test_pdf_chunks_carry_page_numbers(tmp_path):
+    path = tmp_path / "manual.pdf"
+    write_pdf(path, [page_text(n) for n in range(1, 6)])
+
+    part = extract_chunks(str(path), chunk_size=15, overlap=3)
+    assert len(part.chunks) > 5 and part.skipped_pages == []
+    for chunk, (first, last) in zip(part.chunks, part.pages):
+        numbers = {int(word[4:]) for word in chunk.split() if word.startswith("page")}
+        assert (min(numbers), max(numbers)) == (first, last)
+    assert part.pages[0][0] == 1 and part.pages[-1][1] == 5
+
+
+def test_pdf_page_range_and_skipped_pages(tmp_path, monkeypatch):
+    path = tmp_path / "manual.pdf"
+    write_pdf(path, [page_text(n) for n in range(1, 6)])
+
+    part = extract_chunks(str(path), chunk_size=100, overlap=10, page_range=(2, 3))
+    assert part.text.split()[0] == "page2" and part.text.split()[-1] == "word9"
+    assert {word for word in part.text.split() if word.startswith("page")} == {"page2", "page3"}
+    assert part.pages == [(2, 3)]
+
+    iter_pdf_pages = ingestion.iter_pdf_pages
+
+    def unreadable_page_3(file_path, first, last, page_timeout):
+        for number, text in iter_pdf_pages(file_path, first, last, page_timeout):
+            yield number, None if number == 3 else text
+
+    monkeypatch.setattr(ingestion, "iter_pdf_pages", unreadable_page_3)
+    part = extract_chunks(str(path), chunk_size=100, overlap=10, page_range=(2, 4))
+    assert part.skipped_pages == [3]
+    assert "page3" not in part.text and part.pages == [(2, 4)]
+
+
+def test_long_pdfs_are_split_into_page_ranges(fake_config, tmp_path):
+    path = tmp_path / "manual.pdf"
+    write_pdf(path, [page_text(n) for n in range(1, 6)])
+    qa = QAPipeline(index_path="data/vector_store")
+    manager = IngestionManager(qa, max_workers=1, chunk_size=15, chunk_overlap=3, pages_per_task=2)
+    try:
+        pool = manager._get_extract_pool()
+        parts = [future.result(timeout=30) for future in manager._submit_parts(pool, str(path))]
+        assert [(part.pages[0][0], part.pages[-1][1]) for part in parts] == [(1, 2), (3, 4), (5, 5)]
+
+        job = manager.submit([("manual.pdf", str(path))])
+        for _ in range(400):
+            if manager.get_job(job.id).finished_at is not None:
+                break
+            threading.Event().wait(0.05)
+        assert job.status == "completed" and not job.errors
+
+        record = qa.list_documents()[0]
+        text = qa.texts.get(record.id)
+        assert record.pages[0][0] == 1 and record.pages[-1][1] == 5
+        # Spans of every part point into the joined document text
+        for (start, end), (first, last) in zip(record.spans, record.pages):
+            numbers = {int(word[4:]) for word in text[start:end].split() if word.startswith("page")}
+            assert (min(numbers), max(numbers)) == (first, last)
+    finally:
+        manager.shutdown()
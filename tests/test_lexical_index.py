@@ -0,0 +1,66 @@
+# tests/test_lexical_index.py
+
+import threading
+
+from lexical_index import BM25Index, tokenize
+
+
+def filled_index(n: int = 200) -> BM25Index:
+    index = BM25Index()
+    index.add(range(n), [f"invoice number ref{i} for customer account" for i in range(n)])
+    return index
+
+
+def test_tokenize_keeps_codes_and_their_parts():
+    assert tokenize("Error ERR-404 in v2.1 of the app") == ["error", "err-404", "err", "404", "v2.1", "v2", "1", "app"]
+
+
+def test_exact_term_ranks_first():
+    index = filled_index()
+    assert index.search("ref42", k=3)[0][0] == 42
+    assert index.search("unknown words", k=3) == []
+
+
+def test_removed_chunks_are_not_returned(tmp_path):
+    index = filled_index()
+    index.remove([42])
+    assert index.search("ref42", k=3) == []
+    assert len(index) == 199
+
+    index.save(str(tmp_path))
+    assert index.search("ref42", k=3) == []
+    assert index.search("ref43", k=1)[0][0] == 43
+
+
+def test_save_and_load(tmp_path):
+    index = filled_index()
+    index.save(str(tmp_path))
+
+    loaded = BM25Index()
+    assert not loaded.load(str(tmp_path), rows=201)
+    assert loaded.load(str(tmp_path), rows=200)
+    assert loaded.search("ref7", k=1) == index.search("ref7", k=1)
+    loaded.add([200], ["added after the load ref200"])
+    assert loaded.search("ref200", k=1)[0][0] == 200
+
+
+def test_search_during_saves(tmp_path):
+    index = filled_index(2000)
+    expected = index.search("ref7 customer", k=5)
+    wrong = []
+    stop = threading.Event()
+
+    def search() -> None:
+        while not stop.is_set():
+            if index.search("ref7 customer", k=5) != expected:
+                wrong.append(1)
+
+    readers = [threading.Thread(target=search) for _ in range(2)]
+    for reader in readers:
+        reader.start()
+    for _ in range(20):
+        index.save(str(tmp_path))
+    stop.set()
+    for reader in readers:
+        reader.join()
+    assert not wrong
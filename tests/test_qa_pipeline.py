@@ -0,0 +1,101 @@
+# tests/test_qa_pipeline.py
+
+import pytest
+
+from documents import document_id
+from embeddings import embed_query
+from qa_pipeline import QAPipeline
+
+
+@pytest.fixture
+def qa(fake_config):
+    return QAPipeline(index_path="data/vector_store")
+
+
+def texts_found(qa: QAPipeline, query: str, k: int = 10) -> set:
+    return {r.text for r in qa.store.search(embed_query(query), k=k)}
+
+
+def test_documents_share_chunks(qa):
+    qa.ingest_document("a.txt", ["shared chunk text", "only in a"], "digest-a")
+    qa.ingest_document("b.txt", ["shared chunk text", "only in b"], "digest-b")
+    assert qa.store.ntotal == 3
+
+    qa.delete_document(document_id("a.txt"))
+    assert qa.store.ntotal == 2
+    assert "shared chunk text" in texts_found(qa, "shared chunk text")
+
+    qa.delete_document(document_id("b.txt"))
+    assert qa.store.ntotal == 0
+
+
+def test_document_writer_commits_parts(qa):
+    writer = qa.document_writer("doc.txt", "digest")
+    assert writer.add(["first part chunk"], [(0, 16)]) == 1
+    assert writer.add(["second part chunk", "first part chunk"], [(18, 35), (36, 52)]) == 1
+    record = writer.commit()
+
+    assert qa.documents.get(record.id) is record
+    assert record.chunk_ids == [0, 1, 0]
+    assert record.spans == [[0, 16], [18, 35], [36, 52]]
+    assert qa.is_unchanged("doc.txt", "digest")
+
+
+def test_document_writer_abort_leaves_store_unchanged(qa):
+    qa.ingest_document("a.txt", ["kept chunk", "also kept"], "digest-a")
+
+    writer = qa.document_writer("b.txt", "digest-b")
+    writer.add(["kept chunk", "orphan chunk one"])
+    writer.add(["orphan chunk two"])
+    writer.abort()
+
+    assert qa.store.ntotal == 2
+    assert texts_found(qa, "orphan chunk one two") == {"kept chunk", "also kept"}
+    assert qa.documents.get(document_id("b.txt")) is None
+    assert len(qa.documents.chunk_ids) == 2
+
+
+def test_replacing_a_document(qa):
+    qa.ingest_document("a.txt", ["old chunk", "same chunk"], "v1")
+    qa.ingest_document("a.txt", ["same chunk", "new chunk"], "v2")
+
+    assert len(qa.documents) == 1
+    assert qa.store.ntotal == 2
+    assert texts_found(qa, "old new same chunk") == {"same chunk", "new chunk"}
+
+
+def test_save_and_load(qa):
+    qa.ingest_document("a.txt", ["persisted chunk"], "digest")
+    qa.save()
+
+    loaded = QAPipeline(index_path="data/vector_store")
+    assert loaded.load()
+    assert loaded.is_unchanged("a.txt", "digest")
+    assert texts_found(loaded, "persisted chunk") == {"persisted chunk"}
+
+
+def test_document_text_and_citations(qa):
+    writer = qa.document_writer("guide.txt", "digest")
+    writer.add(["alpha beta"], [(0, 10)], text="alpha beta")
+    writer.add([], [], text="")  # e.g. a range of unreadable pages
+    writer.add(["gamma delta", "shared chunk"], [(0, 11), (12, 24)], text="gamma delta shared chunk")
+    record = writer.commit()
+    qa.ingest_document("other.txt", ["shared chunk"], "digest-2", spans=[(0, 12)], text="shared chunk")
+
+    text = qa.texts.get(record.id)
+    assert text == "alpha beta\n\ngamma delta shared chunk"
+    assert [text[start:end] for start, end in record.spans] == ["alpha beta", "gamma delta", "shared chunk"]
+
+    citations = qa.cite(["gamma delta", "shared chunk", "not stored"])
+    assert [(c["source"], c["filename"], c["span"]) for c in citations] == sorted(
+        [(0, "guide.txt", [12, 23]), (1, "guide.txt", [24, 36]), (1, "other.txt", [0, 12])],
+        key=lambda c: (c[0], document_id(c[1])),
+    )
+
+    # Texts live in the index directory, readable by a fresh pipeline
+    loaded = QAPipeline(index_path="data/vector_store")
+    assert loaded.texts.get(record.id) == text
+
+    qa.delete_document(record.id)
+    assert qa.texts.get(record.id) is None
+    assert [c["filename"] for c in qa.cite(["shared chunk"])] == ["other.txt"]
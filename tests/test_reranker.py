@@ -0,0 +1,65 @@
+# tests/test_reranker.py
+
+from reranker import CrossEncoderReranker, build_reranker
+from vector_store import SearchResult
+
+
+class FakeCrossEncoder:
+    """
+    Scores a pair by how many query words the passage contains.
+    """
+
+    def __init__(self):
+        self.pairs = []
+
+    def predict(self, pairs, batch_size, show_progress_bar):
+        self.pairs.extend(pairs)
+        return [len(set(query.split()) & set(text.split())) for query, text in pairs]
+
+
+def reranker(**kwargs) -> CrossEncoderReranker:
+    reranker = CrossEncoderReranker(**kwargs)
+    reranker._model = FakeCrossEncoder()
+    return reranker
+
+
+def candidates(*texts: str) -> list:
+    return [SearchResult(chunk_id=i, score=1.0, text=text) for i, text in enumerate(texts)]
+
+
+def test_rerank_orders_by_model_score():
+    ranked = reranker().rerank("red apple", candidates("green pear", "red apple pie", "red car"), k=2)
+    assert [(r.chunk_id, r.score) for r in ranked] == [(1, 2.0), (2, 1.0)]
+    assert reranker().rerank("red apple", [], k=2) == []
+
+
+def test_scores_are_cached_per_query_and_chunk():
+    model = reranker(cache_size=3)
+    model.rerank("red apple", candidates("green pear", "red apple pie"), k=2)
+    model.rerank("Red  APPLE", candidates("green pear", "red apple pie", "red car"), k=2)
+
+    # Only the new chunk was scored the second time
+    assert len(model._model.pairs) == 3
+    assert (model.hits, model.misses) == (2, 3)
+
+    model.rerank("pear", candidates("green pear"), k=1)
+    assert model.stats()["cache_size"] == 3  # the oldest entry was evicted
+
+
+def test_candidate_budget_adapts_to_cost_and_load():
+    model = reranker(max_candidates=20, latency_budget_ms=100)
+    assert model.candidate_budget(5) == 20  # no cost measured yet
+
+    model._record_cost(0.05, 10)  # 5 ms per pair
+    assert model.candidate_budget(5) == 20
+    model._in_flight = 1  # another request shares the CPU
+    assert model.candidate_budget(5) == 10
+    model._in_flight = 9
+    assert model.candidate_budget(5) == 5  # never fewer than wanted
+    assert model.stats()["candidates"] == 2
+
+
+def test_build_reranker():
+    assert build_reranker({"enabled": False, "max_candidates": 30}) is None
+    built = build_reranker({"enabled": True, "max_candidates": 30})
+    assert built.max_candidates == 30 and built._model is None
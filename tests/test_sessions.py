@@ -0,0 +1,104 @@
+# tests/test_sessions.py
+
+import pytest
+
+import sessions
+from schemas import ChatMessage
+from sessions import InMemorySessionStore, SQLiteSessionStore, build_session_store, truncate_history
+
+
+def turn(i: int) -> list:
+    return [ChatMessage(role="user", content=f"question {i}"), ChatMessage(role="assistant", content=f"answer {i}")]
+
+
+def contents(messages: list) -> list:
+    return [m.content for m in messages]
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """
+    A settable clock behind both the wall and the monotonic time.
+    """
+    now = [1000.0]
+    monkeypatch.setattr(sessions.time, "time", lambda: now[0])
+    monkeypatch.setattr(sessions.time, "monotonic", lambda: now[0])
+    return now
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path, clock):
+    if request.param == "memory":
+        return InMemorySessionStore(max_messages=4, idle_ttl=60)
+    return SQLiteSessionStore(str(tmp_path / "sessions.sqlite3"), max_messages=4, idle_ttl=60, evict_interval=0)
+
+
+def test_append_and_history(store):
+    assert store.history("s1") == []
+    store.append("s1", turn(1))
+    store.append("s2", turn(2))
+
+    history = store.history("s1")
+    assert contents(history) == ["question 1", "answer 1"]
+    assert [m.role for m in history] == ["user", "assistant"]
+    assert len(store) == 2
+
+
+def test_sessions_keep_their_last_messages(store):
+    for i in range(3):
+        store.append("s1", turn(i))
+    assert contents(store.history("s1")) == ["question 1", "answer 1", "question 2", "answer 2"]
+
+
+def test_idle_sessions_are_evicted(store, clock):
+    store.append("idle", turn(1))
+    store.append("active", turn(2))
+    clock[0] += 50
+    assert store.history("active")  # used again, so not idle
+    clock[0] += 20
+
+    assert store.evict_idle() == 1
+    assert store.history("idle") == []
+    assert len(store) == 1
+    assert contents(store.history("active")) == ["question 2", "answer 2"]
+
+    # An idle session starts over when it is used again
+    clock[0] += 100
+    store.append("active", turn(3))
+    assert contents(store.history("active")) == ["question 3", "answer 3"]
+
+
+def test_delete(store):
+    store.append("s1", turn(1))
+    assert store.delete("s1")
+    assert not store.delete("s1")
+    assert store.history("s1") == [] and len(store) == 0
+
+
+def test_sqlite_sessions_are_shared(tmp_path, clock):
+    path = str(tmp_path / "sessions.sqlite3")
+    first = SQLiteSessionStore(path, max_messages=4)
+    second = SQLiteSessionStore(path, max_messages=4)
+
+    first.append("s1", turn(1))
+    second.append("s1", turn(2))
+    assert contents(first.history("s1")) == contents(second.history("s1")) == [
+        "question 1", "answer 1", "question 2", "answer 2",
+    ]
+    assert second.delete("s1")
+    assert first.history("s1") == []
+
+
+def test_truncate_history_drops_whole_messages():
+    messages = [ChatMessage(role="user", content="x" * 40) for _ in range(3)]  # 11 tokens each
+    assert truncate_history(messages, 30) == messages[1:]
+    assert truncate_history(messages, 5) == []
+
+
+def test_build_session_store(tmp_path):
+    assert build_session_store({"enabled": False}) is None
+    assert isinstance(build_session_store({"history_tokens": 500}), InMemorySessionStore)
+    built = build_session_store({"backend": "sqlite", "path": str(tmp_path / "s.sqlite3"), "max_messages": 8})
+    assert isinstance(built, SQLiteSessionStore) and built.max_messages == 8
+    with pytest.raises(ValueError):
+        build_session_store({"backend": "redis"})
@@ -0,0 +1,102 @@
+# tests/test_sharded_store.py
+
+import numpy as np
+import pytest
+
+from sharded_store import ShardedVectorStore, ShardError
+
+DIM = 16
+N = 60
+
+
+def unit_vectors(n: int, seed: int = 0) -> np.ndarray:
+    data = np.random.default_rng(seed).standard_normal((n, DIM)).astype("float32")
+    return data / np.linalg.norm(data, axis=1, keepdims=True)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ShardedVectorStore(dim=DIM, index_path=str(tmp_path / "store"), shards=2, timeout=10.0, lexical=True)
+    yield store
+    store.close()
+
+
+def test_add_search_remove(store):
+    vectors = unit_vectors(N)
+    ids = store.add_embeddings(vectors, [f"chunk {i} ref{i}" for i in range(N)])
+
+    assert len(set(ids)) == N
+    assert {cid % 2 for cid in ids} == {0, 1}  # both shards hold chunks
+    assert store.ntotal == N
+    for i in (0, 7, 31):
+        top = store.search(vectors[i], k=3)[0]
+        assert (top.chunk_id, top.text) == (ids[i], f"chunk {i} ref{i}")
+    assert store.search_lexical("ref7", k=1)[0].chunk_id == ids[7]
+
+    version = store.version
+    assert store.remove_chunks([ids[7], ids[8]]) == 2
+    assert store.version > version
+    assert store.ntotal == N - 2
+    assert ids[7] not in {r.chunk_id for r in store.search(vectors[7], k=10)}
+
+
+def test_save_and_load(store, tmp_path):
+    vectors = unit_vectors(N)
+    ids = store.add_embeddings(vectors, [f"chunk {i}" for i in range(N)])
+    store.save()
+
+    loaded = ShardedVectorStore(dim=DIM, index_path=str(tmp_path / "store"), shards=2, timeout=10.0)
+    try:
+        assert loaded.load()
+        assert loaded.ntotal == N
+        assert loaded.search(vectors[5], k=1)[0].chunk_id == ids[5]
+    finally:
+        loaded.close()
+
+    three = ShardedVectorStore(dim=DIM, index_path=str(tmp_path / "store"), shards=3, timeout=10.0)
+    try:
+        with pytest.raises(ValueError, match="shards"):
+            three.load()
+    finally:
+        three.close()
+
+
+def test_failed_add_is_rolled_back(store):
+    vectors = unit_vectors(N)
+    kept = store.add_embeddings(vectors[:10], [f"kept {i}" for i in range(10)])
+
+    shard = store._shards[1]
+    call = shard.call
+
+    def failing_call(timeout, method, *args, **kwargs):
+        if method == "add_embeddings":
+            raise ShardError("RuntimeError: disk full")
+        return call(timeout, method, *args, **kwargs)
+
+    shard.call = failing_call
+    with pytest.raises(ShardError, match="disk full"):
+        store.add_embeddings(vectors[10:], [f"new {i}" for i in range(10, N)])
+    shard.call = call
+
+    assert store.ntotal == 10
+    found = {r.chunk_id for r in store.search_batch(vectors, k=N)[0]}
+    assert found == set(kept)
+
+
+def test_slow_shard_is_left_out_of_searches(store):
+    vectors = unit_vectors(N)
+    ids = store.add_embeddings(vectors, [f"chunk {i}" for i in range(N)])
+
+    shard = store._shards[1]
+    call = shard.call
+
+    def timing_out(timeout, method, *args, **kwargs):
+        raise TimeoutError("no answer")
+
+    shard.call = timing_out
+    results = store.search(vectors[0], k=N)
+    shard.call = call
+
+    assert results and all(r.chunk_id % 2 == 0 for r in results)
+    assert len(results) == sum(1 for cid in ids if cid % 2 == 0)
+    assert store.stats() == {(1, "timeout"): 1}
@@ -0,0 +1,70 @@
+# tests/test_utils.py
+
+import random
+
+import pytest
+
+from utils import chunk_text, clean_text, iter_clean_text
+
+SAMPLES = [
+    "",
+    "   ",
+    "plain words",
+    "  leading and trailing  \n\n",
+    "hyphen-\nated words across a line break",
+    "para one.\n\n\n  para two.\n \n para three",
+    "ligature ﬁle, full-width ＡＢＣ, non breaking space",
+    "zero​width and control\x07 chars\r\nwindows line",
+    "tabs\tand\fform feeds\vhere",
+    "accents: café naïve Größe, Ελληνικά, 中文 text",
+    "codes err-404 v2.1 user_id a/b",
+    "ends with hyphen-",
+    "\n\nstarts with blank lines",
+]
+
+
+@pytest.mark.parametrize("text", SAMPLES)
+def test_clean_text_examples(text):
+    cleaned = clean_text(text)
+    assert cleaned == cleaned.strip()
+    assert "\n\n\n" not in cleaned and "  " not in cleaned
+    assert clean_text(cleaned) == cleaned
+
+
+def test_clean_text_normalizes():
+    assert clean_text("hyphen-\nated") == "hyphenated"
+    assert clean_text("a\n b\n\n\n c") == "a b\n\nc"
+    assert clean_text("ﬁle x​y") == "file xy"
+    assert clean_text("café") == "café"
+
+
+def pieces(text: str, rng: random.Random):
+    cuts = sorted(rng.sample(range(len(text) + 1), min(len(text) + 1, rng.randint(0, 8))))
+    start = 0
+    for cut in cuts + [len(text)]:
+        yield text[start:cut]
+        start = cut
+
+
+@pytest.mark.parametrize("text", SAMPLES)
+def test_iter_clean_text_matches_clean_text(text):
+    rng = random.Random(0)
+    for _ in range(50):
+        assert "".join(iter_clean_text(pieces(text, rng))) == clean_text(text)
+
+
+def test_iter_clean_text_on_pages():
+    rng = random.Random(1)
+    words = ["alpha", "beta-", "\n", "gamma", "\n\n", "  ", "délta", "​", "x"]
+    for _ in range(200):
+        text = " ".join(rng.choice(words) for _ in range(rng.randint(0, 40)))
+        assert "".join(iter_clean_text(pieces(text, rng))) == clean_text(text)
+
+
+def test_chunk_text_overlap():
+    words = [f"w{i}" for i in range(10)]
+    chunks = chunk_text(" ".join(words), chunk_size=4, overlap=2)
+    assert chunks[0] == "w0 w1 w2 w3"
+    assert chunks[1] == "w2 w3 w4 w5"
+    with pytest.raises(ValueError):
+        chunk_text("a b", chunk_size=2, overlap=2)
@@ -0,0 +1,100 @@
+# tests/test_vector_store.py
+
+import numpy as np
+import pytest
+
+from vector_store import INDEX_TYPES, SimpleVectorStore
+
+DIM = 32
+N = 600
+
+# Small enough to train on N vectors
+PARAMS = {"nlist": 4, "nprobe": 4, "pq_m": 8, "pq_nbits": 4, "train_size": 256}
+
+# Indexes that store vectors exactly enough to find each one first
+SELF_RETRIEVING = ("flat", "flat_fp16", "flat_sq8", "ivf_flat", "hnsw")
+
+
+def unit_vectors(n: int, seed: int = 0) -> np.ndarray:
+    data = np.random.default_rng(seed).standard_normal((n, DIM)).astype("float32")
+    return data / np.linalg.norm(data, axis=1, keepdims=True)
+
+
+def filled_store(index_type: str, index_path=None) -> tuple:
+    store = SimpleVectorStore(dim=DIM, index_path=index_path, index_type=index_type, lexical=True, **PARAMS)
+    vectors = unit_vectors(N)
+    texts = [f"chunk {i} ref{i}" for i in range(N)]
+    ids = []
+    for start in range(0, N, 100):
+        ids += store.add_embeddings(vectors[start : start + 100], texts[start : start + 100])
+    return store, vectors, ids
+
+
+@pytest.mark.parametrize("index_type", INDEX_TYPES)
+def test_add_and_search(index_type):
+    store, vectors, ids = filled_store(index_type)
+    store.compact()
+
+    assert ids == list(range(N))
+    assert store.ntotal == N
+    results = store.search(vectors[7], k=5)
+    assert len(results) == 5
+    assert [r.score for r in results] == sorted((r.score for r in results), reverse=True)
+    if index_type in SELF_RETRIEVING:
+        assert results[0].chunk_id == 7
+        assert results[0].text == "chunk 7 ref7"
+
+
+@pytest.mark.parametrize("index_type", INDEX_TYPES)
+def test_removed_chunks_are_not_returned(index_type):
+    store, vectors, _ = filled_store(index_type)
+    removed = set(range(0, N, 3))
+
+    assert store.remove_chunks(removed) == len(removed)
+    for compacted in (False, True):
+        if compacted:
+            store.compact()
+        assert store.ntotal == N - len(removed)
+        for row in store.search_batch(vectors[:20], k=10):
+            assert not removed & {r.chunk_id for r in row}
+        assert not removed & {r.chunk_id for r in store.search_lexical("ref3 ref6 ref9", k=10)}
+
+
+@pytest.mark.parametrize("index_type", INDEX_TYPES)
+def test_save_and_load(index_type, tmp_path):
+    store, vectors, _ = filled_store(index_type, str(tmp_path))
+    store.remove_chunks([1, 2, 3])
+    before = store.search_batch(vectors[:20], k=5)
+    store.save()
+
+    loaded = SimpleVectorStore(dim=DIM, index_path=str(tmp_path), index_type=index_type, lexical=True, **PARAMS)
+    assert loaded.load()
+    assert loaded.ntotal == N - 3
+    after = loaded.search_batch(vectors[:20], k=5)
+    assert [[r.chunk_id for r in row] for row in after] == [[r.chunk_id for r in row] for row in before]
+    assert [r.chunk_id for r in loaded.search_lexical("ref42", k=1)] == [42]
+
+    # Ids keep growing after a reload
+    assert loaded.add_embeddings(unit_vectors(1, seed=1), ["new chunk"]) == [N]
+
+
+def test_load_missing_index(tmp_path):
+    assert not SimpleVectorStore(dim=DIM, index_path=str(tmp_path / "none")).load()
+
+
+def test_hnsw_is_rebuilt_without_tombstones():
+    store, vectors, _ = filled_store("hnsw")
+    store.compact()
+
+    # Below merge_ratio, tombstones stay in the graph and are masked out
+    store.remove_chunks([1, 2])
+    store.compact()
+    assert store.index.ntotal == N and len(store._snapshot.deleted) == 2
+
+    removed = set(range(0, N, 10))
+    store.remove_chunks(removed)
+    store.compact()
+    assert store.index.ntotal == store.ntotal == N - len(removed | {1, 2})
+    assert not store._snapshot.deleted
+    assert store.search(vectors[7], k=1)[0].chunk_id == 7
+    assert not (removed | {1, 2}) & {r.chunk_id for r in store.search(vectors[10], k=20)}